@@ -0,0 +1,103 @@
+"""
+Response cache for hot read endpoints
+LRU + TTL cache of serialized JSON bodies, invalidated by the database generation
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    In-process cache of JSON responses
+
+    Entries are keyed by endpoint plus normalized query parameters and
+    remember the database generation they were built from. Any write that
+    bumps the generation (ingest, star/read, cleanup) makes every older
+    entry stale, so nothing has to track which keys a write affects.
+    """
+
+    def __init__(
+        self,
+        generation: Callable[[], int],
+        max_entries: int = 512,
+        ttl: float = 300
+    ):
+        self.generation = generation
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[str, Tuple[int, float, bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(endpoint: str, params: Mapping[str, str]) -> str:
+        """Build a cache key; parameter order and empty values don't matter"""
+        items = sorted((k, v) for k, v in params.items() if v not in (None, ""))
+        return endpoint + "?" + "&".join(f"{k}={v}" for k, v in items)
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        """Weak ETag derived from the response body"""
+        return 'W/"' + hashlib.sha1(body).hexdigest() + '"'
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """Return (body, etag) if the entry exists and is still fresh"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                generation, expires_at, body, etag = entry
+                if generation == self.generation() and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body, etag
+                del self._entries[key]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, body: bytes, generation: int) -> Tuple[bytes, str]:
+        """
+        Store a body built from the given generation
+
+        Callers read the generation *before* querying, so an entry built
+        while a write was landing is already stale when stored.
+        """
+        etag = self.make_etag(body)
+
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl, body, etag)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return body, etag
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "generation": self.generation()
+            }
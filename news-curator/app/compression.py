@@ -0,0 +1,156 @@
+"""
+Article body compression
+zlib (or zstd, when installed) with optional trained dictionaries
+"""
+
+import struct
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+# zstd is faster and supports proper dictionary training, but is an optional install
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# First byte of every compressed value; the dictionary formats are
+# followed by a 2-byte dictionary id
+ZLIB = 1
+ZLIB_DICT = 2
+ZSTD = 3
+ZSTD_DICT = 4
+
+# Untagged zlib streams (archive rows written before bodies were compressed
+# in the articles table) start with this CMF byte
+ZLIB_HEADER = 0x78
+
+# Bodies shorter than this are stored as plain text (not worth a header)
+MIN_COMPRESS_LENGTH = 128
+
+# zlib only looks back 32 KB, so a larger preset dictionary is wasted
+ZLIB_DICT_SIZE = 32 * 1024
+
+
+def train_dictionary(samples: Iterable[str], size: int = ZLIB_DICT_SIZE, codec: str = "zlib") -> bytes:
+    """
+    Build a compression dictionary from sample bodies
+
+    zstd has a real trainer. For zlib the dictionary is the most common
+    phrases (word 1-3 grams, weighted by the bytes they would save),
+    least common first since zlib codes nearby matches more cheaply.
+    """
+    samples = [sample for sample in samples if sample]
+
+    if codec == "zstd":
+        return zstandard.train_dictionary(size, [sample.encode() for sample in samples]).as_bytes()
+
+    phrases: Counter = Counter()
+    for sample in samples:
+        words = sample.split()
+        for n in (1, 2, 3):
+            for i in range(len(words) - n + 1):
+                phrases[" ".join(words[i:i + n])] += 1
+
+    chosen = []
+    total = 0
+    by_saving = sorted(
+        ((count * len(phrase), phrase) for phrase, count in phrases.items() if count > 1),
+        reverse=True
+    )
+    for _, phrase in by_saving:
+        encoded = phrase.encode() + b" "
+        if total + len(encoded) > min(size, ZLIB_DICT_SIZE):
+            continue
+        chosen.append(encoded)
+        total += len(encoded)
+
+    return b"".join(reversed(chosen))
+
+
+class ContentCodec:
+    """
+    Compresses article bodies for storage and restores them on read
+
+    Values carry their own format tag, so rows written with zlib, zstd or
+    any stored dictionary decode side by side, and plain text (old rows,
+    short bodies) passes through untouched. New values use zstd when it is
+    installed, else zlib, with the active dictionary if one is set.
+    """
+
+    def __init__(self, level: Optional[int] = None):
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self.level = level if level is not None else (9 if self.codec == "zstd" else 6)
+
+        self._dictionaries: Dict[int, Tuple[str, bytes]] = {}
+        self._zstd_dicts: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+        self.active_dictionary: Optional[int] = None
+        self._local = threading.local()
+
+    def add_dictionary(self, dictionary_id: int, codec: str, data: bytes, active: bool = True):
+        """Register a stored dictionary (active = used for new values)"""
+        self._dictionaries[dictionary_id] = (codec, data)
+        if codec == "zstd" and zstandard is not None:
+            self._zstd_dicts[dictionary_id] = zstandard.ZstdCompressionDict(data)
+        if active and codec == self.codec:
+            self.active_dictionary = dictionary_id
+            self._local = threading.local()
+
+    def compress(self, text: Optional[str]) -> Optional[Union[str, bytes]]:
+        """Storage form of a body"""
+        if text is None or len(text) < MIN_COMPRESS_LENGTH:
+            return text
+
+        data = text.encode()
+        dictionary_id = self.active_dictionary
+
+        if self.codec == "zstd":
+            if dictionary_id is None:
+                return bytes([ZSTD]) + self._zstd_compressor(None).compress(data)
+            return (
+                bytes([ZSTD_DICT]) + struct.pack(">H", dictionary_id)
+                + self._zstd_compressor(dictionary_id).compress(data)
+            )
+
+        if dictionary_id is None:
+            return bytes([ZLIB]) + zlib.compress(data, self.level)
+
+        compressor = zlib.compressobj(self.level, zdict=self._dictionaries[dictionary_id][1])
+        return (
+            bytes([ZLIB_DICT]) + struct.pack(">H", dictionary_id)
+            + compressor.compress(data) + compressor.flush()
+        )
+
+    def decompress(self, value: Optional[Union[str, bytes]]) -> Optional[str]:
+        """Text of a stored body (also registered as the SQL function decompress())"""
+        if value is None or isinstance(value, str):
+            return value
+
+        tag = value[0]
+        if tag == ZLIB:
+            return zlib.decompress(value[1:]).decode()
+        if tag == ZLIB_HEADER:
+            return zlib.decompress(value).decode()
+        if tag == ZSTD:
+            return zstandard.ZstdDecompressor().decompress(value[1:]).decode()
+
+        dictionary_id, = struct.unpack(">H", value[1:3])
+        if tag == ZLIB_DICT:
+            decompressor = zlib.decompressobj(zdict=self._dictionaries[dictionary_id][1])
+            return (decompressor.decompress(value[3:]) + decompressor.flush()).decode()
+        if tag == ZSTD_DICT:
+            return zstandard.ZstdDecompressor(dict_data=self._zstd_dicts[dictionary_id]).decompress(value[3:]).decode()
+
+        raise ValueError(f"Unknown compression tag {tag}")
+
+    def _zstd_compressor(self, dictionary_id: Optional[int]):
+        """zstd compressors aren't thread-safe, so each thread keeps its own"""
+        compressor = getattr(self._local, "zstd", None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(
+                level=self.level,
+                dict_data=self._zstd_dicts[dictionary_id] if dictionary_id is not None else None
+            )
+            self._local.zstd = compressor
+        return compressor
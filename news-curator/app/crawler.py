@@ -0,0 +1,191 @@
+"""
+Two-stage crawler for 'scrape' sources
+List pages are read for article links, then new articles are fetched one page at a time
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .database import Database
+from .scraper import WebScraper, NewspaperExtractor, parse_list_html
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Crawler:
+    """
+    Crawl non-RSS sources through the persistent crawl_queue table
+
+    Stage one re-reads the source's list page (sources.url) and queues
+    links that aren't stored yet. Stage two downloads queued article pages,
+    at most max_pages_per_crawl per run, waiting politeness_delay seconds
+    between requests to the same domain, and parses them in the scraper's
+    process pool. Failed pages are retried with a growing delay, article
+    pages until max_attempts. A failed list page fails the whole crawl, so
+    the fetch engine's circuit breaker sees it. Because the queue lives in
+    SQLite, a crawl cut short by a restart picks up where it left off.
+    """
+
+    MAX_RETRY_DELAY = 86400
+
+    def __init__(
+        self,
+        db: Database,
+        scraper: WebScraper,
+        dedup_index=None,
+        politeness_delay: float = 2.0,
+        max_pages_per_crawl: int = 50,
+        max_attempts: int = 3,
+        retry_delay: int = 900,
+        use_newspaper: bool = False
+    ):
+        self.db = db
+        self.scraper = scraper
+        self.dedup_index = dedup_index
+        self.politeness_delay = politeness_delay
+        self.max_pages_per_crawl = max_pages_per_crawl
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        self.newspaper = NewspaperExtractor() if use_newspaper else None
+        if self.newspaper is not None and not self.newspaper.available:
+            self.newspaper = None
+
+        self._next_request: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _wait_turn(self, url: str):
+        """Block until this domain may be requested again"""
+        host = urlparse(url).netloc.lower()
+
+        # Reserve the slot under the lock, sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_request.get(host, 0.0))
+            self._next_request[host] = slot + self.politeness_delay
+
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _known(self, url_hashes: List[str]) -> set:
+        """Which url hashes are already stored as articles"""
+        if self.dedup_index is not None and self.dedup_index.loaded:
+            return self.dedup_index.known(url_hashes)
+        return self.db.existing_url_hashes(url_hashes)
+
+    def crawl_source(self, source: Dict) -> int:
+        """
+        Run one crawl of a scrape source (blocking; call from a worker thread)
+
+        Returns:
+            Number of new articles stored
+
+        Raises:
+            RuntimeError: The list page failed, now or on an earlier crawl
+                whose retry time hasn't come yet, so the source is recorded
+                as failing
+        """
+        # A list page still queued from an earlier crawl failed then; it
+        # keeps its attempt count and retry time
+        self.db.enqueue_crawl(source['id'], 'list', [{'url': source['url']}])
+
+        pages = self.db.get_due_crawl_pages(source['id'], 'list')
+        if not pages:
+            raise RuntimeError(f"List page {source['url']} failed, waiting to retry")
+
+        for page in pages:
+            self._crawl_list_page(source, page)
+
+        return self._crawl_articles(source)
+
+    def _crawl_list_page(self, source: Dict, page: Dict):
+        """Stage one: queue article links that aren't stored yet"""
+        self._wait_turn(page['url'])
+        content = self.scraper.download(page['url'], source['name'], source.get('category'), kind='list')
+        if content is None:
+            # List pages never give up: the source's circuit breaker decides
+            # when the whole source is left alone
+            self._fail(page, "download failed", give_up=False)
+            raise RuntimeError(f"List page {page['url']} could not be downloaded")
+
+        links = parse_list_html(content, page['url'], source['name'], source.get('category'))
+        hashes = [self.db.hash_url(link['url']) for link in links]
+        known = self._known(hashes)
+        new_links = [link for link, url_hash in zip(links, hashes) if url_hash not in known]
+
+        queued = self.db.enqueue_crawl(source['id'], 'article', new_links)
+        self.db.finish_crawl_pages([page['id']])
+        logger.info(f"{source['name']}: {len(links)} links, {queued} newly queued")
+
+    def _crawl_articles(self, source: Dict) -> int:
+        """Stage two: fetch due article pages and store them"""
+        pages = self.db.get_due_crawl_pages(source['id'], 'article', self.max_pages_per_crawl)
+
+        # Anything stored since it was queued (e.g. by another source) is done
+        known = self._known([page['url_hash'] for page in pages])
+        self.db.finish_crawl_pages([page['id'] for page in pages if page['url_hash'] in known])
+
+        # Pages download one at a time (politeness) while earlier ones are
+        # parsed in the scraper's process pool; each is stored once parsed
+        added_count = 0
+        parsing: List[Tuple[Dict, Future]] = []
+        for page in pages:
+            if page['url_hash'] in known:
+                continue
+
+            self._wait_turn(page['url'])
+            if self.newspaper is not None:
+                article = self.newspaper.extract_article(page['url'], source['name'], source.get('category'))
+                added_count += self._store(page, article)
+                continue
+
+            content = self.scraper.download(page['url'], source['name'], source.get('category'))
+            if content is None:
+                self._fail(page, "download failed")
+                continue
+            parsing.append((page, self.scraper.parse_article(
+                content, page['url'], source['name'], source.get('category')
+            )))
+
+            while parsing and parsing[0][1].done():
+                added_count += self._store(*self._parsed(parsing.pop(0)))
+
+        for job in parsing:
+            added_count += self._store(*self._parsed(job))
+
+        return added_count
+
+    @staticmethod
+    def _parsed(job: Tuple[Dict, Future]) -> Tuple[Dict, Optional[Dict]]:
+        """Wait for a page's parse result (None if parsing failed)"""
+        page, future = job
+        try:
+            return page, future.result()
+        except Exception as e:
+            logger.error(f"Error parsing {page['url']}: {e}")
+            return page, None
+
+    def _store(self, page: Dict, article: Optional[Dict]) -> int:
+        """Store an extracted article and mark its page done"""
+        if article is None:
+            self._fail(page, "extraction failed")
+            return 0
+
+        # Link text is usually a better title than a generic page heading
+        if article.get('title') in (None, '', 'No Title') and page.get('title'):
+            article['title'] = page['title']
+
+        inserted = self.db.add_articles([article])['inserted']
+        self.db.finish_crawl_pages([page['id']])
+        return inserted
+
+    def _fail(self, page: Dict, error: str, give_up: bool = True):
+        """Schedule a retry with a delay that doubles on each attempt (up to a day)"""
+        delay = min(self.retry_delay * (2 ** page['attempts']), self.MAX_RETRY_DELAY)
+        self.db.fail_crawl_page(page['id'], error, delay, self.max_attempts if give_up else None)
+        logger.info(f"Crawl of {page['url']} failed ({error}), attempt {page['attempts'] + 1}")
@@ -5,32 +5,189 @@ SQLite-based storage with efficient indexing
 
 import sqlite3
 import hashlib
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+import base64
+import itertools
+import queue
+import threading
+from typing import List, Dict, Iterable, Iterator, Optional, Sequence, Set, Tuple
 from contextlib import contextmanager
 import json
+import time
+
+from .compression import MIN_COMPRESS_LENGTH, ContentCodec, train_dictionary
+from .dates import to_iso, to_timestamp
+from .fingerprint import (
+    NEAR_DUPLICATE_DISTANCE,
+    article_fingerprint,
+    canonicalize_url,
+    fingerprint_bands,
+    hamming_distance,
+    strip_tags,
+)
 
 
 class Database:
-    """Lightweight SQLite database manager"""
+    """
+    Lightweight SQLite database manager
+
+    Connections are pooled: one writer connection guarded by a lock and a
+    small pool of reader connections. The database runs in WAL mode so
+    readers never block on (or get blocked by) the background ingest.
+    """
+
+    SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+    def __init__(
+        self,
+        db_path: str = "data/news_curator.db",
+        readers: int = 4,
+        synchronous: str = "NORMAL",
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size: int = -64000,
+        busy_timeout: int = 5000
+    ):
+        if synchronous.upper() not in self.SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {self.SYNCHRONOUS_MODES}")
 
-    def __init__(self, db_path: str = "data/news_curator.db"):
         self.db_path = db_path
+        self.max_readers = max(1, readers)
+        self.synchronous = synchronous.upper()
+        self.mmap_size = int(mmap_size)
+        self.cache_size = int(cache_size)
+        self.busy_timeout = int(busy_timeout)
+
+        self._write_lock = threading.RLock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+
+        # Bumped after every committed write that changes what the API
+        # returns; response caches compare against it to know when they are
+        # stale. Writers set _dirty inside the transaction and get_connection
+        # bumps it once the commit has gone through, so a reader that sees
+        # the new generation also sees the new data.
+        self.generation = 0
+        self._dirty = False
+
+        # url_hashes inserted by the open write transaction, handed to the
+        # dedup index once it commits (a rolled back insert stored nothing)
+        self._inserted_hashes: List[str] = []
+
+        # Optional pre-parse dedup index (see dedup.py), fed with every committed insert
+        self.dedup_index = None
+
+        # Optional keyword scorer (see relevance.py), applied on every insert
+        self.scorer = None
+
+        # New articles with less content than this many characters are
+        # flagged for the enrichment worker (see enrichment.py); 0 = off
+        self.enrich_below = 0
+
+        # Article bodies are stored compressed (see compression.py)
+        self.codec = ContentCodec()
+
         self.init_database()
 
-    @contextmanager
-    def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with our PRAGMAs applied"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False
+        )
         conn.row_factory = sqlite3.Row
+        # Stored bodies are compressed; SQL (the FTS view and triggers) reads them through this
+        conn.create_function("decompress", 1, self.codec.decompress, deterministic=True)
+        # The search index holds plain text, not the markup bodies are stored with
+        conn.create_function("strip_tags", 1, strip_tags, deterministic=True)
+        # Only takes effect on a new (or VACUUMed) file, see
+        # _enable_incremental_vacuum; lets retention hand freed pages back
+        # to the OS a few at a time
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        conn.execute(f"PRAGMA cache_size = {self.cache_size}")
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        """Take a reader from the pool, opening one if the pool isn't full"""
         try:
-            yield conn
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._reader_lock:
+            if self._reader_count < self.max_readers:
+                self._reader_count += 1
+                return self._connect()
+
+        return self._readers.get()
+
+    @contextmanager
+    def get_connection(self, readonly: bool = False):
+        """
+        Context manager for database connections
+
+        Writes share a single connection and are serialized by a lock;
+        readonly=True borrows a pooled reader that can run alongside them.
+        """
+        if readonly:
+            conn = self._acquire_reader()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._readers.put(conn)
+            return
+
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+
+            conn = self._writer
+            try:
+                yield conn
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                self._dirty = False
+                self._inserted_hashes = []
+                raise e
+
+            if self._dirty:
+                self._dirty = False
+                self.generation += 1
+
+            inserted_hashes, self._inserted_hashes = self._inserted_hashes, []
+
+        # Outside the write lock: a resize of the dedup index must not hold up writers
+        if inserted_hashes and self.dedup_index is not None:
+            self.dedup_index.add_many(inserted_hashes)
+
+    def mark_changed(self):
+        """Invalidate response caches after another process (e.g. a replay) wrote to the database"""
+        with self._write_lock:
+            self.generation += 1
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        with self._reader_lock:
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._reader_count = 0
 
     def init_database(self):
         """Initialize database schema"""
@@ -44,7 +201,6 @@ class Database:
                     url TEXT UNIQUE NOT NULL,
                     url_hash TEXT UNIQUE NOT NULL,
                     title TEXT NOT NULL,
-                    content TEXT,
                     summary TEXT,
                     author TEXT,
                     source_name TEXT NOT NULL,
@@ -56,10 +212,36 @@ class Database:
                     is_starred INTEGER DEFAULT 0,
                     relevance_score REAL DEFAULT 0.0,
                     image_url TEXT,
+                    fingerprint INTEGER,
+                    duplicate_of INTEGER,
+                    needs_enrichment INTEGER DEFAULT 0,
+                    published_ts INTEGER,
                     UNIQUE(url_hash)
                 )
             """)
 
+            # Near-duplicate detection and epoch dates were added after the first release
+            added = self._add_missing_columns(cursor, "articles", {
+                "fingerprint": "INTEGER",
+                "duplicate_of": "INTEGER",
+                "needs_enrichment": "INTEGER DEFAULT 0",
+                "published_ts": "INTEGER"
+            })
+
+            # Bodies live in a 1:1 side table so list scans stay on small rows;
+            # every article has a row here, content NULL when there is no body
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS article_bodies (
+                    article_id INTEGER PRIMARY KEY,
+                    content BLOB
+                )
+            """)
+
+            # Older files keep the body inline in articles
+            cursor.execute("PRAGMA table_info(articles)")
+            if any(row['name'] == 'content' for row in cursor.fetchall()):
+                self._move_bodies(cursor)
+
             # Sources table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS sources (
@@ -72,10 +254,30 @@ class Database:
                     is_active INTEGER DEFAULT 1,
                     last_fetched TIMESTAMP,
                     fetch_interval INTEGER DEFAULT 3600,
-                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    consecutive_failures INTEGER DEFAULT 0,
+                    last_error TEXT,
+                    last_error_at TIMESTAMP,
+                    avg_latency_ms REAL,
+                    circuit_open_until TIMESTAMP
                 )
             """)
 
+            # HTTP validators and health state were added after the first release
+            self._add_missing_columns(cursor, "sources", {
+                "etag": "TEXT",
+                "last_modified": "TEXT",
+                "content_hash": "TEXT",
+                "consecutive_failures": "INTEGER DEFAULT 0",
+                "last_error": "TEXT",
+                "last_error_at": "TIMESTAMP",
+                "avg_latency_ms": "REAL",
+                "circuit_open_until": "TIMESTAMP"
+            })
+
             # Keywords table for filtering
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS keywords (
@@ -87,66 +289,909 @@ class Database:
                 )
             """)
 
-            # Create indexes for performance
+            # Pages still to fetch for 'scrape' sources (see crawler.py)
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_articles_published
-                ON articles(published_date DESC)
+                CREATE TABLE IF NOT EXISTS crawl_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_id INTEGER NOT NULL,
+                    stage TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    url_hash TEXT NOT NULL,
+                    title TEXT,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(stage, url_hash)
+                )
             """)
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_articles_category
-                ON articles(category)
+                CREATE INDEX IF NOT EXISTS idx_crawl_queue_due
+                ON crawl_queue(source_id, stage, status, next_attempt_at)
             """)
+
+            # Raw bodies kept by the optional snapshot store (see snapshots.py)
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_articles_source
-                ON articles(source_name)
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    digest TEXT UNIQUE NOT NULL,
+                    url TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    source_name TEXT,
+                    category TEXT,
+                    content_type TEXT,
+                    size INTEGER NOT NULL,
+                    stored_size INTEGER NOT NULL,
+                    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
             """)
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_articles_starred
-                ON articles(is_starred)
+                CREATE INDEX IF NOT EXISTS idx_snapshots_fetched
+                ON snapshots(fetched_at, id)
             """)
+
+            # Older files only have the free-text published_date
+            if "published_ts" in added:
+                self._backfill_published_ts(cursor)
+
+            # Articles moved out by the retention engine (see retention.py)
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_articles_url_hash
-                ON articles(url_hash)
+                CREATE TABLE IF NOT EXISTS articles_archive (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    url_hash TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    summary TEXT,
+                    author TEXT,
+                    source_name TEXT NOT NULL,
+                    category TEXT,
+                    tags TEXT,
+                    published_date TIMESTAMP,
+                    published_ts INTEGER,
+                    scraped_date TIMESTAMP,
+                    relevance_score REAL,
+                    image_url TEXT,
+                    content BLOB,
+                    archived_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_articles_archive_url_hash
+                ON articles_archive(url_hash)
             """)
 
+            # Trained dictionaries for body compression, newest is used for writes
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS compression_dictionaries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    codec TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("SELECT id, codec, data FROM compression_dictionaries ORDER BY id")
+            for row in cursor.fetchall():
+                self.codec.add_dictionary(row['id'], row['codec'], row['data'])
+
+            # Create indexes for performance
+            self._init_list_indexes(cursor)
+
+            self._init_search_index(cursor)
+            self._init_fingerprints(cursor)
+            self._init_counters(cursor)
+
+            # Older files were hashed on raw URLs and never fingerprinted
+            if "fingerprint" in added:
+                self._backfill_fingerprints(cursor)
+                self._rebuild_counters(cursor)
+
+        # Outside the transaction: VACUUM can't run inside one
+        self._enable_incremental_vacuum()
+
+    def _enable_incremental_vacuum(self):
+        """
+        Switch a file created by an older version to incremental vacuum
+
+        auto_vacuum only changes with a full VACUUM, so this runs once,
+        right after the migration above, which also leaves the space freed
+        by moving and compressing bodies to be reclaimed. Later the file
+        reports INCREMENTAL and this is a no-op.
+        """
+        with self._write_lock:
+            conn = self._writer
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 0:
+                return
+
+            # _connect already asked for INCREMENTAL; VACUUM applies it
+            conn.execute("VACUUM")
+            # The rewritten pages sit in the WAL until checkpointed
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # Every list filter has an index ending in (published_ts, id), the
+    # keyset order, so any page or date range is an index seek instead of a scan.
+    # They only hold listed rows (story duplicates are never listed), so the
+    # filter and order are answered from the index alone and only the rows
+    # on the page are read from the table. idx_articles_starred is the
+    # exception: retention walks unstarred rows duplicates included.
+    LIST_INDEXES = {
+        "idx_articles_published": "published_ts, id",
+        "idx_articles_category": "category, published_ts, id",
+        "idx_articles_category_unread": "category, is_read, published_ts, id",
+        "idx_articles_source": "source_name, published_ts, id",
+        "idx_articles_source_unread": "source_name, is_read, published_ts, id",
+        "idx_articles_unread": "is_read, published_ts, id",
+        "idx_articles_starred": "is_starred, published_ts, id",
+    }
+
+    FULL_LIST_INDEXES = ("idx_articles_starred",)
+
+    def _init_list_indexes(self, cursor):
+        """Create the list indexes, replacing older versions whose definition differs"""
+        for name, columns in self.LIST_INDEXES.items():
+            definition = f"ON articles({columns})"
+            if name not in self.FULL_LIST_INDEXES:
+                definition += " WHERE duplicate_of IS NULL"
+            self._create_index(cursor, name, definition)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_articles_url_hash
+            ON articles(url_hash)
+        """)
+
+        # The enrichment worker's to-do list
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_articles_needs_enrichment
+            ON articles(id) WHERE needs_enrichment = 1
+        """)
+
+        # sort=relevance pages by (relevance_score, id)
+        self._create_index(
+            cursor, "idx_articles_relevance",
+            "ON articles(relevance_score, id) WHERE duplicate_of IS NULL"
+        )
+
+    def _backfill_published_ts(self, cursor, batch_size: int = 1000):
+        """
+        Fill published_ts for existing rows
+
+        published_date holds whatever the feed or page said (ISO, RFC-822,
+        free text), so each value is parsed in Python. Parsable dates are
+        rewritten in the normalized ISO form; the rest fall back to the
+        time the article was scraped.
+        """
+        reader = cursor.connection.cursor()
+        reader.execute("SELECT id, published_date, scraped_date FROM articles")
+
+        while True:
+            rows = reader.fetchmany(batch_size)
+            if not rows:
+                break
+
+            updates = []
+            for row in rows:
+                published_ts = to_timestamp(row['published_date'])
+                if published_ts is None:
+                    published_ts = to_timestamp(row['scraped_date'])
+                    published_date = row['published_date'] or to_iso(row['scraped_date'])
+                else:
+                    published_date = to_iso(published_ts)
+                updates.append((published_date, published_ts, row['id']))
+
+            cursor.executemany(
+                "UPDATE articles SET published_date = ?, published_ts = ? WHERE id = ?",
+                updates
+            )
+
+        # Keyset pagination needs a total order, so no NULL dates (this
+        # runs once, with the migration; new rows always get a timestamp)
+        cursor.execute("""
+            UPDATE articles
+            SET published_date = strftime('%Y-%m-%dT%H:%M:%S', scraped_date),
+                published_ts = CAST(strftime('%s', scraped_date) AS INTEGER)
+            WHERE published_ts IS NULL
+        """)
+
+    # Triggers that keep articles_fts in sync with articles and article_bodies
+    FTS_TRIGGERS = ("articles_fts_insert", "articles_fts_delete", "articles_fts_update", "articles_fts_body_update")
+
+    def _move_bodies(self, cursor):
+        """
+        Move inline bodies from articles into article_bodies
+
+        The search view and triggers read articles.content, so they are
+        dropped before the column (_init_search_index recreates them and
+        rebuilds the index from the new view).
+        Dropping the column rewrites articles without the bodies.
+        """
+        cursor.execute("DROP VIEW IF EXISTS articles_text")
+        for name in self.FTS_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+        cursor.execute("""
+            INSERT OR IGNORE INTO article_bodies (article_id, content)
+            SELECT id, content FROM articles
+        """)
+        cursor.execute("ALTER TABLE articles DROP COLUMN content")
+
+    def _init_search_index(self, cursor):
+        """Create the FTS5 index over articles and the triggers that sync it"""
+        cursor.execute("""
+            SELECT sql FROM sqlite_master
+            WHERE type = 'table' AND name = 'articles_fts'
+        """)
+        row = cursor.fetchone()
+        needs_backfill = row is None or "articles_text" not in row['sql']
+
+        # Files from before compression index articles directly and hold
+        # plain bodies: drop that index and compress the bodies first
+        if needs_backfill:
+            for name in self.FTS_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute("DROP TABLE IF EXISTS articles_fts")
+            self._compress_bodies(cursor)
+
+        # External-content table: the text lives in articles and
+        # article_bodies, FTS only keeps the index and reads the text
+        # through a view that joins the two, decompresses the body and
+        # strips markup so tag names aren't searchable or shown in snippets.
+        # The index is rebuilt whenever the view's definition changes.
+        if self._create_view(cursor, "articles_text", """
+            SELECT articles.id, strip_tags(articles.title) AS title,
+                   strip_tags(articles.summary) AS summary,
+                   strip_tags(decompress(article_bodies.content)) AS content
+            FROM articles
+            LEFT JOIN article_bodies ON article_bodies.article_id = articles.id
+        """):
+            needs_backfill = True
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, summary, content,
+                content='articles_text',
+                content_rowid='id',
+                tokenize='porter unicode61 remove_diacritics 2'
+            )
+        """)
+
+        # The triggers index (and un-index) exactly what the view returns.
+        # An article is indexed once its body row is written (ingest adds
+        # the articles row first, then the body)
+        self._create_trigger(cursor, "articles_fts_insert", """
+            AFTER INSERT ON article_bodies BEGIN
+                INSERT INTO articles_fts (rowid, title, summary, content)
+                SELECT id, strip_tags(title), strip_tags(summary), strip_tags(decompress(new.content))
+                FROM articles WHERE id = new.article_id;
+            END
+        """)
+        # The index entry has to be removed with the body it was built from,
+        # so the body is dropped here, after it, rather than by a trigger of its own
+        self._create_trigger(cursor, "articles_fts_delete", """
+            AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary, content)
+                VALUES ('delete', old.id, strip_tags(old.title), strip_tags(old.summary),
+                        (SELECT strip_tags(decompress(content)) FROM article_bodies WHERE article_id = old.id));
+                DELETE FROM article_bodies WHERE article_id = old.id;
+            END
+        """)
+        # Only text changes touch the index, star/read updates don't
+        self._create_trigger(cursor, "articles_fts_update", """
+            AFTER UPDATE OF title, summary ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary, content)
+                VALUES ('delete', old.id, strip_tags(old.title), strip_tags(old.summary),
+                        (SELECT strip_tags(decompress(content)) FROM article_bodies WHERE article_id = old.id));
+                INSERT INTO articles_fts (rowid, title, summary, content)
+                VALUES (new.id, strip_tags(new.title), strip_tags(new.summary),
+                        (SELECT strip_tags(decompress(content)) FROM article_bodies WHERE article_id = new.id));
+            END
+        """)
+        self._create_trigger(cursor, "articles_fts_body_update", """
+            AFTER UPDATE OF content ON article_bodies BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary, content)
+                SELECT 'delete', id, strip_tags(title), strip_tags(summary), strip_tags(decompress(old.content))
+                FROM articles WHERE id = old.article_id;
+                INSERT INTO articles_fts (rowid, title, summary, content)
+                SELECT id, strip_tags(title), strip_tags(summary), strip_tags(decompress(new.content))
+                FROM articles WHERE id = new.article_id;
+            END
+        """)
+
+        if needs_backfill:
+            cursor.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+
+    def _compress_bodies(self, cursor, batch_size: int = 500):
+        """Compress bodies still stored as plain text"""
+        reader = cursor.connection.cursor()
+        reader.execute("""
+            SELECT article_id, content FROM article_bodies
+            WHERE typeof(content) = 'text' AND length(content) >= ?
+        """, (MIN_COMPRESS_LENGTH,))
+
+        while True:
+            rows = reader.fetchmany(batch_size)
+            if not rows:
+                break
+            cursor.executemany(
+                "UPDATE article_bodies SET content = ? WHERE article_id = ?",
+                [(self.codec.compress(row['content']), row['article_id']) for row in rows]
+            )
+
+    def train_content_dictionary(self, samples: int = 1000, size: int = 32 * 1024) -> Optional[int]:
+        """
+        Train a compression dictionary on recent bodies and use it for new ones
+
+        Existing rows keep the dictionary (or none) they were written with.
+
+        Returns:
+            The new dictionary's id, None if there were too few bodies
+        """
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT decompress(content) FROM article_bodies
+                WHERE content IS NOT NULL
+                ORDER BY article_id DESC LIMIT ?
+            """, (samples,))
+            bodies = [row[0] for row in cursor.fetchall()]
+
+        if len(bodies) < 20:
+            return None
+
+        data = train_dictionary(bodies, size, self.codec.codec)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO compression_dictionaries (codec, data) VALUES (?, ?)",
+                (self.codec.codec, data)
+            )
+            dictionary_id = cursor.lastrowid
+
+        self.codec.add_dictionary(dictionary_id, self.codec.codec, data)
+        return dictionary_id
+
+    # Counter scopes and the key expression for a row ('new' or 'old')
+    COUNTER_SCOPES = {
+        "all": "''",
+        "category": "COALESCE({row}.category, '')",
+        "source": "{row}.source_name",
+    }
+
+    def _counter_sql(self, row: str, sign: int) -> str:
+        """
+        Trigger statements that add (+1) or remove (-1) a row from the counters
+
+        Duplicates in a story cluster are hidden from lists, so they count as 0.
+        """
+        live = f"({row}.duplicate_of IS NULL)"
+        unread = f"({live} AND COALESCE({row}.is_read, 0) = 0)"
+        starred = f"({live} AND COALESCE({row}.is_starred, 0) = 1)"
+        statements = []
+
+        for scope, key in self.COUNTER_SCOPES.items():
+            key = key.format(row=row)
+            if sign > 0:
+                statements.append(f"""
+                    INSERT INTO article_counts (scope, key, total, unread, starred)
+                    VALUES ('{scope}', {key}, {live}, {unread}, {starred})
+                    ON CONFLICT (scope, key) DO UPDATE SET
+                        total = total + excluded.total,
+                        unread = unread + excluded.unread,
+                        starred = starred + excluded.starred;""")
+            else:
+                statements.append(f"""
+                    UPDATE article_counts SET
+                        total = total - {live},
+                        unread = unread - {unread},
+                        starred = starred - {starred}
+                    WHERE scope = '{scope}' AND key = {key};""")
+
+        return "".join(statements)
+
+    def _init_counters(self, cursor):
+        """Create the stats counters and the triggers that maintain them"""
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'article_counts'
+        """)
+        needs_backfill = cursor.fetchone() is None
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS article_counts (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                total INTEGER NOT NULL DEFAULT 0,
+                unread INTEGER NOT NULL DEFAULT 0,
+                starred INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, key)
+            ) WITHOUT ROWID
+        """)
+
+        self._create_trigger(cursor, "article_counts_insert", f"""
+            AFTER INSERT ON articles BEGIN
+                {self._counter_sql('new', 1)}
+            END
+        """)
+        self._create_trigger(cursor, "article_counts_delete", f"""
+            AFTER DELETE ON articles BEGIN
+                {self._counter_sql('old', -1)}
+            END
+        """)
+        self._create_trigger(cursor, "article_counts_update", f"""
+            AFTER UPDATE OF is_read, is_starred, category, source_name, duplicate_of
+            ON articles BEGIN
+                {self._counter_sql('old', -1)}
+                {self._counter_sql('new', 1)}
+            END
+        """)
+
+        if needs_backfill:
+            self._rebuild_counters(cursor)
+
+    @staticmethod
+    def _count_articles(cursor) -> Dict[Tuple[str, str], Tuple[int, int, int]]:
+        """Count articles per counter scope straight from the articles table"""
+        cursor.execute("""
+            SELECT 'all' AS scope, '' AS key, COUNT(*) AS total,
+                   SUM(is_read = 0) AS unread, SUM(is_starred = 1) AS starred
+            FROM articles WHERE duplicate_of IS NULL
+            UNION ALL
+            SELECT 'category', COALESCE(category, ''), COUNT(*),
+                   SUM(is_read = 0), SUM(is_starred = 1)
+            FROM articles WHERE duplicate_of IS NULL GROUP BY COALESCE(category, '')
+            UNION ALL
+            SELECT 'source', source_name, COUNT(*),
+                   SUM(is_read = 0), SUM(is_starred = 1)
+            FROM articles WHERE duplicate_of IS NULL GROUP BY source_name
+        """)
+        return {
+            (row['scope'], row['key']): (row['total'], row['unread'] or 0, row['starred'] or 0)
+            for row in cursor.fetchall()
+        }
+
+    def _rebuild_counters(self, cursor) -> int:
+        """Recompute every counter, returns how many had drifted"""
+        actual = self._count_articles(cursor)
+
+        cursor.execute("SELECT scope, key, total, unread, starred FROM article_counts")
+        stored = {
+            (row['scope'], row['key']): (row['total'], row['unread'], row['starred'])
+            for row in cursor.fetchall()
+        }
+
+        drifted = sum(
+            1 for key in set(actual) | set(stored)
+            if actual.get(key, (0, 0, 0)) != stored.get(key, (0, 0, 0))
+        )
+
+        cursor.execute("DELETE FROM article_counts")
+        cursor.executemany("""
+            INSERT INTO article_counts (scope, key, total, unread, starred)
+            VALUES (?, ?, ?, ?, ?)
+        """, [key + counts for key, counts in actual.items()])
+
+        return drifted
+
+    def reconcile_stats(self) -> int:
+        """
+        Recount the stats counters from the articles table
+
+        The triggers keep the counters exact, so this only repairs drift
+        from manual edits or an interrupted migration.
+
+        Returns:
+            Number of counters that were wrong
+        """
+        with self.get_connection() as conn:
+            drifted = self._rebuild_counters(conn.cursor())
+            if drifted:
+                self._dirty = True
+            return drifted
+
+    @staticmethod
+    def _fts_query(search: str) -> str:
+        """Turn free text into an FTS5 query: every word must match (prefix)"""
+        terms = [term.replace('"', '') for term in search.split()]
+        return " ".join(f'"{term}"*' for term in terms if term)
+
+    @staticmethod
+    def _add_missing_columns(cursor, table: str, columns: Dict[str, str]) -> List[str]:
+        """Add columns that an older database file does not have yet, returns the added names"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row['name'] for row in cursor.fetchall()}
+
+        added = []
+        for name, definition in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                added.append(name)
+        return added
+
+    @staticmethod
+    def _create_trigger(cursor, name: str, body: str):
+        """Create a trigger, replacing an existing one whose definition changed"""
+        sql = f"CREATE TRIGGER {name} {body.strip()}"
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,))
+        row = cursor.fetchone()
+
+        if row and row['sql'] == sql:
+            return
+        if row:
+            cursor.execute(f"DROP TRIGGER {name}")
+        cursor.execute(sql)
+
+    @staticmethod
+    def _create_index(cursor, name: str, definition: str):
+        """Create an index, replacing an existing one whose definition changed"""
+        sql = f"CREATE INDEX {name} {definition.strip()}"
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (name,))
+        row = cursor.fetchone()
+
+        if row and row['sql'] == sql:
+            return
+        if row:
+            cursor.execute(f"DROP INDEX {name}")
+        cursor.execute(sql)
+
+    @staticmethod
+    def _create_view(cursor, name: str, body: str) -> bool:
+        """
+        Create a view, replacing an existing one whose definition changed
+
+        Returns:
+            True if the view was created or replaced
+        """
+        sql = f"CREATE VIEW {name} AS {body.strip()}"
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = ?", (name,))
+        row = cursor.fetchone()
+
+        if row and row['sql'] == sql:
+            return False
+        if row:
+            cursor.execute(f"DROP VIEW {name}")
+        cursor.execute(sql)
+        return True
+
     @staticmethod
     def hash_url(url: str) -> str:
-        """Generate hash of URL for deduplication"""
-        return hashlib.md5(url.encode()).hexdigest()
+        """Generate hash of the canonical URL for deduplication"""
+        return hashlib.md5(canonicalize_url(url).encode()).hexdigest()
 
-    def add_article(self, article: Dict) -> Optional[int]:
-        """Add article to database, returns article ID or None if duplicate"""
+    @staticmethod
+    def _band_sql(row: str) -> List[str]:
+        """SQL for the four band keys of a row's fingerprint (see fingerprint_bands)"""
+        return [
+            f"({band} << 16) | (({row}.fingerprint >> {16 * band}) & 65535)"
+            for band in range(4)
+        ]
+
+    def _init_fingerprints(self, cursor):
+        """Create the near-duplicate lookup table and the triggers that fill it"""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS article_fingerprints (
+                band INTEGER NOT NULL,
+                article_id INTEGER NOT NULL,
+                PRIMARY KEY (band, article_id)
+            ) WITHOUT ROWID
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_articles_fingerprint
+            ON articles(fingerprint)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_articles_duplicate_of
+            ON articles(duplicate_of) WHERE duplicate_of IS NOT NULL
+        """)
+
+        insert_bands = f"""
+                INSERT OR IGNORE INTO article_fingerprints (band, article_id)
+                SELECT * FROM (VALUES {", ".join(f"({band}, new.id)" for band in self._band_sql('new'))})
+                WHERE new.fingerprint IS NOT NULL;"""
+        delete_bands = f"""
+                DELETE FROM article_fingerprints
+                WHERE article_id = old.id AND band IN ({", ".join(self._band_sql('old'))});"""
+
+        self._create_trigger(cursor, "article_fingerprints_insert", f"""
+            AFTER INSERT ON articles BEGIN{insert_bands}
+            END
+        """)
+        self._create_trigger(cursor, "article_fingerprints_update", f"""
+            AFTER UPDATE OF fingerprint ON articles BEGIN{delete_bands}{insert_bands}
+            END
+        """)
+
+        # Deleting the primary of a story cluster promotes its oldest copy
+        self._create_trigger(cursor, "article_fingerprints_delete", f"""
+            AFTER DELETE ON articles BEGIN{delete_bands}
+                UPDATE articles
+                SET duplicate_of = NULLIF(
+                    (SELECT MIN(id) FROM articles WHERE duplicate_of = old.id), id
+                )
+                WHERE duplicate_of = old.id;
+            END
+        """)
+
+    @staticmethod
+    def _find_near_duplicate(cursor, fingerprint: int) -> Optional[int]:
+        """
+        Primary article of the story a fingerprint belongs to, if any
+
+        Identical fingerprints come straight off the index; otherwise any
+        fingerprint within NEAR_DUPLICATE_DISTANCE bits shares a band, so
+        only articles in those four bands are compared.
+        """
+        cursor.execute("""
+            SELECT COALESCE(duplicate_of, id) FROM articles
+            WHERE fingerprint = ? LIMIT 1
+        """, (fingerprint,))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+
+        cursor.execute("""
+            SELECT DISTINCT articles.id, articles.fingerprint, articles.duplicate_of
+            FROM article_fingerprints
+            JOIN articles ON articles.id = article_fingerprints.article_id
+            WHERE article_fingerprints.band IN (?, ?, ?, ?)
+        """, fingerprint_bands(fingerprint))
+
+        best = None
+        for row in cursor.fetchall():
+            distance = hamming_distance(fingerprint, row['fingerprint'])
+            if distance <= NEAR_DUPLICATE_DISTANCE and (best is None or distance < best[0]):
+                best = (distance, row['duplicate_of'] or row['id'])
+
+        return best[1] if best else None
+
+    def _backfill_fingerprints(self, cursor):
+        """
+        Rehash stored URLs canonically and fingerprint every article
+
+        Rows whose URLs collapse to the same canonical form keep one primary
+        (the row already at the canonical URL, else the oldest); the rest are
+        marked as its duplicates and keep their old hash so url_hash stays
+        unique. Near-duplicate content is then grouped the same way ingest
+        does it, oldest article first.
+        """
+        cursor.execute("""
+            SELECT articles.id, url, url_hash, title, summary,
+                   decompress(article_bodies.content) AS content
+            FROM articles
+            LEFT JOIN article_bodies ON article_bodies.article_id = articles.id
+            ORDER BY articles.id
+        """)
+        rows = cursor.fetchall()
+
+        groups: Dict[str, List] = {}
+        for row in rows:
+            groups.setdefault(canonicalize_url(row['url']), []).append(row)
+
+        url_duplicates: Dict[int, int] = {}
+        for canonical, members in groups.items():
+            primary = next((row for row in members if row['url'] == canonical), members[0])
+            url_hash = hashlib.md5(canonical.encode()).hexdigest()
+            if primary['url_hash'] != url_hash:
+                cursor.execute("UPDATE articles SET url_hash = ? WHERE id = ?", (url_hash, primary['id']))
+            for row in members:
+                if row['id'] != primary['id']:
+                    url_duplicates[row['id']] = primary['id']
+
+        lookup = cursor.connection.cursor()
+        for row in rows:
+            fingerprint = article_fingerprint(dict(row))
+            duplicate_of = url_duplicates.get(row['id'])
+            if duplicate_of is None and fingerprint is not None:
+                duplicate_of = self._find_near_duplicate(lookup, fingerprint)
+                # Its own URL variants can come first and resolve to it
+                if duplicate_of == row['id']:
+                    duplicate_of = None
+
+            if fingerprint is not None or duplicate_of is not None:
+                cursor.execute("""
+                    UPDATE articles SET fingerprint = ?, duplicate_of = ?
+                    WHERE id = ?
+                """, (fingerprint, duplicate_of, row['id']))
+
+        # A URL group's primary can itself turn out to be a near-duplicate:
+        # point its variants at the story's primary, not at it
+        cursor.execute("""
+            UPDATE articles
+            SET duplicate_of = (SELECT p.duplicate_of FROM articles p WHERE p.id = articles.duplicate_of)
+            WHERE duplicate_of IN (SELECT id FROM articles WHERE duplicate_of IS NOT NULL)
+        """)
+
+    def _ingest_row(self, cursor, article: Dict) -> Tuple[Tuple, Optional[bytes]]:
+        """
+        INSERT parameters for an article, grouped into its story cluster,
+        and its body in stored form
+
+        Near-duplicates of a stored article are kept (so their URL counts
+        as seen) but without a body, and are hidden from lists. Other
+        articles with a short body are flagged for enrichment.
+        """
+        fingerprint = article_fingerprint(article)
+        duplicate_of = None
+        if fingerprint is not None:
+            duplicate_of = self._find_near_duplicate(cursor, fingerprint)
+        if duplicate_of is not None:
+            article = dict(article, content=None)
+
+        needs_enrichment = int(
+            duplicate_of is None
+            and len(article.get('content') or '') < self.enrich_below
+        )
+
+        row = self._article_row(article) + (fingerprint, duplicate_of, needs_enrichment)
+        return row, self.codec.compress(article.get('content'))
+
+    @staticmethod
+    def _published(article: Dict) -> Tuple[str, int]:
+        """
+        (published_date, published_ts) of an article dict
+
+        Parsable dates are normalized to naive UTC ISO; missing or
+        unparsable ones are dated now (keeping the original text, if any).
+        """
+        published_ts = to_timestamp(article.get('published_date'))
+        if published_ts is not None:
+            return to_iso(published_ts), published_ts
+
+        published_ts = int(time.time())
+        return article.get('published_date') or to_iso(published_ts), published_ts
+
+    def _article_row(self, article: Dict) -> Tuple:
+        """Build the INSERT parameters for an article dict (the body is stored separately)"""
         url_hash = self.hash_url(article['url'])
+        published_date, published_ts = self._published(article)
 
+        return (
+            article['url'],
+            url_hash,
+            article['title'],
+            article.get('summary'),
+            article.get('author'),
+            article['source_name'],
+            article.get('category'),
+            json.dumps(article.get('tags', [])) if article.get('tags') else None,
+            published_date,
+            published_ts,
+            self.scorer.score(article) if self.scorer is not None else article.get('relevance_score', 0.0),
+            article.get('image_url')
+        )
+
+    def add_article(self, article: Dict) -> Optional[int]:
+        """Add article to database, returns article ID or None if duplicate"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
+            row, body = self._ingest_row(conn.cursor(), article)
             try:
                 cursor.execute("""
                     INSERT INTO articles (
-                        url, url_hash, title, content, summary, author,
-                        source_name, category, tags, published_date,
-                        relevance_score, image_url
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    article['url'],
-                    url_hash,
-                    article['title'],
-                    article.get('content'),
-                    article.get('summary'),
-                    article.get('author'),
-                    article['source_name'],
-                    article.get('category'),
-                    json.dumps(article.get('tags', [])) if article.get('tags') else None,
-                    article.get('published_date'),
-                    article.get('relevance_score', 0.0),
-                    article.get('image_url')
-                ))
-                return cursor.lastrowid
+                        url, url_hash, title, summary, author,
+                        source_name, category, tags, published_date, published_ts,
+                        relevance_score, image_url, fingerprint, duplicate_of,
+                        needs_enrichment
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, row)
+                article_id = cursor.lastrowid
+                cursor.execute(
+                    "INSERT INTO article_bodies (article_id, content) VALUES (?, ?)",
+                    (article_id, body)
+                )
+                self._inserted_hashes.append(row[1])
+                self._dirty = True
+                return article_id
             except sqlite3.IntegrityError:
                 # Article already exists
                 return None
 
+    def add_articles(self, articles: Iterable[Dict], chunk_size: int = 500) -> Dict[str, int]:
+        """
+        Add many articles in a single transaction
+
+        Articles are consumed lazily, chunk_size at a time, so a generator
+        can be passed in and memory stays flat regardless of feed size.
+        Duplicates (same canonical URL) are skipped by INSERT OR IGNORE
+        instead of raising; near-duplicate content is stored as part of an
+        existing story (see _ingest_row). Each chunk's bodies follow in a
+        second executemany, matched to their rows by url_hash (skipped
+        URLs already have a body, so theirs are ignored too). Ids only
+        grow, so the rows a chunk really inserted are those past the
+        highest id before it.
+
+        Returns:
+            Dict with 'inserted' and 'skipped' counts
+        """
+        articles = iter(articles)
+        seen = 0
+        inserted = 0
+
+        def rows(lookup, bodies):
+            nonlocal seen
+            for article in itertools.islice(articles, chunk_size):
+                seen += 1
+                row, body = self._ingest_row(lookup, article)
+                bodies.append((body, row[1]))
+                yield row
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            lookup = conn.cursor()
+            while True:
+                bodies = []
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM articles")
+                last_id = cursor.fetchone()[0]
+
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO articles (
+                        url, url_hash, title, summary, author,
+                        source_name, category, tags, published_date, published_ts,
+                        relevance_score, image_url, fingerprint, duplicate_of,
+                        needs_enrichment
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows(lookup, bodies))
+                if not bodies:
+                    break
+
+                cursor.execute("SELECT url_hash FROM articles WHERE id > ?", (last_id,))
+                new_hashes = [row[0] for row in cursor.fetchall()]
+                self._inserted_hashes.extend(new_hashes)
+                inserted += len(new_hashes)
+
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO article_bodies (article_id, content)
+                    SELECT id, ? FROM articles WHERE url_hash = ?
+                """, bodies)
+
+            if inserted:
+                self._dirty = True
+
+        return {"inserted": inserted, "skipped": seen - inserted}
+
+    def count_articles(self) -> int:
+        """
+        Total number of stored rows, story duplicates included
+
+        The counters leave duplicates out, so they are added back from
+        the partial duplicate_of index.
+        """
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COALESCE((SELECT total FROM article_counts WHERE scope = 'all'), 0)
+                     + (SELECT COUNT(*) FROM articles WHERE duplicate_of IS NOT NULL)
+            """)
+            return cursor.fetchone()[0]
+
+    def iter_url_hashes(self, batch_size: int = 10000) -> Iterator[str]:
+        """Stream every stored url_hash without loading them all at once"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT url_hash FROM articles")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row[0]
+
+    def existing_url_hashes(self, url_hashes: Sequence[str]) -> Set[str]:
+        """Which of the given url hashes are already stored"""
+        found = set()
+
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(url_hashes), 500):
+                chunk = url_hashes[i:i + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor.execute(
+                    f"SELECT url_hash FROM articles WHERE url_hash IN ({placeholders})",
+                    chunk
+                )
+                found.update(row[0] for row in cursor.fetchall())
+
+        return found
+
     def get_articles(
         self,
         limit: int = 50,
@@ -155,53 +1200,413 @@ class Database:
         source: Optional[str] = None,
         starred_only: bool = False,
         unread_only: bool = False,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        after: Optional[Tuple] = None,
+        fields: Optional[Sequence[str]] = None,
+        sort: str = "date",
+        since: Optional[int] = None,
+        until: Optional[int] = None
     ) -> List[Dict]:
-        """Get articles with filtering options"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        """
+        Get articles with filtering options
 
-            query = "SELECT * FROM articles WHERE 1=1"
-            params = []
+        Each story is listed once: near-duplicates of an article are left
+        out (see get_story_cluster).
 
-            if category:
-                query += " AND category = ?"
-                params.append(category)
+        Only the CARD_FIELDS projection is returned unless fields names other
+        columns from LIST_FIELDS; the article body is never part of a list.
 
-            if source:
-                query += " AND source_name = ?"
-                params.append(source)
+        With a search term, results come from the FTS5 index ranked by bm25
+        and each article carries a highlighted 'snippet'. Otherwise articles
+        are newest first, or highest relevance_score first with
+        sort="relevance"; pass after=(published_ts, id) (or
+        (relevance_score, id)) of the last row seen to get the next page
+        without an OFFSET scan. since/until (UTC epoch seconds) limit the
+        publish date range: since inclusive, until exclusive.
 
-            if starred_only:
-                query += " AND is_starred = 1"
+        Raises:
+            ValueError: If fields names an unknown column or sort is unknown
+        """
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(self.SORT_KEYS)}")
+        sort_column = self.SORT_KEYS[sort]
 
-            if unread_only:
-                query += " AND is_read = 0"
+        names = self.list_columns(fields)
+        if sort_column not in names:
+            names.append(sort_column)
+        columns = ", ".join(f"articles.{name}" for name in names)
 
-            if search:
-                query += " AND (title LIKE ? OR content LIKE ?)"
-                search_term = f"%{search}%"
-                params.extend([search_term, search_term])
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
 
-            query += " ORDER BY published_date DESC LIMIT ? OFFSET ?"
+            fts_query = self._fts_query(search) if search else ""
+
+            if fts_query:
+                # Ranked full-text search (title > summary > content)
+                query = f"""
+                    SELECT {columns},
+                           snippet(articles_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet
+                    FROM articles_fts
+                    JOIN articles ON articles.id = articles_fts.rowid
+                    WHERE articles_fts MATCH ? AND duplicate_of IS NULL
+                """
+                params = [fts_query]
+            else:
+                query = f"SELECT {columns} FROM articles WHERE duplicate_of IS NULL"
+                params = []
+
+            conditions, filter_params = self._filter_sql(
+                category, source, starred_only, unread_only, since, until
+            )
+            query += conditions
+            params.extend(filter_params)
+
+            if after and not fts_query:
+                query += f" AND ({sort_column}, id) < (?, ?)"
+                params.extend(after)
+
+            if fts_query:
+                query += " ORDER BY bm25(articles_fts, 10.0, 5.0, 1.0) LIMIT ? OFFSET ?"
+            else:
+                query += f" ORDER BY {sort_column} DESC, id DESC LIMIT ? OFFSET ?"
             params.extend([limit, offset])
 
             cursor.execute(query, params)
             return [dict(row) for row in cursor.fetchall()]
 
+    @staticmethod
+    def _filter_sql(
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        starred_only: bool = False,
+        unread_only: bool = False,
+        since: Optional[int] = None,
+        until: Optional[int] = None
+    ) -> Tuple[str, List]:
+        """SQL conditions (each starting with AND) and parameters for the list filters"""
+        query = ""
+        params = []
+
+        if category:
+            query += " AND category = ?"
+            params.append(category)
+
+        if source:
+            query += " AND source_name = ?"
+            params.append(source)
+
+        if starred_only:
+            query += " AND is_starred = 1"
+
+        if unread_only:
+            query += " AND is_read = 0"
+
+        if since is not None:
+            query += " AND published_ts >= ?"
+            params.append(since)
+
+        if until is not None:
+            query += " AND published_ts < ?"
+            params.append(until)
+
+        return query, params
+
+    # List orders and the column each one pages by (ties broken by id)
+    SORT_KEYS = {
+        "date": "published_ts",
+        "relevance": "relevance_score",
+    }
+
+    # Columns a list may return; content is only served per article
+    LIST_FIELDS = (
+        "id", "url", "title", "summary", "author", "source_name", "category",
+        "tags", "published_date", "published_ts", "scraped_date", "is_read",
+        "is_starred", "relevance_score", "image_url"
+    )
+
+    # Default projection: what the dashboard's article cards display
+    CARD_FIELDS = (
+        "id", "url", "title", "summary", "author", "source_name", "category",
+        "published_date", "published_ts", "is_read", "is_starred", "image_url"
+    )
+
+    @classmethod
+    def list_columns(cls, fields: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Resolve a field selection into list columns
+
+        id and published_ts are always included because the page cursor
+        is built from them.
+
+        Raises:
+            ValueError: If a field is not in LIST_FIELDS
+        """
+        if not fields:
+            return list(cls.CARD_FIELDS)
+
+        unknown = [name for name in fields if name not in cls.LIST_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown or non-list fields: {', '.join(unknown)}")
+
+        columns = ["id", "published_ts"]
+        columns += [name for name in fields if name not in columns]
+        return columns
+
+    def get_article_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        **filters
+    ) -> Dict:
+        """
+        Get one page of articles plus the cursor for the next page
+
+        Date-ordered lists page by (published_ts, id) and relevance lists
+        by (relevance_score, id), so every page costs the same and rows
+        inserted in between don't shift later pages. Search results are
+        ranked by bm25, so their cursor just carries an offset.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        position = self.decode_cursor(cursor) if cursor else {}
+
+        if filters.get('search'):
+            offset = int(position.get('offset', 0))
+            articles = self.get_articles(limit=limit, offset=offset, **filters)
+            next_position = {'offset': offset + len(articles)}
+        elif filters.get('sort') == 'relevance':
+            if position and 'score' not in position:
+                raise ValueError("Invalid cursor")
+            after = self._cursor_key(position, 'score', float)
+            articles = self.get_articles(limit=limit, after=after, **filters)
+            last = articles[-1] if articles else None
+            next_position = {'score': last['relevance_score'], 'id': last['id']} if last else None
+        else:
+            if position and 'date' not in position:
+                raise ValueError("Invalid cursor")
+            after = self._cursor_key(position, 'date', int)
+            articles = self.get_articles(limit=limit, after=after, **filters)
+            last = articles[-1] if articles else None
+            next_position = {'date': last['published_ts'], 'id': last['id']} if last else None
+
+        next_cursor = None
+        if len(articles) == limit and next_position:
+            next_cursor = self.encode_cursor(next_position)
+
+        return {"articles": articles, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _cursor_key(position: Dict, key: str, kind) -> Optional[Tuple]:
+        """(sort value, id) from a decoded cursor, None on the first page"""
+        if not position:
+            return None
+        try:
+            return kind(position[key]), int(position['id'])
+        except (TypeError, ValueError):
+            # e.g. a date cursor from before dates were stored as epochs
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def encode_cursor(position: Dict) -> str:
+        """Encode a page position as an opaque URL-safe cursor"""
+        raw = json.dumps(position, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Dict:
+        """Decode a cursor made by encode_cursor"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded))
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+        if not isinstance(position, dict) or not (
+            'offset' in position or ('id' in position and ('date' in position or 'score' in position))
+        ):
+            raise ValueError("Invalid cursor")
+
+        return position
+
+    def get_latest_article_ts(self, source_name: str) -> Optional[int]:
+        """Newest published_ts listed for a source (index seek)"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT MAX(published_ts) FROM articles
+                WHERE source_name = ? AND duplicate_of IS NULL
+            """, (source_name,))
+            return cursor.fetchone()[0]
+
     def get_article_by_id(self, article_id: int) -> Optional[Dict]:
-        """Get single article by ID"""
-        with self.get_connection() as conn:
+        """
+        Get single article by ID
+
+        Returns the LIST_FIELDS columns plus the body; bookkeeping columns
+        (url_hash, fingerprint, duplicate_of, needs_enrichment) stay internal.
+        """
+        with self.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM articles WHERE id = ?", (article_id,))
+            cursor.execute(
+                f"SELECT {', '.join(self.LIST_FIELDS)} FROM articles WHERE id = ?",
+                (article_id,)
+            )
             row = cursor.fetchone()
-            return dict(row) if row else None
+            if row is None:
+                return None
+            article = dict(row)
+
+            # The only place a body is read and decompressed for display
+            cursor.execute("SELECT content FROM article_bodies WHERE article_id = ?", (article_id,))
+            body = cursor.fetchone()
+            article['content'] = self.codec.decompress(body[0]) if body else None
+            return article
+
+    def get_story_cluster(self, article_id: int) -> List[Dict]:
+        """Every stored copy of an article's story (primary first)"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                WITH story AS (
+                    SELECT COALESCE(duplicate_of, id) AS primary_id FROM articles WHERE id = ?
+                )
+                SELECT id, url, title, source_name, published_date, duplicate_of
+                FROM articles, story
+                WHERE id = story.primary_id OR duplicate_of = story.primary_id
+                ORDER BY duplicate_of IS NOT NULL, id
+            """, (article_id,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_articles_to_enrich(self, limit: int = 20) -> List[Dict]:
+        """Oldest articles flagged for enrichment (partial index seek)"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT articles.id, url, title, summary,
+                       decompress(article_bodies.content) AS content,
+                       author, source_name, category, image_url
+                FROM articles
+                LEFT JOIN article_bodies ON article_bodies.article_id = articles.id
+                WHERE needs_enrichment = 1
+                ORDER BY articles.id
+                LIMIT ?
+            """, (limit,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def apply_enrichment(self, results: Sequence[Dict]):
+        """
+        Store enrichment results in one transaction
+
+        Each result has 'id' and 'needs_enrichment' (0 done, -1 failed) and,
+        on success, 'content', 'relevance_score' and optional 'summary',
+        'author' and 'image_url' to fill in where the feed left them empty.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE articles SET
+                    summary = COALESCE(NULLIF(summary, ''), :summary),
+                    author = COALESCE(NULLIF(author, ''), :author),
+                    image_url = COALESCE(image_url, :image_url),
+                    relevance_score = COALESCE(:relevance_score, relevance_score),
+                    needs_enrichment = :needs_enrichment
+                WHERE id = :id
+            """, [
+                {
+                    'summary': None, 'author': None, 'image_url': None,
+                    'relevance_score': None, **result
+                }
+                for result in results
+            ])
+
+            bodies = [
+                (self.codec.compress(result['content']), result['id'])
+                for result in results if result.get('content')
+            ]
+            if bodies:
+                cursor.executemany("UPDATE article_bodies SET content = ? WHERE article_id = ?", bodies)
+                self._dirty = True
+
+    def refresh_articles(self, articles: Iterable[Dict]) -> int:
+        """
+        Overwrite stored articles with a fresh parse of the same URLs
+
+        Used when replaying snapshots after a parser change. Empty values
+        never clear a stored field, and the new content only replaces the
+        stored body when it is at least as long as that body (so enriched
+        full text survives a replay of its teaser feed); story duplicates
+        keep no body. Scores are left to the
+        caller to recompute.
+
+        Returns:
+            Number of articles updated
+        """
+        params = [
+            {
+                'url_hash': self.hash_url(article['url']),
+                'title': article.get('title'),
+                'content': article.get('content'),
+                'stored_content': self.codec.compress(article.get('content')),
+                'summary': article.get('summary'),
+                'author': article.get('author'),
+                'tags': json.dumps(article['tags']) if article.get('tags') else None,
+                'published_date': to_iso(article.get('published_date')),
+                'published_ts': to_timestamp(article.get('published_date')),
+                'image_url': article.get('image_url')
+            }
+            for article in articles
+        ]
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE articles SET
+                    title = COALESCE(NULLIF(:title, ''), title),
+                    summary = COALESCE(NULLIF(:summary, ''), summary),
+                    author = COALESCE(NULLIF(:author, ''), author),
+                    tags = COALESCE(:tags, tags),
+                    published_date = COALESCE(:published_date, published_date),
+                    published_ts = COALESCE(:published_ts, published_ts),
+                    image_url = COALESCE(:image_url, image_url)
+                WHERE url_hash = :url_hash
+            """, params)
+            updated = max(cursor.rowcount, 0)
+
+            cursor.executemany("""
+                UPDATE article_bodies SET content = :stored_content
+                WHERE article_id = (
+                    SELECT id FROM articles
+                    WHERE url_hash = :url_hash AND duplicate_of IS NULL
+                )
+                AND length(COALESCE(:content, '')) >= length(COALESCE(decompress(content), ''))
+            """, params)
+
+            if updated:
+                self._dirty = True
+
+        return updated
+
+    # Columns update_article may set; the rest are maintained by ingest
+    UPDATABLE_FIELDS = (
+        "title", "summary", "author", "category", "tags", "image_url",
+        "is_read", "is_starred", "relevance_score"
+    )
 
     def update_article(self, article_id: int, updates: Dict) -> bool:
-        """Update article fields"""
+        """
+        Update article fields
+
+        Raises:
+            ValueError: If updates names a column not in UPDATABLE_FIELDS
+        """
         if not updates:
             return False
 
+        unknown = [name for name in updates if name not in self.UPDATABLE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown or read-only fields: {', '.join(unknown)}")
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
@@ -210,19 +1615,123 @@ class Database:
             params = list(updates.values()) + [article_id]
 
             cursor.execute(query, params)
+            if cursor.rowcount > 0:
+                self._dirty = True
             return cursor.rowcount > 0
 
     def mark_as_read(self, article_id: int) -> bool:
-        """Mark article as read"""
-        return self.update_article(article_id, {"is_read": 1})
+        """
+        Mark article as read
 
-    def toggle_star(self, article_id: int) -> bool:
-        """Toggle star status"""
-        article = self.get_article_by_id(article_id)
-        if article:
-            new_value = 0 if article['is_starred'] else 1
-            return self.update_article(article_id, {"is_starred": new_value})
-        return False
+        Only an unread article is written (and only then are cached
+        responses invalidated).
+
+        Returns:
+            False if the article doesn't exist
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE articles SET is_read = 1 WHERE id = ? AND is_read = 0", (article_id,))
+            if cursor.rowcount > 0:
+                self._dirty = True
+                return True
+
+            cursor.execute("SELECT 1 FROM articles WHERE id = ?", (article_id,))
+            return cursor.fetchone() is not None
+
+    def toggle_star(self, article_id: int) -> Optional[int]:
+        """
+        Toggle star status in a single statement
+
+        Returns:
+            The new is_starred value, None if the article doesn't exist
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE articles SET is_starred = 1 - is_starred
+                WHERE id = ?
+                RETURNING is_starred
+            """, (article_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            self._dirty = True
+            return row[0]
+
+    def mark_articles(
+        self,
+        article_ids: Sequence[int],
+        is_read: Optional[bool] = None,
+        is_starred: Optional[bool] = None
+    ) -> int:
+        """
+        Set is_read and/or is_starred on a list of articles in one statement
+
+        The ids go in as one JSON array parameter, so the statement is the
+        same whatever the list length. Rows already in the requested state
+        are left alone.
+
+        Returns:
+            Number of articles changed
+        """
+        flags = {
+            name: int(value)
+            for name, value in (("is_read", is_read), ("is_starred", is_starred))
+            if value is not None
+        }
+        if not flags or not article_ids:
+            return 0
+
+        assignments = ", ".join(f"{name} = :{name}" for name in flags)
+        changed = " OR ".join(f"{name} != :{name}" for name in flags)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                UPDATE articles SET {assignments}
+                WHERE id IN (SELECT value FROM json_each(:ids))
+                AND ({changed})
+            """, {**flags, "ids": json.dumps([int(article_id) for article_id in article_ids])})
+            if cursor.rowcount > 0:
+                self._dirty = True
+            return max(cursor.rowcount, 0)
+
+    def mark_all_read(
+        self,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        starred_only: bool = False,
+        search: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None
+    ) -> int:
+        """
+        Mark every unread listed article matching the filters as read
+
+        Takes the same filters as get_articles and runs as one UPDATE (the
+        unread list indexes find the rows).
+
+        Returns:
+            Number of articles marked
+        """
+        query = "UPDATE articles SET is_read = 1 WHERE is_read = 0 AND duplicate_of IS NULL"
+        conditions, params = self._filter_sql(
+            category, source, starred_only, since=since, until=until
+        )
+        query += conditions
+
+        fts_query = self._fts_query(search) if search else ""
+        if fts_query:
+            query += " AND id IN (SELECT rowid FROM articles_fts WHERE articles_fts MATCH ?)"
+            params.append(fts_query)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            if cursor.rowcount > 0:
+                self._dirty = True
+            return max(cursor.rowcount, 0)
 
     def add_source(self, source: Dict) -> int:
         """Add new source"""
@@ -243,11 +1752,12 @@ class Database:
                 source.get('is_active', 1),
                 source.get('fetch_interval', 3600)
             ))
+            self._dirty = True
             return cursor.lastrowid
 
     def get_active_sources(self) -> List[Dict]:
         """Get all active sources"""
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT * FROM sources
@@ -258,7 +1768,7 @@ class Database:
 
     def get_all_sources(self) -> List[Dict]:
         """Get all sources"""
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM sources ORDER BY name")
             return [dict(row) for row in cursor.fetchall()]
@@ -273,32 +1783,251 @@ class Database:
                 WHERE id = ?
             """, (source_id,))
 
-    def get_stats(self) -> Dict:
-        """Get database statistics"""
+    def record_source_success(self, source_id: int, latency_ms: float):
+        """Mark a fetch as successful: reset failures, close the circuit, update latency"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE sources SET
+                    last_fetched = CURRENT_TIMESTAMP,
+                    consecutive_failures = 0,
+                    circuit_open_until = NULL,
+                    avg_latency_ms = COALESCE(avg_latency_ms * 0.8 + ? * 0.2, ?)
+                WHERE id = ?
+            """, (latency_ms, latency_ms, source_id))
 
-            stats = {}
+            # /api/sources shows last_fetched and latency, so it must not serve them stale
+            self._dirty = True
 
-            # Total articles
-            cursor.execute("SELECT COUNT(*) FROM articles")
-            stats['total_articles'] = cursor.fetchone()[0]
+    def record_source_failure(
+        self,
+        source_id: int,
+        error: str,
+        latency_ms: float,
+        circuit_open_until: Optional[str] = None
+    ):
+        """Count a failed fetch; circuit_open_until (UTC) stops fetches until then"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE sources SET
+                    consecutive_failures = COALESCE(consecutive_failures, 0) + 1,
+                    last_error = ?,
+                    last_error_at = CURRENT_TIMESTAMP,
+                    avg_latency_ms = COALESCE(avg_latency_ms * 0.8 + ? * 0.2, ?),
+                    circuit_open_until = ?
+                WHERE id = ?
+            """, (error[:500], latency_ms, latency_ms, circuit_open_until, source_id))
+            self._dirty = True
 
-            # Unread articles
-            cursor.execute("SELECT COUNT(*) FROM articles WHERE is_read = 0")
-            stats['unread_articles'] = cursor.fetchone()[0]
+    def update_source_interval(self, source_id: int, fetch_interval: int):
+        """Update how often a source is polled (seconds)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE sources
+                SET fetch_interval = ?
+                WHERE id = ?
+            """, (fetch_interval, source_id))
 
-            # Starred articles
-            cursor.execute("SELECT COUNT(*) FROM articles WHERE is_starred = 1")
-            stats['starred_articles'] = cursor.fetchone()[0]
+    def update_source_validators(
+        self,
+        source_id: int,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        content_hash: Optional[str]
+    ):
+        """Store HTTP validators and body hash from the last successful fetch"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE sources
+                SET etag = ?, last_modified = ?, content_hash = ?
+                WHERE id = ?
+            """, (etag, last_modified, content_hash, source_id))
 
-            # Articles by category
+    def enqueue_crawl(self, source_id: int, stage: str, pages: Sequence[Dict]) -> int:
+        """
+        Queue pages ({'url', 'title'}) for a scrape source
+
+        Pages already queued are left alone, so a failed page keeps its
+        attempt count and retry time instead of starting over on every
+        crawl (fetched pages are dropped from the queue, so only pages whose
+        last attempt failed, or that weren't reached yet, are still there).
+
+        Returns:
+            Number of pages newly queued
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO crawl_queue (source_id, stage, url, url_hash, title)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (stage, url_hash) DO NOTHING
+            """, [
+                (source_id, stage, page['url'], self.hash_url(page['url']), page.get('title'))
+                for page in pages
+            ])
+            return max(cursor.rowcount, 0)
+
+    def get_due_crawl_pages(self, source_id: int, stage: str, limit: int = 50) -> List[Dict]:
+        """Pending pages of a stage whose retry time has come, oldest first"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
             cursor.execute("""
-                SELECT category, COUNT(*) as count
-                FROM articles
-                GROUP BY category
+                SELECT * FROM crawl_queue
+                WHERE source_id = ? AND stage = ? AND status = 'pending'
+                AND next_attempt_at <= CURRENT_TIMESTAMP
+                ORDER BY id
+                LIMIT ?
+            """, (source_id, stage, limit))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def finish_crawl_pages(self, page_ids: Sequence[int]):
+        """Drop fetched pages from the queue (stored articles are the record)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("DELETE FROM crawl_queue WHERE id = ?", [(page_id,) for page_id in page_ids])
+
+    def fail_crawl_page(self, page_id: int, error: str, retry_delay: int, max_attempts: Optional[int]):
+        """
+        Record a failed fetch; the page is retried after retry_delay seconds
+        until max_attempts (None: retried indefinitely)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE crawl_queue SET
+                    attempts = attempts + 1,
+                    last_error = ?,
+                    status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,
+                    next_attempt_at = datetime('now', '+' || ? || ' seconds')
+                WHERE id = ?
+            """, (error[:500], max_attempts, retry_delay, page_id))
+
+    def get_crawl_status(self) -> List[Dict]:
+        """Queue size per scrape source, stage and status"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT sources.name AS source, crawl_queue.stage, crawl_queue.status,
+                       COUNT(*) AS pages, MIN(crawl_queue.next_attempt_at) AS next_attempt_at
+                FROM crawl_queue
+                LEFT JOIN sources ON sources.id = crawl_queue.source_id
+                GROUP BY crawl_queue.source_id, crawl_queue.stage, crawl_queue.status
+                ORDER BY sources.name, crawl_queue.stage, crawl_queue.status
+            """)
+            return [dict(row) for row in cursor.fetchall()]
+
+    def record_snapshot(self, snapshot: Dict):
+        """
+        Index a stored body ({'digest', 'url', 'kind', 'size', 'stored_size', ...})
+
+        A body that is already stored only has its URL, source and fetch
+        time refreshed, which also keeps it from being evicted.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO snapshots (
+                    digest, url, kind, source_name, category, content_type,
+                    size, stored_size
+                ) VALUES (
+                    :digest, :url, :kind, :source_name, :category, :content_type,
+                    :size, :stored_size
+                )
+                ON CONFLICT (digest) DO UPDATE SET
+                    url = excluded.url,
+                    source_name = COALESCE(excluded.source_name, source_name),
+                    category = COALESCE(excluded.category, category),
+                    fetched_at = CURRENT_TIMESTAMP
+            """, {'source_name': None, 'category': None, 'content_type': None, **snapshot})
+
+    def get_snapshot_usage(self) -> Dict:
+        """Number of stored snapshots and their size on disk"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*) AS snapshots,
+                       COALESCE(SUM(size), 0) AS raw_bytes,
+                       COALESCE(SUM(stored_size), 0) AS stored_bytes,
+                       MIN(fetched_at) AS oldest,
+                       MAX(fetched_at) AS newest
+                FROM snapshots
+            """)
+            return dict(cursor.fetchone())
+
+    def get_oldest_snapshots(self, limit: int = 100) -> List[Dict]:
+        """Least recently fetched snapshots first (eviction order)"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, digest, stored_size FROM snapshots
+                ORDER BY fetched_at, id
+                LIMIT ?
+            """, (limit,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def delete_snapshots(self, snapshot_ids: Sequence[int]):
+        """Drop evicted snapshots from the index"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("DELETE FROM snapshots WHERE id = ?", [(snapshot_id,) for snapshot_id in snapshot_ids])
+
+    def iter_snapshots(
+        self,
+        kind: Optional[str] = None,
+        source_name: Optional[str] = None,
+        since: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """Stored snapshots, oldest first, so a replay sees bodies in fetch order"""
+        query = "SELECT * FROM snapshots WHERE 1=1"
+        params = []
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if source_name:
+            query += " AND source_name = ?"
+            params.append(source_name)
+        if since:
+            query += " AND fetched_at >= ?"
+            params.append(since)
+        query += " ORDER BY fetched_at, id"
+
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            for row in cursor:
+                yield dict(row)
+
+    def get_stats(self) -> Dict:
+        """Get database statistics (read from the trigger-maintained counters)"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+
+            stats = {
+                'total_articles': 0,
+                'unread_articles': 0,
+                'starred_articles': 0,
+                'by_category': {},
+                'by_source': {}
+            }
+
+            cursor.execute("""
+                SELECT scope, key, total, unread, starred
+                FROM article_counts
+                WHERE total > 0
+                ORDER BY scope, key
             """)
-            stats['by_category'] = {row['category']: row['count'] for row in cursor.fetchall()}
+            for row in cursor.fetchall():
+                if row['scope'] == 'all':
+                    stats['total_articles'] = row['total']
+                    stats['unread_articles'] = row['unread']
+                    stats['starred_articles'] = row['starred']
+                elif row['scope'] == 'category':
+                    stats['by_category'][row['key'] or None] = row['total']
+                elif row['scope'] == 'source':
+                    stats['by_source'][row['key']] = row['total']
 
             # Active sources
             cursor.execute("SELECT COUNT(*) FROM sources WHERE is_active = 1")
@@ -307,15 +2036,135 @@ class Database:
             return stats
 
     def cleanup_old_articles(self, days: int = 30) -> int:
-        """Delete articles older than specified days"""
+        """
+        Delete articles older than specified days
+
+        Runs in batches (see expire_articles) so ingest can interleave;
+        the retention engine does the same in the background with pauses,
+        archiving and progress.
+        """
+        cutoff = int(time.time()) - days * 86400
+        deleted = 0
+
+        while True:
+            batch = self.expire_articles(cutoff)
+            deleted += batch
+            if not batch:
+                return deleted
+
+    # Articles past a cutoff that retention may remove: unstarred, and for a
+    # story's primary, no starred copy either (copies have no body of their own)
+    EXPIRED_SQL = """
+        SELECT id FROM articles
+        WHERE published_ts < ? AND is_starred = 0
+        AND NOT EXISTS (
+            SELECT 1 FROM articles AS copy
+            WHERE copy.duplicate_of = articles.id AND copy.is_starred = 1
+        )
+    """
+
+    def count_expired_articles(self, cutoff: int) -> int:
+        """Articles published before cutoff (epoch seconds) plus the copies of their stories"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                WITH expired AS ({self.EXPIRED_SQL})
+                SELECT COUNT(*) FROM articles
+                WHERE id IN expired OR duplicate_of IN expired
+            """, (cutoff,))
+            return cursor.fetchone()[0]
+
+    def expire_articles(self, cutoff: int, limit: int = 500, archive: bool = False) -> int:
+        """
+        Delete (or archive) one batch of unstarred articles published before cutoff
+
+        Each call is a single short transaction, so the write lock is only
+        held for one batch. A story expires as a whole: the copies of an
+        expired primary go with it (deleted first, so none is promoted to
+        a primary without a body), and a story with a starred copy is kept.
+        Archived rows keep their metadata in articles_archive, with the body
+        in its stored (compressed) form.
+
+        Returns:
+            Number of articles removed (0 once nothing is left)
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                DELETE FROM articles
-                WHERE is_starred = 0
-                AND published_date < datetime('now', '-' || ? || ' days')
-            """, (days,))
-            return cursor.rowcount
+            cursor.execute(f"{self.EXPIRED_SQL} ORDER BY published_ts LIMIT ?", (cutoff, limit))
+            expired = [row[0] for row in cursor.fetchall()]
+            if not expired:
+                return 0
+
+            cursor.execute(f"""
+                SELECT id FROM articles
+                WHERE duplicate_of IN ({", ".join("?" * len(expired))})
+            """, expired)
+            copies = [row[0] for row in cursor.fetchall()]
+            ids = copies + sorted(set(expired) - set(copies))
+
+            if archive:
+                cursor.execute(f"""
+                    SELECT articles.id, url, url_hash, title, summary, author, source_name,
+                           category, tags, published_date, published_ts,
+                           scraped_date, relevance_score, image_url, article_bodies.content
+                    FROM articles
+                    LEFT JOIN article_bodies ON article_bodies.article_id = articles.id
+                    WHERE articles.id IN ({", ".join("?" * len(ids))})
+                """, ids)
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO articles_archive (
+                        id, url, url_hash, title, summary, author, source_name,
+                        category, tags, published_date, published_ts,
+                        scraped_date, relevance_score, image_url, content
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [tuple(row) for row in cursor.fetchall()])
+
+            cursor.executemany("DELETE FROM articles WHERE id = ?", [(article_id,) for article_id in ids])
+            self._dirty = True
+            return len(ids)
+
+    def get_archived_article(self, article_id: int) -> Optional[Dict]:
+        """An archived article with its body decompressed"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM articles_archive WHERE id = ?", (article_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+            article = dict(row)
+            article['content'] = self.codec.decompress(article['content'])
+            return article
+
+    def get_storage_stats(self) -> Dict:
+        """Database file pages, incremental vacuum availability and body compression settings"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            return {
+                "page_size": cursor.execute("PRAGMA page_size").fetchone()[0],
+                "pages": cursor.execute("PRAGMA page_count").fetchone()[0],
+                "free_pages": cursor.execute("PRAGMA freelist_count").fetchone()[0],
+                "incremental_vacuum": cursor.execute("PRAGMA auto_vacuum").fetchone()[0] == 2,
+                "archived_articles": cursor.execute("SELECT COUNT(*) FROM articles_archive").fetchone()[0],
+                "content_codec": self.codec.codec,
+                "content_dictionary": self.codec.active_dictionary
+            }
+
+    def incremental_vacuum(self, pages: int = 1000) -> int:
+        """
+        Return up to `pages` free pages to the OS
+
+        A no-op unless the file uses auto_vacuum = INCREMENTAL (new files
+        do; older ones are switched on startup by _enable_incremental_vacuum).
+
+        Returns:
+            Number of pages freed
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            before = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            cursor.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            return before - cursor.execute("PRAGMA freelist_count").fetchone()[0]
 
     def add_keyword(self, keyword: str, category: Optional[str] = None, weight: float = 1.0):
         """Add keyword for filtering"""
@@ -326,9 +2175,66 @@ class Database:
                 VALUES (?, ?, ?)
             """, (keyword.lower(), category, weight))
 
+    def remove_keyword(self, keyword: str) -> bool:
+        """Delete a keyword"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM keywords WHERE keyword = ?", (keyword.lower(),))
+            return cursor.rowcount > 0
+
+    def iter_articles_for_scoring(
+        self,
+        keyword: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Dict]:
+        """
+        Stream the fields relevance scoring needs
+
+        With a keyword, only articles whose text contains it as a phrase
+        (per the full-text index) are returned.
+        """
+        query = """
+            SELECT articles.id, articles.title, articles.summary,
+                   decompress(article_bodies.content) AS content,
+                   articles.category, articles.relevance_score
+            FROM articles
+            LEFT JOIN article_bodies ON article_bodies.article_id = articles.id
+        """
+        params = []
+
+        if keyword is not None:
+            words = [word.replace('"', '') for word in keyword.split()]
+            query += """
+                JOIN articles_fts ON articles_fts.rowid = articles.id
+                WHERE articles_fts MATCH ?
+            """
+            params.append('"' + " ".join(word for word in words if word) + '"')
+
+        with self.get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+
+    def update_relevance_scores(self, scores: Sequence[Tuple[float, int]]) -> int:
+        """Store (relevance_score, article_id) pairs, returns rows changed"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "UPDATE articles SET relevance_score = ? WHERE id = ?",
+                scores
+            )
+            if cursor.rowcount:
+                self._dirty = True
+            return max(cursor.rowcount, 0)
+
     def get_keywords(self) -> List[Dict]:
         """Get all active keywords"""
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT * FROM keywords
@@ -0,0 +1,67 @@
+"""
+Publish date normalization
+Turns the date strings found in feeds and pages into UTC epoch seconds
+"""
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Union
+
+from dateutil import parser as date_parser
+from dateutil import tz
+
+# Zone abbreviations feeds use that dateutil doesn't know on its own
+TZINFOS = {
+    "UT": tz.UTC, "UTC": tz.UTC, "GMT": tz.UTC, "Z": tz.UTC,
+    "EST": tz.tzoffset("EST", -5 * 3600), "EDT": tz.tzoffset("EDT", -4 * 3600),
+    "CST": tz.tzoffset("CST", -6 * 3600), "CDT": tz.tzoffset("CDT", -5 * 3600),
+    "MST": tz.tzoffset("MST", -7 * 3600), "MDT": tz.tzoffset("MDT", -6 * 3600),
+    "PST": tz.tzoffset("PST", -8 * 3600), "PDT": tz.tzoffset("PDT", -7 * 3600),
+    "CET": tz.tzoffset("CET", 3600), "CEST": tz.tzoffset("CEST", 2 * 3600),
+    "BST": tz.tzoffset("BST", 3600), "IST": tz.tzoffset("IST", 19800),
+    "JST": tz.tzoffset("JST", 9 * 3600),
+}
+
+
+def parse_date(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """
+    Parse a publish date into an aware UTC datetime
+
+    RFC-822 (RSS) is tried first, then anything dateutil understands
+    (ISO-8601, meta tag formats, "March 5, 2024 10:00 EST"). Dates without
+    a zone are taken as UTC. Returns None for text that isn't a date.
+    """
+    if not value:
+        return None
+
+    dt = value if isinstance(value, datetime) else None
+    if dt is None:
+        value = value.strip()
+        try:
+            dt = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            try:
+                dt = date_parser.parse(value, tzinfos=TZINFOS)
+            except (ValueError, OverflowError):
+                return None
+
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def to_timestamp(value: Union[str, datetime, None]) -> Optional[int]:
+    """UTC epoch seconds of a publish date, None if it can't be parsed"""
+    dt = parse_date(value)
+    return int(dt.timestamp()) if dt is not None else None
+
+
+def to_iso(value: Union[str, datetime, int, None]) -> Optional[str]:
+    """Naive UTC ISO-8601 string (the format stored in published_date)"""
+    if isinstance(value, int):
+        dt = datetime.fromtimestamp(value, timezone.utc)
+    else:
+        dt = parse_date(value)
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=None).isoformat(timespec='seconds')
@@ -0,0 +1,143 @@
+"""
+Pre-parse deduplication index
+Bloom filter over articles.url_hash with an exact database fallback
+"""
+
+import logging
+import math
+import threading
+from typing import Iterable, List, Optional, Sequence, Set
+
+from .database import Database
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter keyed by hex digests"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+
+        # Standard sizing: m = -n ln p / (ln 2)^2, k = (m / n) ln 2
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, digest: str):
+        """Bit positions via double hashing on the two halves of the digest"""
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, digest: str):
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+
+class DedupIndex:
+    """
+    Answers "have we stored this URL already?" before any parsing work
+
+    A Bloom filter never gives false negatives, so a miss means the URL is
+    new for sure. A hit may be a false positive, so hits are confirmed
+    against articles.url_hash in one batched query. Until load() has run the
+    index knows nothing and every URL is treated as new, which is safe
+    because INSERT OR IGNORE still drops real duplicates.
+    """
+
+    def __init__(self, db: Database, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.db = db
+        self.error_rate = error_rate
+        self.count = 0
+        self.loaded = False
+
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+
+        # URLs added while a rebuild is reading the database; replayed into
+        # the new filter so nothing committed meanwhile is lost
+        self._added_during_load: Optional[List[str]] = None
+        self._resizing = False
+
+    @staticmethod
+    def hash(url: str) -> str:
+        """Same hash the database stores in articles.url_hash"""
+        return Database.hash_url(url)
+
+    def load(self):
+        """(Re)build the filter from every url_hash in the database"""
+        with self._lock:
+            self._added_during_load = []
+
+        try:
+            total = self.db.count_articles()
+            capacity = max(self._bloom.capacity, total * 2)
+            bloom = BloomFilter(capacity, self.error_rate)
+
+            for url_hash in self.db.iter_url_hashes():
+                bloom.add(url_hash)
+        except Exception:
+            with self._lock:
+                self._added_during_load = None
+            raise
+
+        with self._lock:
+            for url_hash in self._added_during_load:
+                bloom.add(url_hash)
+            self._bloom = bloom
+            self.count = total + len(self._added_during_load)
+            self._added_during_load = None
+            self.loaded = True
+
+        logger.info(f"Dedup index loaded with {total} URLs (capacity {capacity})")
+
+    def add(self, url_hash: str):
+        """Record a stored URL"""
+        self.add_many([url_hash])
+
+    def add_many(self, url_hashes: Sequence[str]):
+        """Record newly stored URLs (called by the database after each commit)"""
+        with self._lock:
+            for url_hash in url_hashes:
+                self._bloom.add(url_hash)
+            if self._added_during_load is not None:
+                self._added_during_load.extend(url_hashes)
+            self.count += len(url_hashes)
+
+            # Past capacity the false positive rate climbs, so rebuild bigger,
+            # in the background: callers are on the ingest path
+            needs_resize = self.loaded and not self._resizing and self.count > self._bloom.capacity
+            if needs_resize:
+                self._resizing = True
+
+        if needs_resize:
+            threading.Thread(target=self._resize, name="dedup-resize", daemon=True).start()
+
+    def _resize(self):
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Error rebuilding dedup index: {e}")
+        finally:
+            self._resizing = False
+
+    def known(self, url_hashes: Iterable[str]) -> Set[str]:
+        """Subset of url_hashes already stored (Bloom filter + exact check)"""
+        if not self.loaded:
+            return set()
+
+        candidates = [url_hash for url_hash in url_hashes if url_hash in self._bloom]
+        if not candidates:
+            return set()
+
+        return self.db.existing_url_hashes(candidates)
+
+    def __contains__(self, url_hash: str) -> bool:
+        return bool(self.known([url_hash]))
@@ -0,0 +1,157 @@
+"""
+Full-content enrichment
+Fetches the full article text for entries whose feed only carried a title or a teaser
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from .database import Database
+from .scraper import WebScraper, NewspaperExtractor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentWorker:
+    """
+    Background worker that fills in short articles
+
+    Ingest only flags articles whose content is shorter than min_length
+    (articles.needs_enrichment); this worker picks them up afterwards, so
+    feed fetching never waits on article pages. Pages are fetched by at
+    most `workers` threads at once and no more than one request per host
+    every per_host_interval seconds. Results are written back one batch
+    per transaction.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        scraper: WebScraper,
+        min_length: int = 500,
+        workers: int = 4,
+        per_host_interval: float = 1.0,
+        batch_size: int = 20,
+        poll_interval: float = 60,
+        use_newspaper: bool = False
+    ):
+        self.db = db
+        self.scraper = scraper
+        self.min_length = min_length
+        self.workers = workers
+        self.per_host_interval = per_host_interval
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+        self.newspaper = NewspaperExtractor() if use_newspaper else None
+        if self.newspaper is not None and not self.newspaper.available:
+            self.newspaper = None
+
+        self.enriched = 0
+        self.failed = 0
+
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._next_request: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start flagging new articles and the worker loop on the running event loop"""
+        if self._task is None:
+            self.db.enrich_below = self.min_length
+            self._limit = asyncio.Semaphore(self.workers)
+            self._task = asyncio.create_task(self._run())
+            logger.info("Enrichment worker started")
+
+    async def stop(self):
+        """Stop the worker loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Enrichment worker stopped")
+
+    def status(self) -> Dict:
+        """Counters for the API"""
+        return {
+            "running": self._task is not None,
+            "min_length": self.min_length,
+            "enriched": self.enriched,
+            "failed": self.failed
+        }
+
+    async def _run(self):
+        """Drain flagged articles a batch at a time, then poll for more"""
+        while True:
+            try:
+                articles = await asyncio.to_thread(self.db.get_articles_to_enrich, self.batch_size)
+                if articles:
+                    await self.enrich_batch(articles)
+
+                # A full batch means there is probably more waiting
+                if len(articles) < self.batch_size:
+                    await asyncio.sleep(self.poll_interval)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Enrichment error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def enrich_batch(self, articles: List[Dict]):
+        """Fetch a batch of articles concurrently and store the results together"""
+        results = await asyncio.gather(*(self._enrich(article) for article in articles))
+        await asyncio.to_thread(self.db.apply_enrichment, results)
+
+        succeeded = sum(1 for result in results if result['needs_enrichment'] == 0)
+        self.enriched += succeeded
+        self.failed += len(results) - succeeded
+        logger.info(f"Enriched {succeeded}/{len(results)} articles")
+
+    async def _wait_turn(self, url: str):
+        """Sleep until this host may be requested again"""
+        host = urlparse(url).netloc.lower()
+        now = time.monotonic()
+        slot = max(now, self._next_request.get(host, 0.0))
+        self._next_request[host] = slot + self.per_host_interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _enrich(self, article: Dict) -> Dict:
+        """Fetch one article's page and build its update"""
+        await self._wait_turn(article['url'])
+
+        async with self._limit:
+            try:
+                extracted = await asyncio.to_thread(self._extract, article)
+            except Exception as e:
+                logger.error(f"Error enriching {article['url']}: {e}")
+                extracted = None
+
+        content = (extracted or {}).get('content') or ''
+        if len(content) <= len(article.get('content') or ''):
+            return {'id': article['id'], 'needs_enrichment': -1}
+
+        enriched = dict(article, content=content)
+        return {
+            'id': article['id'],
+            'needs_enrichment': 0,
+            'content': content,
+            'summary': extracted.get('summary'),
+            'author': extracted.get('author'),
+            'image_url': extracted.get('image_url'),
+            'relevance_score': self.db.scorer.score(enriched) if self.db.scorer is not None else None
+        }
+
+    def _extract(self, article: Dict) -> Optional[Dict]:
+        """Download and extract the page (runs in a worker thread)"""
+        if self.newspaper is not None:
+            return self.newspaper.extract_article(article['url'], article['source_name'], article.get('category'))
+        return self.scraper.extract_article(article['url'], article['source_name'], article.get('category'))
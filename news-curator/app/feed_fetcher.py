@@ -4,25 +4,70 @@ Handles RSS/Atom feeds and extracts article data
 """
 
 import feedparser
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Tuple
 import logging
 from urllib.parse import urljoin
-import time
+
+from .dates import to_iso, to_timestamp
+from .transport import Transport
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _feedparse(content: bytes, feed_url: str, response_headers: Optional[Dict] = None):
+    """Run feedparser over a downloaded body"""
+    # feedparser looks headers up by lowercase name
+    headers = {name.lower(): value for name, value in (response_headers or {}).items()}
+    headers.setdefault('content-location', feed_url)
+
+    feed = feedparser.parse(content, response_headers=headers)
+    if feed.bozo:
+        logger.warning(f"Feed parsing warning for {feed_url}: {feed.bozo_exception}")
+    return feed
+
+
+def parse_feed_content(
+    content: bytes,
+    feed_url: str,
+    source_name: str,
+    category: str = None,
+    response_headers: Optional[Dict] = None
+) -> List[Dict]:
+    """
+    Parse an RSS/Atom body into article dicts, without dedup
+
+    Module-level (not a method) so a process pool can run it without
+    building a FeedFetcher and its Transport.
+    """
+    feed = _feedparse(content, feed_url, response_headers)
+    return FeedFetcher.parse_entries(feed.entries, source_name, category)
+
+
 class FeedFetcher:
     """Fetch and parse RSS/Atom feeds"""
 
-    def __init__(self, timeout: int = 30, user_agent: str = None):
+    def __init__(
+        self,
+        timeout: int = 30,
+        user_agent: str = None,
+        dedup_index=None,
+        transport: Optional[Transport] = None,
+        snapshots=None
+    ):
         self.timeout = timeout
         self.user_agent = user_agent or (
             "Mozilla/5.0 (compatible; NewsCurator/1.0; +http://example.com/bot)"
         )
+        # Optional DedupIndex: entries already stored are skipped before parsing
+        self.dedup_index = dedup_index
+        # Optional SnapshotStore: raw bodies are kept for replay
+        self.snapshots = snapshots
+
+        # Pooled, rate-limited HTTP (shared with the scraper when passed in)
+        self.transport = transport or Transport(self.user_agent, timeout=timeout)
 
     def fetch_feed(self, feed_url: str, source_name: str, category: str = None) -> List[Dict]:
         """
@@ -41,23 +86,32 @@ class FeedFetcher:
         try:
             logger.info(f"Fetching feed: {feed_url}")
 
-            # Set custom user agent
-            feedparser.USER_AGENT = self.user_agent
-
-            # Parse feed with timeout
-            feed = feedparser.parse(
+            # Download over the shared pool (feedparser would open a new
+            # connection, without a timeout, on every call)
+            response = self.transport.get(
                 feed_url,
-                request_headers={"User-Agent": self.user_agent}
+                headers={"User-Agent": self.user_agent},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+
+            if self.snapshots is not None:
+                self.snapshots.put(
+                    response.url,
+                    response.content,
+                    'feed',
+                    source_name=source_name,
+                    category=category,
+                    content_type=response.headers.get('content-type')
+                )
+
+            articles = self.parse_feed(
+                response.content,
+                response.url,
+                source_name,
+                category,
+                response_headers=dict(response.headers)
             )
-
-            if feed.bozo:
-                logger.warning(f"Feed parsing warning for {feed_url}: {feed.bozo_exception}")
-
-            # Extract articles from entries
-            for entry in feed.entries:
-                article = self._parse_entry(entry, source_name, category)
-                if article:
-                    articles.append(article)
 
             logger.info(f"Fetched {len(articles)} articles from {source_name}")
 
@@ -66,7 +120,70 @@ class FeedFetcher:
 
         return articles
 
-    def _parse_entry(self, entry, source_name: str, category: str = None) -> Optional[Dict]:
+    def parse_feed(
+        self,
+        content: bytes,
+        feed_url: str,
+        source_name: str,
+        category: str = None,
+        response_headers: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Parse an already-downloaded RSS/Atom document
+
+        Known entries are dropped before they are converted. The fetch
+        engine doesn't use this: it parses with parse_feed_content in a
+        process pool and filters with skip_known_articles afterwards.
+
+        Args:
+            content: Raw feed body
+            feed_url: URL the body was fetched from (used to resolve relative links)
+            source_name: Name of the source
+            category: Category to assign to articles
+            response_headers: HTTP response headers (used for charset detection)
+
+        Returns:
+            List of article dictionaries
+        """
+        feed = _feedparse(content, feed_url, response_headers)
+        entries = self._skip_known_entries(feed.entries, source_name)
+        return self.parse_entries(entries, source_name, category)
+
+    @staticmethod
+    def parse_entries(entries: List, source_name: str, category: str = None) -> List[Dict]:
+        """Convert parsed feed entries into article dicts"""
+        articles = []
+        for entry in entries:
+            article = FeedFetcher._parse_entry(entry, source_name, category)
+            if article:
+                articles.append(article)
+
+        return articles
+
+    def skip_known_articles(self, articles: List[Dict], source_name: str) -> List[Dict]:
+        """Drop parsed articles whose URL is already stored (one batched lookup)"""
+        return self._skip_known(articles, [article['url'] for article in articles], source_name)
+
+    def _skip_known_entries(self, entries: List, source_name: str) -> List:
+        """Drop entries whose URL is already stored (one batched lookup)"""
+        urls = [entry.get('link') or entry.get('id') for entry in entries]
+        return self._skip_known(entries, urls, source_name)
+
+    def _skip_known(self, items: List, urls: List[Optional[str]], source_name: str) -> List:
+        """Drop the items whose URL (same position in urls) the dedup index knows"""
+        if self.dedup_index is None or not items:
+            return items
+
+        hashes = [self.dedup_index.hash(url) if url else None for url in urls]
+        known = self.dedup_index.known([url_hash for url_hash in hashes if url_hash])
+        if not known:
+            return items
+
+        logger.info(f"Skipping {len(known)} already-stored entries from {source_name}")
+        return [item for item, url_hash in zip(items, hashes) if url_hash not in known]
+
+    @staticmethod
+    def _parse_entry(entry, source_name: str, category: str = None) -> Optional[Dict]:
         """Parse individual feed entry into article dict"""
         try:
             # Extract URL
@@ -78,20 +195,20 @@ class FeedFetcher:
             title = entry.get('title', 'No Title')
 
             # Extract content/summary
-            content = self._extract_content(entry)
+            content = FeedFetcher._extract_content(entry)
             summary = entry.get('summary', '')[:500]  # Limit summary length
 
             # Extract author
             author = entry.get('author') or entry.get('dc:creator')
 
             # Extract published date
-            published_date = self._parse_date(entry)
+            published_date = FeedFetcher._parse_date(entry)
 
             # Extract image URL
-            image_url = self._extract_image(entry)
+            image_url = FeedFetcher._extract_image(entry)
 
             # Extract tags
-            tags = self._extract_tags(entry)
+            tags = FeedFetcher._extract_tags(entry)
 
             article = {
                 'url': url,
@@ -113,7 +230,8 @@ class FeedFetcher:
             logger.error(f"Error parsing entry: {e}")
             return None
 
-    def _extract_content(self, entry) -> str:
+    @staticmethod
+    def _extract_content(entry) -> str:
         """Extract content from entry"""
         # Try different content fields
         if hasattr(entry, 'content') and entry.content:
@@ -127,7 +245,8 @@ class FeedFetcher:
 
         return ""
 
-    def _parse_date(self, entry) -> Optional[str]:
+    @staticmethod
+    def _parse_date(entry) -> Optional[str]:
         """Parse published date from entry"""
         # Try different date fields
         for date_field in ['published_parsed', 'updated_parsed', 'created_parsed']:
@@ -149,7 +268,8 @@ class FeedFetcher:
 
         return None
 
-    def _extract_image(self, entry) -> Optional[str]:
+    @staticmethod
+    def _extract_image(entry) -> Optional[str]:
         """Extract image URL from entry"""
         # Try media content
         if hasattr(entry, 'media_content') and entry.media_content:
@@ -175,7 +295,8 @@ class FeedFetcher:
 
         return None
 
-    def _extract_tags(self, entry) -> List[str]:
+    @staticmethod
+    def _extract_tags(entry) -> List[str]:
         """Extract tags from entry"""
         tags = []
 
@@ -202,28 +323,274 @@ class FeedFetcher:
         Returns:
             Dict mapping source name to list of articles
         """
-        results = {}
+        feeds = [
+            source for source in sources
+            if source.get('source_type') == 'rss' and source.get('feed_url')
+        ]
+        if not feeds:
+            return {}
+
+        # Fetched in parallel; the transport's per-host rate limit is what
+        # keeps any one server from being hammered
+        with ThreadPoolExecutor(max_workers=min(len(feeds), self.transport.max_connections)) as pool:
+            fetched = pool.map(
+                lambda source: self.fetch_feed(source['feed_url'], source['name'], source.get('category')),
+                feeds
+            )
+            return {source['name']: articles for source, articles in zip(feeds, fetched)}
+
+
+class StreamingFeedParser:
+    """
+    Incremental RSS/Atom parser for very large feeds
+
+    Bytes are fed in as they arrive and article dicts come out as soon as
+    each <item>/<entry> closes; finished elements are discarded, so peak
+    memory stays flat no matter how long the feed is. Feeds list newest
+    items first, so once several entries in a row are older than
+    stop_before (epoch of the newest article we already have) the parser marks
+    itself done and the caller can stop downloading.
+    """
+
+    CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
+    MEDIA_NS = "http://search.yahoo.com/mrss/"
+
+    def __init__(
+        self,
+        feed_url: str,
+        source_name: str,
+        category: str = None,
+        stop_before: Optional[int] = None,
+        max_old_entries: int = 3,
+        dedup_index=None
+    ):
+        from lxml import etree
+
+        self.feed_url = feed_url
+        self.source_name = source_name
+        self.category = category
+        self.stop_before = stop_before
+        self.max_old_entries = max_old_entries
+        self.dedup_index = dedup_index
+
+        self.done = False
+        self._old_in_a_row = 0
+        self._etree = etree
+        self._parser = etree.XMLPullParser(events=('end',), recover=True, resolve_entities=False)
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        """Feed a chunk of the document, returns articles completed by it"""
+        if self.done:
+            return []
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Dict]:
+        """Signal end of document, returns any remaining articles"""
+        if self.done:
+            return []
+        try:
+            self._parser.close()
+        except self._etree.XMLSyntaxError as e:
+            logger.warning(f"Feed parsing warning for {self.feed_url}: {e}")
+        return self._drain()
+
+    def iter_articles(self, chunks) -> Iterator[Dict]:
+        """Generator over articles from an iterable of byte chunks"""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+            if self.done:
+                return
+        yield from self.close()
+
+    def _drain(self) -> List[Dict]:
+        """
+        Turn closed item/entry elements into articles
 
-        for source in sources:
-            if source.get('source_type') != 'rss':
+        Items completed by one chunk are checked against the dedup index
+        together (one query for all Bloom hits), then only new ones are
+        fully parsed.
+        """
+        items = []
+        for _, elem in self._parser.read_events():
+            if self.done or self._local(elem.tag) not in ('item', 'entry'):
                 continue
+            items.append((elem, self._check_item(elem)))
 
-            feed_url = source.get('feed_url')
-            if not feed_url:
-                continue
+        candidates = [candidate for _, candidate in items if candidate]
+        known = set()
+        if self.dedup_index is not None and candidates:
+            known = self.dedup_index.known([candidate[3] for candidate in candidates])
 
-            articles = self.fetch_feed(
-                feed_url,
-                source['name'],
-                source.get('category')
+        articles = []
+        for elem, candidate in items:
+            if candidate and candidate[3] not in known:
+                children, url, published_date, _ = candidate
+                article = self._parse_item(children, url, published_date)
+                if article:
+                    articles.append(article)
+
+            # Drop the finished element and everything before it
+            elem.clear()
+            parent = elem.getparent()
+            while parent is not None and elem.getprevious() is not None:
+                del parent[0]
+
+        return articles
+
+    def _check_item(self, elem) -> Optional[Tuple]:
+        """
+        Check age on the cheap fields
+
+        Returns:
+            (children, url, published_date, url_hash) for items worth
+            parsing, None for items without a URL or older than stop_before
+        """
+        children = self._children(elem)
+
+        url = self._item_url(children)
+        if not url:
+            return None
+
+        published_date = self._item_date(children)
+        published_ts = to_timestamp(published_date)
+        if self.stop_before and published_ts is not None and published_ts < self.stop_before:
+            self._old_in_a_row += 1
+            if self._old_in_a_row >= self.max_old_entries:
+                self.done = True
+            return None
+        self._old_in_a_row = 0
+
+        url_hash = self.dedup_index.hash(url) if self.dedup_index is not None else None
+        return children, url, published_date, url_hash
+
+    @staticmethod
+    def _local(tag) -> str:
+        """Tag name without namespace"""
+        if not isinstance(tag, str):
+            return ''
+        return tag.rsplit('}', 1)[-1]
+
+    def _children(self, elem) -> Dict[str, List]:
+        """Group child elements by local name"""
+        children = {}
+        for child in elem:
+            children.setdefault(self._local(child.tag), []).append(child)
+        return children
+
+    def _text(self, elem) -> str:
+        """Element text, serializing inline XHTML children if present"""
+        if elem is None:
+            return ''
+        if len(elem):
+            inner = (elem.text or '') + ''.join(
+                self._etree.tostring(child, encoding='unicode') for child in elem
             )
+            return inner.strip()
+        return (elem.text or '').strip()
+
+    @staticmethod
+    def _first(children: Dict[str, List], *names):
+        """First child element with any of the given local names"""
+        for name in names:
+            if name in children:
+                return children[name][0]
+        return None
+
+    def _item_url(self, children: Dict[str, List]) -> Optional[str]:
+        """Entry URL (Atom uses <link href>, RSS uses link text, else guid/id)"""
+        url = None
+        for link in children.get('link', []):
+            if link.get('href') and link.get('rel', 'alternate') == 'alternate':
+                url = link.get('href')
+                break
+            if link.text and link.text.strip():
+                url = link.text.strip()
+                break
+
+        url = url or self._text(self._first(children, 'guid', 'id'))
+        return urljoin(self.feed_url, url) if url else None
+
+    def _item_date(self, children: Dict[str, List]) -> Optional[str]:
+        """Entry publish date"""
+        return self._parse_date(self._text(
+            self._first(children, 'pubDate', 'published', 'date', 'updated', 'modified')
+        ))
+
+    def _parse_item(self, children: Dict[str, List], url: str, published_date: Optional[str]) -> Optional[Dict]:
+        """Map an RSS <item> or Atom <entry> onto the article dict shape"""
+        try:
+            def first(*names):
+                return self._first(children, *names)
 
-            results[source['name']] = articles
+            title = self._text(first('title')) or 'No Title'
 
-            # Be nice to servers
-            time.sleep(1)
+            # Content: content:encoded / Atom content, else description / summary
+            encoded = next(
+                (c for c in children.get('encoded', []) if c.tag == f"{{{self.CONTENT_NS}}}encoded"),
+                None
+            )
+            description = self._text(first('description', 'summary'))
+            content = self._text(encoded if encoded is not None else first('content')) or description
+            summary = (description or content)[:500]
+
+            # Author: dc:creator, RSS author, Atom author/name
+            author = self._text(first('creator')) or None
+            author_elem = first('author')
+            if not author and author_elem is not None:
+                name = self._children(author_elem).get('name')
+                author = self._text(name[0]) if name else self._text(author_elem) or None
+
+            return {
+                'url': url,
+                'title': title,
+                'content': content,
+                'summary': summary,
+                'author': author,
+                'source_name': self.source_name,
+                'category': self.category,
+                'tags': self._extract_tags(children),
+                'published_date': published_date,
+                'image_url': self._extract_image(children),
+                'relevance_score': 0.0
+            }
+
+        except Exception as e:
+            logger.error(f"Error parsing entry: {e}")
+            return None
+
+    @staticmethod
+    def _parse_date(value: str) -> Optional[str]:
+        """Entry date as a naive UTC ISO string (like feedparser), else as given"""
+        if not value:
+            return None
+        return to_iso(value) or value
+
+    def _extract_image(self, children: Dict[str, List]) -> Optional[str]:
+        """Image from media:content, media:thumbnail or an image enclosure"""
+        for media in children.get('content', []):
+            if media.tag != f"{{{self.MEDIA_NS}}}content":
+                continue
+            if media.get('type', '').startswith('image') or media.get('medium') == 'image':
+                return media.get('url')
+
+        for thumb in children.get('thumbnail', []):
+            if thumb.get('url'):
+                return thumb.get('url')
+
+        for enclosure in children.get('enclosure', []) + children.get('link', []):
+            if enclosure.get('type', '').startswith('image'):
+                return enclosure.get('url') or enclosure.get('href')
+
+        return None
 
-        return results
+    def _extract_tags(self, children: Dict[str, List]) -> List[str]:
+        """Tags from RSS <category> text or Atom <category term>"""
+        tags = [
+            category.get('term') or self._text(category)
+            for category in children.get('category', [])
+        ]
+        return [tag for tag in tags if tag]
 
 
 # Pre-configured popular sources
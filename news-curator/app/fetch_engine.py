@@ -0,0 +1,455 @@
+"""
+Concurrent feed fetch engine
+Downloads feeds over a shared async HTTP client and parses them in worker pools
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from .database import Database
+from .feed_fetcher import FeedFetcher, StreamingFeedParser, parse_feed_content
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FetchEngine:
+    """
+    Fetch many sources at once without blocking the event loop
+
+    A global semaphore caps the number of in-flight downloads, and a
+    per-host semaphore plus the transport's per-host rate limit keep us
+    from hammering any single server.
+
+    Parsing a buffered feed is pure-Python CPU work that holds the GIL, so
+    it runs in a process pool (parse_processes workers, one per core by
+    default) and a busy fetch scales across cores. Database writes, dedup
+    lookups and snapshots are synchronous IO and go to a thread pool of
+    parse_workers threads, which also does the incremental parsing below.
+
+    Feeds larger than stream_threshold bytes are parsed incrementally as
+    they download rather than buffered whole. That parser keeps its state
+    between chunks, so it stays in the thread pool; its per-chunk work is
+    mostly expat, which runs in C.
+
+    Each source has a circuit breaker: after failure_threshold consecutive
+    failures its circuit opens for circuit_open_seconds (doubling with each
+    further failure, up to max_open_seconds) and it is skipped until then.
+    A source that has failed before is fetched with failing_timeout instead
+    of the full timeout, so a dead host can't hold a worker for long.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        feed_fetcher: FeedFetcher,
+        max_concurrency: int = 20,
+        per_host_concurrency: int = 2,
+        parse_workers: int = 4,
+        parse_processes: Optional[int] = None,
+        stream_threshold: int = 1024 * 1024,
+        ingest_batch_size: int = 200,
+        crawler=None,
+        failure_threshold: int = 3,
+        circuit_open_seconds: int = 900,
+        max_open_seconds: int = 86400,
+        failing_timeout: float = 10
+    ):
+        self.db = db
+        self.feed_fetcher = feed_fetcher
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.stream_threshold = stream_threshold
+        self.ingest_batch_size = ingest_batch_size
+
+        # Optional Crawler (see crawler.py) for source_type 'scrape'
+        self.crawler = crawler
+
+        self.failure_threshold = failure_threshold
+        self.circuit_open_seconds = circuit_open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.failing_timeout = failing_timeout
+
+        self._global_limit = asyncio.Semaphore(max_concurrency)
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=parse_workers,
+            thread_name_prefix="feed-parse"
+        )
+
+        # Started on first use; spawned, not forked, so workers don't
+        # inherit the server's locks and connections
+        self.parse_processes = parse_processes
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The transport's shared async client"""
+        return self.feed_fetcher.transport.async_client
+
+    async def close(self):
+        """Release the HTTP clients and worker pools"""
+        await self.feed_fetcher.transport.aclose()
+        self._executor.shutdown(wait=False)
+        pool, self._parse_pool = self._parse_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def parse_pool(self) -> ProcessPoolExecutor:
+        """The process pool buffered feeds are parsed in (created on first use)"""
+        if self._parse_pool is None:
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._parse_pool
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Get (or create) the semaphore for a URL's host"""
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_limits[host]
+
+    async def fetch_all(self, sources: List[Dict]) -> int:
+        """
+        Fetch all sources concurrently
+
+        Returns:
+            Total number of new articles stored
+        """
+        results = await asyncio.gather(
+            *(self.fetch_source(source) for source in sources),
+            return_exceptions=True
+        )
+
+        total_added = 0
+        for source, result in zip(sources, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching {source['name']}: {result}")
+            else:
+                total_added += result
+
+        return total_added
+
+    async def fetch_source(self, source: Dict, raise_errors: bool = False) -> int:
+        """
+        Fetch single source and store its articles
+
+        Args:
+            source: Source dict from the database
+            raise_errors: Re-raise fetch errors after logging them (used by
+                the scheduler to detect failing sources)
+
+        Returns:
+            Number of new articles stored (0 if the source's circuit is open)
+        """
+        open_until = self.circuit_open_until(source)
+        if open_until is not None:
+            logger.info(f"Skipping {source['name']}: circuit open until {open_until:%Y-%m-%d %H:%M:%S} UTC")
+            return 0
+
+        logger.info(f"Fetching {source['name']}")
+
+        added_count = 0
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+
+        try:
+            if source['source_type'] == 'rss' and source.get('feed_url'):
+                added_count = await self._fetch_feed(source)
+            elif source['source_type'] == 'scrape' and self.crawler is not None:
+                # Politeness delays sleep, so keep it off the parse pool
+                added_count = await asyncio.to_thread(self.crawler.crawl_source, source)
+
+            # Update last fetched time and health state
+            await loop.run_in_executor(
+                self._executor,
+                self._record_success,
+                source,
+                (time.monotonic() - started) * 1000
+            )
+
+        except Exception as e:
+            logger.error(f"Error fetching source {source['name']}: {e}")
+            await loop.run_in_executor(
+                self._executor,
+                self._record_failure,
+                source,
+                f"{type(e).__name__}: {e}",
+                (time.monotonic() - started) * 1000
+            )
+            if raise_errors:
+                raise
+
+        logger.info(f"Added {added_count} new articles from {source['name']}")
+        return added_count
+
+    @staticmethod
+    def circuit_open_until(source: Dict) -> Optional[datetime]:
+        """When the source's open circuit closes again (naive UTC), None if closed"""
+        value = source.get('circuit_open_until')
+        if not value:
+            return None
+
+        try:
+            open_until = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+        return open_until if open_until > datetime.utcnow() else None
+
+    def _record_success(self, source: Dict, latency_ms: float):
+        """Store a successful fetch (source dict is updated in place for the scheduler)"""
+        self.db.record_source_success(source['id'], latency_ms)
+        source['consecutive_failures'] = 0
+        source['circuit_open_until'] = None
+
+    def _record_failure(self, source: Dict, error: str, latency_ms: float):
+        """Store a failed fetch, opening the circuit once failures reach the threshold"""
+        failures = (source.get('consecutive_failures') or 0) + 1
+
+        open_until = None
+        if failures >= self.failure_threshold:
+            seconds = min(
+                self.max_open_seconds,
+                self.circuit_open_seconds * 2 ** (failures - self.failure_threshold)
+            )
+            open_until = (datetime.utcnow() + timedelta(seconds=seconds)).strftime('%Y-%m-%d %H:%M:%S')
+            logger.warning(f"{source['name']} failed {failures}x, circuit open for {seconds}s")
+
+        self.db.record_source_failure(source['id'], error, latency_ms, open_until)
+        source['consecutive_failures'] = failures
+        source['last_error'] = error
+        source['circuit_open_until'] = open_until
+
+    @staticmethod
+    def _conditional_headers(source: Dict) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since from stored validators"""
+        headers = {}
+        if source.get('etag'):
+            headers['If-None-Match'] = source['etag']
+        if source.get('last_modified'):
+            headers['If-Modified-Since'] = source['last_modified']
+        return headers
+
+    async def _fetch_feed(self, source: Dict) -> int:
+        """
+        Download one feed under the global and per-host limits and store it
+
+        Small feeds are buffered and then parsed with feedparser in the
+        process pool, after the connection and limits are released. Once a
+        body grows past stream_threshold it is handed to the streaming
+        parser instead, which ingests items as they arrive (holding the
+        connection) and can stop the download early.
+        """
+        url = source['feed_url']
+        loop = asyncio.get_running_loop()
+        added_count = 0
+
+        async with self._global_limit:
+            async with self._host_limit(url):
+                await self.feed_fetcher.transport.throttle_async(url)
+                # Sources that have been failing get a short timeout
+                timeout = self.failing_timeout if source.get('consecutive_failures') else httpx.USE_CLIENT_DEFAULT
+
+                async with self.client.stream(
+                    'GET', url, headers=self._conditional_headers(source), timeout=timeout
+                ) as response:
+                    # httpx treats 304 as an error, but it is our cache hit
+                    if response.status_code == 304:
+                        logger.info(f"{source['name']} not modified (304)")
+                        return 0
+                    response.raise_for_status()
+
+                    digest = hashlib.sha256()
+                    chunks: List[bytes] = []
+                    size = 0
+                    stream = response.aiter_bytes()
+                    streaming = int(response.headers.get('content-length') or 0) > self.stream_threshold
+
+                    if not streaming:
+                        async for chunk in stream:
+                            digest.update(chunk)
+                            chunks.append(chunk)
+                            size += len(chunk)
+                            if size > self.stream_threshold:
+                                streaming = True
+                                break
+
+                    headers = response.headers
+                    content = None
+                    if streaming:
+                        added_count, complete = await self._stream_and_store(
+                            source, chunks, stream, digest, headers.get('content-type')
+                        )
+                        content_hash = digest.hexdigest() if complete else None
+                    else:
+                        content = b"".join(chunks)
+                        content_hash = digest.hexdigest()
+
+        # A buffered body is parsed after the response and both limits are
+        # released, so a slow parse doesn't hold up other downloads
+        if content is not None:
+            if content_hash == source.get('content_hash'):
+                logger.info(f"{source['name']} body unchanged, skipping parse")
+            else:
+                added_count = await self._parse_and_store(source, content, dict(headers))
+
+        # Remember validators for the next conditional request
+        await loop.run_in_executor(
+            self._executor,
+            self.db.update_source_validators,
+            source['id'],
+            headers.get('etag'),
+            headers.get('last-modified'),
+            content_hash
+        )
+
+        return added_count
+
+    async def _stream_and_store(
+        self,
+        source: Dict,
+        buffered: List[bytes],
+        stream: AsyncIterator[bytes],
+        digest,
+        content_type: Optional[str] = None
+    ) -> Tuple[int, bool]:
+        """
+        Parse a large feed incrementally, ingesting in batches
+
+        The body is also streamed into a snapshot (if enabled), which is
+        kept only when the download ran to the end.
+
+        Returns:
+            (articles added, whether the whole body was read)
+        """
+        loop = asyncio.get_running_loop()
+        stop_before = await loop.run_in_executor(
+            self._executor, self.db.get_latest_article_ts, source['name']
+        )
+        parser = StreamingFeedParser(
+            source['feed_url'],
+            source['name'],
+            source.get('category'),
+            stop_before=stop_before,
+            dedup_index=self.feed_fetcher.dedup_index
+        )
+
+        snapshot = None
+        if self.feed_fetcher.snapshots is not None:
+            snapshot = await loop.run_in_executor(self._executor, partial(
+                self.feed_fetcher.snapshots.writer,
+                source['feed_url'],
+                'feed',
+                source_name=source['name'],
+                category=source.get('category'),
+                content_type=content_type
+            ))
+
+        added_count = 0
+        batch: List[Dict] = []
+
+        async def flush():
+            nonlocal added_count, batch
+            if batch:
+                result = await loop.run_in_executor(self._executor, self.db.add_articles, batch)
+                added_count += result['inserted']
+                batch = []
+
+        try:
+            # Parsing (and the dedup lookups and snapshot compression that
+            # go with it) runs in the pool; only the download stays on the loop
+            batch.extend(await loop.run_in_executor(
+                self._executor, self._feed_parser, parser, snapshot, buffered
+            ))
+
+            if not parser.done:
+                async for chunk in stream:
+                    digest.update(chunk)
+                    batch.extend(await loop.run_in_executor(
+                        self._executor, self._feed_parser, parser, snapshot, [chunk]
+                    ))
+                    if len(batch) >= self.ingest_batch_size:
+                        await flush()
+                    if parser.done:
+                        break
+
+            complete = not parser.done
+            if complete:
+                batch.extend(await loop.run_in_executor(self._executor, parser.close))
+            else:
+                logger.info(f"{source['name']}: reached already-seen items, stopped download early")
+
+            await flush()
+
+        except BaseException:
+            if snapshot is not None:
+                snapshot.discard()
+            raise
+
+        if snapshot is not None:
+            if complete:
+                await loop.run_in_executor(self._executor, snapshot.commit)
+            else:
+                await loop.run_in_executor(self._executor, snapshot.discard)
+
+        return added_count, complete
+
+    @staticmethod
+    def _feed_parser(parser: StreamingFeedParser, snapshot, chunks: List[bytes]) -> List[Dict]:
+        """Feed chunks to a streaming parser and the snapshot (runs in the worker pool)"""
+        articles = []
+        for chunk in chunks:
+            if snapshot is not None:
+                snapshot.write(chunk)
+            articles.extend(parser.feed(chunk))
+        return articles
+
+    async def _parse_and_store(self, source: Dict, content: bytes, headers: Dict) -> int:
+        """Parse a feed body in the process pool and store new articles"""
+        loop = asyncio.get_running_loop()
+
+        if self.feed_fetcher.snapshots is not None:
+            await loop.run_in_executor(self._executor, partial(
+                self.feed_fetcher.snapshots.put,
+                source['feed_url'],
+                content,
+                'feed',
+                source_name=source['name'],
+                category=source.get('category'),
+                content_type=headers.get('content-type')
+            ))
+
+        articles = await loop.run_in_executor(
+            self.parse_pool,
+            parse_feed_content,
+            content,
+            source['feed_url'],
+            source['name'],
+            source.get('category'),
+            headers
+        )
+
+        return await loop.run_in_executor(self._executor, self._store, source, articles)
+
+    def _store(self, source: Dict, articles: List[Dict]) -> int:
+        """Store the articles not seen before (runs in the thread pool)"""
+        articles = self.feed_fetcher.skip_known_articles(articles, source['name'])
+        if not articles:
+            return 0
+
+        result = self.db.add_articles(articles)
+        return result['inserted']
@@ -0,0 +1,126 @@
+"""
+URL canonicalization and content fingerprints
+Used to catch the same story under different URLs or syndicated across sources
+"""
+
+import hashlib
+import html
+import re
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'gclsrc', 'msclkid', 'yclid', 'igshid',
+    'mc_cid', 'mc_eid', '_hsenc', '_hsmi', 'mkt_tok', 'ref', 'ref_src',
+    'cmpid', 'ocid', 'spm', 'share', 'src', 'taid', 'guccounter',
+}
+
+TRACKING_PREFIXES = ('utm_', 'at_', 'pk_', 'itm_')
+
+# Bits that may differ between two fingerprints of the "same" text
+NEAR_DUPLICATE_DISTANCE = 3
+
+# Texts shorter than this (in words) don't fingerprint reliably
+MIN_FINGERPRINT_WORDS = 20
+
+TAG_RE = re.compile(r'<[^>]+>')
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+SPACE_RE = re.compile(r'\s+')
+# A tag, or one cut off by a truncated summary
+MARKUP_RE = re.compile(r'<[a-zA-Z/!?][^>]*(?:>|$)')
+
+
+def strip_tags(text: Optional[str]) -> Optional[str]:
+    """Plain text of an HTML fragment: tags dropped, entities decoded"""
+    if text is None:
+        return None
+    return SPACE_RE.sub(' ', html.unescape(MARKUP_RE.sub(' ', text))).strip()
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce a URL to the form used for deduplication
+
+    http/https, a leading "www.", default ports, fragments, trailing
+    slashes, tracking parameters and query parameter order are all ignored.
+    The stored URL is left alone; this only feeds the hash.
+    """
+    url = url.strip()
+    parts = urlsplit(url)
+
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https'):
+        return url
+    scheme = 'https'
+
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    netloc = host
+    if parts.port and parts.port not in (80, 443):
+        netloc = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash over word 3-gram shingles
+
+    Similar texts get fingerprints that differ in only a few bits. Returns
+    a signed value so it fits an SQLite INTEGER, or None when the text is
+    too short to fingerprint reliably.
+    """
+    words = WORD_RE.findall(TAG_RE.sub(' ', text or '').lower())
+    if len(words) < MIN_FINGERPRINT_WORDS:
+        return None
+
+    # One bit string per shingle; zip(*) turns them into per-bit columns so
+    # the vote counting runs in C rather than a 64-step Python loop each
+    shingles = [
+        format(int.from_bytes(
+            hashlib.blake2b(' '.join(words[i:i + 3]).encode(), digest_size=8).digest(), 'big'
+        ), '064b')
+        for i in range(len(words) - 2)
+    ]
+
+    value = 0
+    for position, column in enumerate(zip(*shingles)):
+        if column.count('1') * 2 > len(shingles):
+            value |= 1 << (63 - position)
+
+    # Store as signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def article_fingerprint(article: dict) -> Optional[int]:
+    """SimHash of an article's title and body"""
+    text = f"{article.get('title') or ''} {article.get('content') or article.get('summary') or ''}"
+    return simhash(text)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two 64-bit fingerprints"""
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count('1')
+
+
+def fingerprint_bands(fingerprint: int):
+    """
+    Split a fingerprint into four 16-bit band keys
+
+    Two fingerprints within NEAR_DUPLICATE_DISTANCE bits must share at least
+    one band exactly, so candidates can be found with an index lookup.
+    """
+    return [(band << 16) | ((fingerprint >> (16 * band)) & 0xFFFF) for band in range(4)]
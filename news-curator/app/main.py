@@ -4,18 +4,34 @@ Lightweight, fast API and web interface
 """
 
 from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi import Request
-from typing import Optional, List
+from typing import Any, Callable, Optional, List
 import uvicorn
 from pathlib import Path
 import logging
+import os
+import asyncio
+import json
+import sys
 
+from .cache import ResponseCache
+from .crawler import Crawler
 from .database import Database
+from .dates import to_timestamp
+from .dedup import DedupIndex
+from .enrichment import EnrichmentWorker
 from .feed_fetcher import FeedFetcher, DEFAULT_SOURCES
+from .fetch_engine import FetchEngine
+from .relevance import RelevanceScorer
+from .retention import RetentionEngine
+from .scheduler import FeedScheduler
 from .scraper import WebScraper
+from .snapshots import SnapshotStore
+from .transport import Transport
 
 # Setup logging
 logging.basicConfig(
@@ -42,9 +58,87 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 # Initialize components
-db = Database()
-feed_fetcher = FeedFetcher()
-scraper = WebScraper()
+db = Database(
+    os.getenv("DATABASE_PATH", "data/news_curator.db"),
+    readers=int(os.getenv("DB_READERS", "4")),
+    synchronous=os.getenv("DB_SYNCHRONOUS", "NORMAL"),
+    mmap_size=int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+    cache_size=int(os.getenv("DB_CACHE_SIZE", "-64000"))
+)
+dedup_index = DedupIndex(db)
+db.dedup_index = dedup_index
+relevance_scorer = RelevanceScorer(db)
+db.scorer = relevance_scorer
+transport = Transport(
+    "Mozilla/5.0 (compatible; NewsCurator/1.0; +http://example.com/bot)",
+    timeout=float(os.getenv("FETCH_TIMEOUT", "30")),
+    max_connections=int(os.getenv("FETCH_CONCURRENCY", "20")),
+    per_host_rate=float(os.getenv("FETCH_HOST_RATE", "2")),
+    per_host_burst=int(os.getenv("FETCH_HOST_BURST", "5")),
+    dns_ttl=float(os.getenv("DNS_CACHE_TTL", "300")),
+    dns_max_entries=int(os.getenv("DNS_CACHE_SIZE", "1024"))
+)
+# Raw feed/page bodies are kept for replay only when SNAPSHOT_DIR is set
+snapshot_store = SnapshotStore(
+    db,
+    os.environ["SNAPSHOT_DIR"],
+    max_bytes=int(os.getenv("SNAPSHOT_MAX_BYTES", str(512 * 1024 * 1024)))
+) if os.getenv("SNAPSHOT_DIR") else None
+feed_fetcher = FeedFetcher(
+    timeout=transport.timeout,
+    dedup_index=dedup_index,
+    transport=transport,
+    snapshots=snapshot_store
+)
+scraper = WebScraper(
+    timeout=transport.timeout,
+    transport=transport,
+    snapshots=snapshot_store,
+    parse_workers=int(os.getenv("SCRAPE_PARSE_WORKERS", "0")) or None
+)
+crawler = Crawler(
+    db,
+    scraper,
+    dedup_index=dedup_index,
+    politeness_delay=float(os.getenv("CRAWL_DELAY", "2")),
+    max_pages_per_crawl=int(os.getenv("CRAWL_MAX_PAGES", "50")),
+    use_newspaper=os.getenv("CRAWL_USE_NEWSPAPER", "0") == "1"
+)
+fetch_engine = FetchEngine(
+    db,
+    feed_fetcher,
+    max_concurrency=int(os.getenv("FETCH_CONCURRENCY", "20")),
+    per_host_concurrency=int(os.getenv("FETCH_PER_HOST_CONCURRENCY", "2")),
+    stream_threshold=int(os.getenv("FETCH_STREAM_THRESHOLD", str(1024 * 1024))),
+    parse_processes=int(os.getenv("FETCH_PARSE_WORKERS", "0")) or None,
+    crawler=crawler
+)
+response_cache = ResponseCache(
+    lambda: db.generation,
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "512")),
+    ttl=float(os.getenv("CACHE_TTL", "300"))
+)
+enrichment_worker = EnrichmentWorker(
+    db,
+    scraper,
+    min_length=int(os.getenv("ENRICH_MIN_LENGTH", "500")),
+    workers=int(os.getenv("ENRICH_WORKERS", "4")),
+    per_host_interval=float(os.getenv("ENRICH_HOST_INTERVAL", "1")),
+    use_newspaper=os.getenv("CRAWL_USE_NEWSPAPER", "0") == "1"
+)
+retention_engine = RetentionEngine(
+    db,
+    batch_size=int(os.getenv("RETENTION_BATCH_SIZE", "500")),
+    pause=float(os.getenv("RETENTION_PAUSE", "0.05")),
+    archive=os.getenv("RETENTION_ARCHIVE", "0") == "1"
+)
+background_jobs: List[asyncio.Task] = []
+scheduler = FeedScheduler(
+    db,
+    fetch_engine,
+    min_interval=int(os.getenv("SCHEDULER_MIN_INTERVAL", "300")),
+    max_interval=int(os.getenv("SCHEDULER_MAX_INTERVAL", "86400"))
+)
 
 
 # ===========================
@@ -81,35 +175,116 @@ async def article_view(request: Request, article_id: int):
 # API Routes
 # ===========================
 
+def cached_json(request: Request, producer: Callable[[], Any]) -> Response:
+    """
+    Serve a JSON body from the response cache, building it on a miss
+
+    The ETag lets browsers revalidate with If-None-Match and get a 304
+    until the next write bumps the database generation.
+    """
+    key = response_cache.make_key(request.url.path, request.query_params)
+    entry = response_cache.get(key)
+
+    if entry is None:
+        generation = db.generation
+        body = json.dumps(jsonable_encoder(producer())).encode()
+        entry = response_cache.set(key, body, generation)
+
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    return Response(body, media_type="application/json", headers=headers)
+
+
 @app.get("/api/articles")
 async def get_articles(
+    request: Request,
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     category: Optional[str] = None,
     source: Optional[str] = None,
     starred: bool = False,
     unread: bool = False,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: str = "date",
+    since: Optional[str] = None,
+    until: Optional[str] = None
 ):
-    """Get articles with filtering"""
-    articles = db.get_articles(
-        limit=limit,
-        offset=offset,
+    """
+    Get articles with filtering
+
+    sort=date (newest first) or sort=relevance (highest keyword score
+    first); search results are always ranked by match quality.
+    since/until limit the publish date (ISO date or epoch seconds, UTC).
+    Pass the returned next_cursor back as cursor to get the next page.
+    offset is still accepted for old clients but gets slower on deep pages.
+
+    Lists return a light "card" projection without the article body; use
+    fields=id,title,... to pick other columns and /api/article/{id} for the
+    full article.
+    """
+    return cached_json(request, lambda: list_articles(
+        limit, offset, cursor, category, source, starred, unread, search, fields, sort, since, until
+    ))
+
+
+def date_param(name: str, value: Optional[str]) -> Optional[int]:
+    """Epoch seconds from an ISO date or epoch query parameter"""
+    if value is None:
+        return None
+    timestamp = int(value) if value.isdigit() else to_timestamp(value)
+    if timestamp is None:
+        raise HTTPException(status_code=400, detail=f"Invalid date for {name}: {value}")
+    return timestamp
+
+
+def list_articles(
+    limit, offset, cursor, category, source, starred, unread, search, fields,
+    sort="date", since=None, until=None
+) -> dict:
+    """Build the /api/articles response body"""
+    filters = dict(
         category=category,
         source=source,
         starred_only=starred,
         unread_only=unread,
-        search=search
+        search=search,
+        sort=sort,
+        fields=[name.strip() for name in fields.split(",") if name.strip()] if fields else None,
+        since=date_param("since", since),
+        until=date_param("until", until)
     )
-    return {"articles": articles, "count": len(articles)}
+
+    try:
+        if offset and not cursor:
+            articles = db.get_articles(limit=limit, offset=offset, **filters)
+            return {"articles": articles, "count": len(articles), "next_cursor": None}
+
+        page = db.get_article_page(limit=limit, cursor=cursor, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "articles": page["articles"],
+        "count": len(page["articles"]),
+        "next_cursor": page["next_cursor"]
+    }
 
 
 @app.get("/api/article/{article_id}")
 async def get_article(article_id: int):
-    """Get single article"""
+    """Get single article, with the other sources that carried the same story"""
     article = db.get_article_by_id(article_id)
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
+    article["story"] = [
+        copy for copy in db.get_story_cluster(article_id) if copy["id"] != article_id
+    ]
     return article
 
 
@@ -125,28 +300,80 @@ async def mark_read(article_id: int):
 @app.post("/api/article/{article_id}/star")
 async def toggle_star(article_id: int):
     """Toggle star status"""
-    success = db.toggle_star(article_id)
-    if not success:
+    is_starred = db.toggle_star(article_id)
+    if is_starred is None:
         raise HTTPException(status_code=404, detail="Article not found")
+    return {"status": "success", "is_starred": is_starred}
 
-    article = db.get_article_by_id(article_id)
-    return {"status": "success", "is_starred": article['is_starred']}
+
+@app.post("/api/articles/read")
+async def mark_all_read(
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    starred: bool = False,
+    search: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
+    """Mark every unread article matching the list filters as read"""
+    updated = db.mark_all_read(
+        category=category,
+        source=source,
+        starred_only=starred,
+        search=search,
+        since=date_param("since", since),
+        until=date_param("until", until)
+    )
+    return {"status": "success", "updated": updated}
+
+
+# Most ids one /api/articles/mark request may change
+MAX_MARK_IDS = 10000
+
+
+@app.post("/api/articles/mark")
+async def mark_articles(body: dict):
+    """Set is_read and/or is_starred on a list of articles: {"ids": [...], "is_read": true}"""
+    ids = body.get("ids")
+    # bool is an int subclass, so true/false would pass as ids 1/0
+    if not isinstance(ids, list) or not all(type(article_id) is int for article_id in ids):
+        raise HTTPException(status_code=400, detail="ids must be a list of article ids")
+    if len(ids) > MAX_MARK_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_MARK_IDS} ids per request")
+
+    flags = {name: body.get(name) for name in ("is_read", "is_starred")}
+    if all(value is None for value in flags.values()):
+        raise HTTPException(status_code=400, detail="is_read or is_starred is required")
+    if not all(value is None or isinstance(value, bool) for value in flags.values()):
+        raise HTTPException(status_code=400, detail="is_read and is_starred must be true or false")
+
+    updated = db.mark_articles(ids, **flags)
+    return {"status": "success", "updated": updated}
 
 
 @app.get("/api/stats")
-async def get_stats():
+async def get_stats(request: Request):
     """Get database statistics"""
-    return db.get_stats()
+    return cached_json(request, db.get_stats)
 
 
 @app.get("/api/sources")
-async def get_sources(active_only: bool = True):
+async def get_sources(request: Request, active_only: bool = True):
     """Get all sources"""
-    if active_only:
-        sources = db.get_active_sources()
-    else:
-        sources = db.get_all_sources()
-    return {"sources": sources}
+    def build():
+        if active_only:
+            sources = db.get_active_sources()
+        else:
+            sources = db.get_all_sources()
+        return {"sources": sources}
+
+    return cached_json(request, build)
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Response cache hit/miss counters"""
+    return response_cache.stats()
 
 
 @app.post("/api/sources")
@@ -154,11 +381,54 @@ async def add_source(source: dict):
     """Add new source"""
     try:
         source_id = db.add_source(source)
+        scheduler.reload()
         return {"status": "success", "id": source_id}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/api/keywords")
+async def get_keywords():
+    """Get active scoring keywords"""
+    return {"keywords": db.get_keywords()}
+
+
+@app.post("/api/keywords")
+async def add_keyword(keyword: dict, background_tasks: BackgroundTasks):
+    """Add (or reweight) a keyword and rescore the articles that mention it"""
+    text = (keyword.get("keyword") or "").strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="keyword is required")
+
+    try:
+        weight = float(keyword.get("weight", 1.0))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="weight must be a number")
+
+    db.add_keyword(text, keyword.get("category"), weight)
+    relevance_scorer.load()
+    background_tasks.add_task(asyncio.to_thread, relevance_scorer.rescore, text)
+    return {"status": "success", "keyword": text.lower()}
+
+
+@app.delete("/api/keywords/{keyword}")
+async def remove_keyword(keyword: str, background_tasks: BackgroundTasks):
+    """Remove a keyword and rescore the articles that mentioned it"""
+    if not db.remove_keyword(keyword):
+        raise HTTPException(status_code=404, detail="Keyword not found")
+
+    relevance_scorer.load()
+    background_tasks.add_task(asyncio.to_thread, relevance_scorer.rescore, keyword)
+    return {"status": "success"}
+
+
+@app.post("/api/keywords/rescore")
+async def rescore_articles(background_tasks: BackgroundTasks):
+    """Recompute every article's relevance score in background"""
+    background_tasks.add_task(asyncio.to_thread, relevance_scorer.rescore)
+    return {"status": "started", "message": "Rescoring articles in background"}
+
+
 @app.post("/api/fetch")
 async def fetch_feeds(background_tasks: BackgroundTasks):
     """Fetch all active feeds in background"""
@@ -166,6 +436,84 @@ async def fetch_feeds(background_tasks: BackgroundTasks):
     return {"status": "started", "message": "Fetching feeds in background"}
 
 
+@app.get("/api/crawl")
+async def get_crawl_status():
+    """Crawl queue size per scrape source, stage and status"""
+    return {"queue": db.get_crawl_status()}
+
+
+@app.get("/api/enrichment")
+async def get_enrichment_status():
+    """Full-content enrichment worker counters"""
+    return enrichment_worker.status()
+
+
+@app.get("/api/snapshots")
+async def get_snapshot_usage():
+    """Size of the raw snapshot store"""
+    if snapshot_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **snapshot_store.usage()}
+
+
+@app.post("/api/snapshots/replay")
+async def replay(
+    background_tasks: BackgroundTasks,
+    kind: Optional[str] = Query(None, pattern="^(feed|page)$"),
+    source: Optional[str] = None,
+    since: Optional[str] = None,
+    update: bool = False,
+    rescore: bool = False
+):
+    """Re-parse stored snapshots (and optionally re-score) in background"""
+    if snapshot_store is None:
+        raise HTTPException(status_code=404, detail="Snapshot store is not enabled")
+
+    args = []
+    if kind:
+        args += ["--kind", kind]
+    if source:
+        args += ["--source", source]
+    if since:
+        args += ["--since", since]
+    if update:
+        args.append("--update")
+    if rescore:
+        args.append("--rescore")
+
+    background_tasks.add_task(run_replay, args)
+    return {"status": "started", "message": "Replaying snapshots in background"}
+
+
+async def run_replay(args: List[str]):
+    """
+    Run python -m app.replay in a child process
+
+    Its parser pool then lives outside the server. Afterwards cached
+    responses are dropped and the dedup index is reloaded, since the rows
+    were written by another process.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "app.replay",
+        "--db", os.path.abspath(db.db_path),
+        "--snapshot-dir", str(snapshot_store.directory.resolve()),
+        *args,
+        cwd=str(Path(__file__).resolve().parent.parent)
+    )
+    returncode = await process.wait()
+    if returncode != 0:
+        logger.error(f"Snapshot replay exited with status {returncode}")
+
+    db.mark_changed()
+    await asyncio.to_thread(dedup_index.load)
+
+
+@app.get("/api/scheduler")
+async def get_scheduler_status():
+    """Sources queued by the scheduler with their next fetch time"""
+    return {"queue": scheduler.status()}
+
+
 @app.post("/api/fetch/{source_id}")
 async def fetch_single_source(source_id: int, background_tasks: BackgroundTasks):
     """Fetch single source"""
@@ -175,23 +523,53 @@ async def fetch_single_source(source_id: int, background_tasks: BackgroundTasks)
     if not source:
         raise HTTPException(status_code=404, detail="Source not found")
 
-    background_tasks.add_task(fetch_source, source)
+    background_tasks.add_task(fetch_engine.fetch_source, source)
     return {"status": "started", "message": f"Fetching {source['name']}"}
 
 
 @app.delete("/api/articles/cleanup")
-async def cleanup_articles(days: int = Query(30, ge=1, le=365)):
-    """Delete old articles (keep starred)"""
-    deleted = db.cleanup_old_articles(days)
-    return {"status": "success", "deleted": deleted}
+async def cleanup_articles(
+    background_tasks: BackgroundTasks,
+    days: int = Query(30, ge=1, le=365),
+    archive: Optional[bool] = None
+):
+    """
+    Expire old articles (keep starred) in background
+
+    archive=true moves them to the archive table instead of deleting
+    (default: RETENTION_ARCHIVE). Progress is at /api/retention.
+    """
+    if not retention_engine.start(days, archive):
+        raise HTTPException(status_code=409, detail="Cleanup already running")
+
+    background_tasks.add_task(asyncio.to_thread, retention_engine.run, days)
+    return {"status": "started", "message": f"Removing articles older than {days} days in background"}
+
+
+@app.get("/api/retention")
+async def get_retention_status():
+    """Progress of the last cleanup run and database file usage"""
+    return retention_engine.status()
+
+
+@app.get("/api/archive/{article_id}")
+async def get_archived_article(article_id: int):
+    """Get an article moved to the archive by cleanup"""
+    article = db.get_archived_article(article_id)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return article
 
 
 @app.get("/api/categories")
-async def get_categories():
+async def get_categories(request: Request):
     """Get all unique categories"""
-    stats = db.get_stats()
-    categories = list(stats.get('by_category', {}).keys())
-    return {"categories": categories}
+    def build():
+        stats = db.get_stats()
+        categories = list(stats.get('by_category', {}).keys())
+        return {"categories": categories}
+
+    return cached_json(request, build)
 
 
 # ===========================
@@ -199,49 +577,25 @@ async def get_categories():
 # ===========================
 
 async def fetch_all_feeds():
-    """Fetch all active feeds"""
+    """Fetch all active feeds concurrently"""
     logger.info("Starting feed fetch job")
 
     sources = db.get_active_sources()
-    total_added = 0
-
-    for source in sources:
-        try:
-            articles = fetch_source(source)
-            total_added += articles
-        except Exception as e:
-            logger.error(f"Error fetching {source['name']}: {e}")
+    total_added = await fetch_engine.fetch_all(sources)
 
     logger.info(f"Feed fetch complete. Added {total_added} new articles")
 
 
-def fetch_source(source: dict) -> int:
-    """Fetch single source and store articles"""
-    logger.info(f"Fetching {source['name']}")
-
-    added_count = 0
-
-    try:
-        if source['source_type'] == 'rss' and source.get('feed_url'):
-            articles = feed_fetcher.fetch_feed(
-                source['feed_url'],
-                source['name'],
-                source.get('category')
-            )
-
-            for article in articles:
-                article_id = db.add_article(article)
-                if article_id:
-                    added_count += 1
-
-        # Update last fetched time
-        db.update_source_fetch_time(source['id'])
-
-    except Exception as e:
-        logger.error(f"Error fetching source {source['name']}: {e}")
-
-    logger.info(f"Added {added_count} new articles from {source['name']}")
-    return added_count
+async def reconcile_stats_periodically(interval: int):
+    """Recount the stats counters every interval seconds to fix any drift"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            drifted = await asyncio.to_thread(db.reconcile_stats)
+            if drifted:
+                logger.warning(f"Stats reconcile fixed {drifted} drifted counters")
+        except Exception as e:
+            logger.error(f"Stats reconcile failed: {e}")
 
 
 # ===========================
@@ -264,14 +618,43 @@ async def startup_event():
         for source in DEFAULT_SOURCES:
             db.add_source(source)
 
+    # Compile the scoring keywords before anything is ingested
+    relevance_scorer.load()
+
+    # Build the pre-parse dedup index from stored URLs (fetches work meanwhile)
+    background_jobs.append(asyncio.create_task(asyncio.to_thread(dedup_index.load)))
+
+    # Train a body compression dictionary once enough articles are stored (opt in)
+    if os.getenv("CONTENT_DICTIONARY", "0") == "1" and db.codec.active_dictionary is None:
+        background_jobs.append(asyncio.create_task(asyncio.to_thread(db.train_content_dictionary)))
+
     # Initial fetch (optional - uncomment to fetch on startup)
     # await fetch_all_feeds()
 
+    # Fetch sources as they come due (set SCHEDULER_ENABLED=0 to rely on cron)
+    if os.getenv("SCHEDULER_ENABLED", "1") != "0":
+        scheduler.start()
+
+    # Fetch full text for title-only / teaser entries (opt in)
+    if os.getenv("ENRICHMENT_ENABLED", "0") == "1":
+        enrichment_worker.start()
+
+    background_jobs.append(asyncio.create_task(
+        reconcile_stats_periodically(int(os.getenv("STATS_RECONCILE_INTERVAL", "3600")))
+    ))
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down News Curator")
+    for job in background_jobs:
+        job.cancel()
+    await scheduler.stop()
+    await enrichment_worker.stop()
+    await fetch_engine.close()
+    scraper.close()
+    db.close()
 
 
 # ===========================
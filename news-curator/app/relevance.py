@@ -0,0 +1,171 @@
+"""
+Keyword relevance scoring
+Scores articles against the keywords table in one pass over their text
+"""
+
+import logging
+import re
+import threading
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TAG_RE = re.compile(r'<[^>]+>')
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# A keyword in the title is worth this many mentions in the body
+TITLE_BOOST = 3.0
+
+# Body mentions beyond this don't add more, so long articles don't win by length
+MAX_BODY_HITS = 5
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase word tokens, HTML tags dropped"""
+    return WORD_RE.findall(TAG_RE.sub(' ', text or '').lower())
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over word tokens
+
+    Every keyword (one or more words) becomes a path in a trie with failure
+    links, so a single left-to-right pass over the tokens finds every
+    occurrence of every keyword. The cost is linear in the text length no
+    matter how many keywords are loaded.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[Tuple[str, ...], Dict]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Dict]] = [[]]
+
+        for words, keyword in keywords:
+            if not words:
+                continue
+            state = 0
+            for word in words:
+                if word not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][word] = len(self._goto) - 1
+                state = self._goto[state][word]
+            self._out[state].append(keyword)
+
+        # Breadth-first: a state's failure link points at the longest proper
+        # suffix that is also a trie path, and inherits that state's matches
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for word, child in self._goto[state].items():
+                pending.append(child)
+                if state == 0:
+                    continue
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self._goto) - 1
+
+    def matches(self, tokens: Iterable[str]) -> Iterator[Dict]:
+        """Yield the keyword dict for every occurrence in the token stream"""
+        state = 0
+        for token in tokens:
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            yield from self._out[state]
+
+
+class RelevanceScorer:
+    """
+    Scores articles against the active keywords
+
+    Each keyword adds weight * (TITLE_BOOST per title mention + body
+    mentions, capped at MAX_BODY_HITS). Keywords with a category only count
+    for articles in that category. load() recompiles the automaton after the
+    keywords change; rescore() then updates just the articles that mention
+    the changed keyword.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._automaton = KeywordAutomaton([])
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Compile the active keywords into a fresh automaton"""
+        keywords = [
+            (tuple(tokenize(keyword['keyword'])), keyword)
+            for keyword in self.db.get_keywords()
+        ]
+        automaton = KeywordAutomaton(keywords)
+
+        with self._lock:
+            self._automaton = automaton
+
+        logger.info(f"Relevance scorer loaded {len(keywords)} keywords")
+
+    def score(self, article: Dict) -> float:
+        """Relevance score of an article dict (title, summary/content, category)"""
+        automaton = self._automaton
+        category = article.get('category')
+
+        title_hits: Dict[int, int] = {}
+        body_hits: Dict[int, int] = {}
+        keywords: Dict[int, Dict] = {}
+
+        for hits, text in (
+            (title_hits, article.get('title')),
+            (body_hits, article.get('content') or article.get('summary'))
+        ):
+            for keyword in automaton.matches(tokenize(text)):
+                if keyword.get('category') and keyword['category'] != category:
+                    continue
+                keywords[keyword['id']] = keyword
+                hits[keyword['id']] = hits.get(keyword['id'], 0) + 1
+
+        score = sum(
+            (keyword.get('weight') or 1.0) * (
+                TITLE_BOOST * title_hits.get(keyword_id, 0)
+                + min(body_hits.get(keyword_id, 0), MAX_BODY_HITS)
+            )
+            for keyword_id, keyword in keywords.items()
+        )
+        return round(score, 3)
+
+    def rescore(self, keyword: Optional[str] = None, batch_size: int = 500) -> int:
+        """
+        Recompute stored scores after the keywords changed
+
+        With a keyword, only articles whose text mentions it (found through
+        the full-text index) are rescored; without one, every article is.
+
+        Returns:
+            Number of articles whose score changed
+        """
+        if keyword is not None and not tokenize(keyword):
+            return 0
+
+        changed = 0
+        batch: List[Tuple[float, int]] = []
+
+        for article in self.db.iter_articles_for_scoring(keyword):
+            score = self.score(article)
+            if score != article['relevance_score']:
+                batch.append((score, article['id']))
+            if len(batch) >= batch_size:
+                changed += self.db.update_relevance_scores(batch)
+                batch = []
+
+        if batch:
+            changed += self.db.update_relevance_scores(batch)
+
+        logger.info(f"Rescored {changed} articles" + (f" for '{keyword}'" if keyword else ""))
+        return changed
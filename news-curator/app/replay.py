@@ -0,0 +1,160 @@
+"""
+Snapshot replay
+Re-parses stored feed and page bodies into the database without touching the network
+
+    python -m app.replay [--kind feed|page] [--source NAME] [--since DATE] [--update] [--rescore]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .database import Database
+from .feed_fetcher import parse_feed_content
+from .relevance import RelevanceScorer
+from .scraper import parse_article_html
+from .snapshots import SnapshotStore, read_snapshot_file
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Feeds and article pages produce articles; list pages only produce links
+REPLAYABLE_KINDS = ("feed", "page")
+
+
+def parse_snapshot(snapshot: Dict, path: str) -> Tuple[Dict, List[Dict]]:
+    """
+    Parse one stored body into article dicts
+
+    Module-level so it can run in a ProcessPoolExecutor; it only parses,
+    with no HTTP transport or database.
+    """
+    try:
+        body = read_snapshot_file(path)
+
+        if snapshot['kind'] == 'feed':
+            headers = {'content-type': snapshot['content_type']} if snapshot.get('content_type') else None
+            return snapshot, parse_feed_content(
+                body, snapshot['url'], snapshot['source_name'], snapshot.get('category'),
+                response_headers=headers
+            )
+
+        article = parse_article_html(body, snapshot['url'], snapshot['source_name'], snapshot.get('category'))
+        if article is None:
+            return snapshot, []
+        # A page's heading is a poorer title than the feed's or the link text
+        article['title'] = None if article['title'] == 'No Title' else article['title']
+        return snapshot, [article]
+
+    except Exception as e:
+        logger.error(f"Error replaying snapshot {snapshot['digest']} ({snapshot['url']}): {e}")
+        return snapshot, []
+
+
+def replay_snapshots(
+    db: Database,
+    store: SnapshotStore,
+    kind: Optional[str] = None,
+    source_name: Optional[str] = None,
+    since: Optional[str] = None,
+    update: bool = False,
+    rescore: bool = False,
+    workers: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Run stored snapshots back through the parsers and into the database
+
+    Snapshots are parsed in a process pool, one worker per core by default,
+    and ingested in fetch order. The workers are spawned, not forked; still,
+    run this from the command line (python -m app.replay), not inside the
+    web server, which starts it as a child process instead. Articles not yet stored are inserted as
+    on a live fetch; with update=True existing ones are overwritten with
+    the new parse (see Database.refresh_articles). Stored relevance scores
+    are recomputed afterwards when rows were updated or rescore=True.
+
+    Returns:
+        Counts of snapshots, parsed articles, inserted and updated rows
+    """
+    stats = {"snapshots": 0, "missing": 0, "articles": 0, "inserted": 0, "updated": 0, "rescored": 0}
+
+    jobs = []
+    for snapshot in db.iter_snapshots(kind=kind, source_name=source_name, since=since):
+        if snapshot['kind'] not in REPLAYABLE_KINDS or not snapshot.get('source_name'):
+            continue
+        path = store.path(snapshot['digest'])
+        if path is None:
+            stats["missing"] += 1
+            continue
+        jobs.append((snapshot, str(path)))
+
+    if jobs:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        ) as parsers:
+            results = parsers.map(
+                parse_snapshot,
+                [snapshot for snapshot, _ in jobs],
+                [path for _, path in jobs],
+                chunksize=8
+            )
+
+            for snapshot, articles in results:
+                stats["snapshots"] += 1
+                if not articles:
+                    continue
+                stats["articles"] += len(articles)
+
+                new = [dict(article, title=article['title'] or 'No Title') for article in articles]
+                stats["inserted"] += db.add_articles(new)["inserted"]
+                if update:
+                    stats["updated"] += db.refresh_articles(articles)
+
+    if (rescore or stats["updated"]) and db.scorer is not None:
+        stats["rescored"] = db.scorer.rescore()
+
+    logger.info(
+        f"Replayed {stats['snapshots']} snapshots: {stats['articles']} articles, "
+        f"{stats['inserted']} inserted, {stats['updated']} updated, {stats['rescored']} rescored"
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse stored feed and page snapshots")
+    parser.add_argument("--db", default=os.getenv("DATABASE_PATH", "data/news_curator.db"))
+    parser.add_argument("--snapshot-dir", default=os.getenv("SNAPSHOT_DIR", "data/snapshots"))
+    parser.add_argument("--kind", choices=REPLAYABLE_KINDS)
+    parser.add_argument("--source", help="only snapshots of this source name")
+    parser.add_argument("--since", help="only snapshots fetched at or after this time (YYYY-MM-DD[ HH:MM:SS])")
+    parser.add_argument("--update", action="store_true", help="overwrite articles that are already stored (and rescore)")
+    parser.add_argument("--rescore", action="store_true", help="recompute all relevance scores afterwards")
+    parser.add_argument("--workers", type=int, help="parser processes (default: one per core)")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    db.scorer = RelevanceScorer(db)
+    db.scorer.load()
+    store = SnapshotStore(db, args.snapshot_dir)
+
+    try:
+        stats = replay_snapshots(
+            db,
+            store,
+            kind=args.kind,
+            source_name=args.source,
+            since=args.since,
+            update=args.update,
+            rescore=args.rescore,
+            workers=args.workers
+        )
+        print(", ".join(f"{name}: {count}" for name, count in stats.items()))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Retention engine
+Expires old articles in small batches in the background, optionally archiving them
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from .database import Database
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RetentionEngine:
+    """
+    Background cleanup of articles past the retention period
+
+    Articles are removed batch_size at a time, each batch its own short
+    write transaction, with a pause in between so feed ingest (which needs
+    the same write lock) never waits more than one batch. Readers are
+    never blocked (WAL). With archive=True the rows are moved into
+    articles_archive with their body compressed instead of dropped. After
+    deleting, freed pages are handed back to the OS vacuum_pages at a time
+    by incremental vacuum.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        batch_size: int = 500,
+        pause: float = 0.05,
+        archive: bool = False,
+        vacuum_pages: int = 1000
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.pause = pause
+        self.archive = archive
+        self.vacuum_pages = vacuum_pages
+
+        self._lock = threading.Lock()
+        self._progress: Dict = {"state": "idle"}
+
+    @property
+    def running(self) -> bool:
+        return self._progress["state"] == "running"
+
+    def status(self) -> Dict:
+        """Progress of the current (or last) run, plus storage stats"""
+        return {**self._progress, "storage": self.db.get_storage_stats()}
+
+    def start(self, days: int, archive: Optional[bool] = None) -> bool:
+        """
+        Claim the engine for a run (call before running run() elsewhere)
+
+        Returns:
+            False if a run is already in progress
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self._progress = {
+                "state": "running",
+                "phase": "expire",
+                "days": days,
+                "archive": self.archive if archive is None else archive,
+                "started_at": datetime.utcnow().isoformat(timespec='seconds'),
+                "finished_at": None,
+                "candidates": None,
+                "removed": 0,
+                "batches": 0,
+                "freed_pages": 0,
+                "error": None
+            }
+            return True
+
+    def run(self, days: int, archive: Optional[bool] = None) -> Dict:
+        """
+        Expire articles older than days (blocking; call from a worker thread)
+
+        Callers that need to report a conflict up front claim the engine
+        with start() first; run() then continues that claimed run.
+
+        Returns:
+            The final progress dict
+        """
+        if not self.running and not self.start(days, archive):
+            raise RuntimeError("A retention run is already in progress")
+
+        progress = self._progress
+        cutoff = int(time.time()) - days * 86400
+
+        try:
+            progress["candidates"] = self.db.count_expired_articles(cutoff)
+
+            while True:
+                removed = self.db.expire_articles(cutoff, self.batch_size, progress["archive"])
+                if not removed:
+                    break
+                progress["removed"] += removed
+                progress["batches"] += 1
+                time.sleep(self.pause)
+
+            if progress["removed"] and self.db.get_storage_stats()["incremental_vacuum"]:
+                progress["phase"] = "vacuum"
+                while True:
+                    freed = self.db.incremental_vacuum(self.vacuum_pages)
+                    if not freed:
+                        break
+                    progress["freed_pages"] += freed
+                    time.sleep(self.pause)
+
+            progress["state"] = "done"
+            logger.info(
+                f"Retention: {'archived' if progress['archive'] else 'deleted'} "
+                f"{progress['removed']} articles older than {days} days, "
+                f"freed {progress['freed_pages']} pages"
+            )
+
+        except Exception as e:
+            progress["state"] = "failed"
+            progress["error"] = str(e)
+            logger.error(f"Retention run failed: {e}")
+
+        finally:
+            progress["finished_at"] = datetime.utcnow().isoformat(timespec='seconds')
+
+        return progress
@@ -0,0 +1,202 @@
+"""
+Adaptive feed scheduler
+Fetches each source when it is due instead of fetching everything on a fixed timer
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Set, Tuple
+
+from .database import Database
+from .fetch_engine import FetchEngine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FeedScheduler:
+    """
+    In-process scheduler driven by sources.fetch_interval and last_fetched
+
+    Sources sit in a priority queue ordered by their next due time. After
+    each fetch the interval is adapted to how often the feed publishes:
+    several new items means we polled too late and the interval shrinks, no
+    new items means it grows. Failing sources back off exponentially, and a
+    source whose circuit is open (see FetchEngine) isn't due until it closes.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        fetch_engine: FetchEngine,
+        min_interval: int = 300,
+        max_interval: int = 86400,
+        reload_interval: int = 300
+    ):
+        self.db = db
+        self.fetch_engine = fetch_engine
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.reload_interval = reload_interval
+
+        self._queue: List[Tuple[float, int]] = []
+        self._sources: Dict[int, Dict] = {}
+        self._in_flight: Set[int] = set()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._last_reload = 0.0
+
+    def start(self):
+        """Start the scheduler loop on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Feed scheduler started")
+
+    async def stop(self):
+        """Stop the scheduler loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Feed scheduler stopped")
+
+    def reload(self):
+        """Ask the loop to re-read sources (e.g. after one was added)"""
+        self._last_reload = 0.0
+        self._wake.set()
+
+    def status(self) -> List[Dict]:
+        """Queued sources with their next due time, soonest first"""
+        queue = []
+        for due, source_id in sorted(self._queue):
+            source = self._sources.get(source_id)
+            if not source:
+                continue
+            queue.append({
+                'source_id': source_id,
+                'name': source['name'],
+                'fetch_interval': source.get('fetch_interval'),
+                'failures': source.get('consecutive_failures') or 0,
+                'circuit_open_until': source.get('circuit_open_until'),
+                'next_fetch': datetime.fromtimestamp(due, timezone.utc).isoformat()
+            })
+        return queue
+
+    async def _run(self):
+        """Main loop: dispatch due sources, then sleep until the next one"""
+        while True:
+            try:
+                now = time.time()
+
+                if now - self._last_reload >= self.reload_interval:
+                    sources = await asyncio.to_thread(self.db.get_active_sources)
+                    self._sync_sources(sources)
+                    self._last_reload = now
+
+                while self._queue and self._queue[0][0] <= now:
+                    _, source_id = heapq.heappop(self._queue)
+                    source = self._sources.get(source_id)
+                    if not source or source_id in self._in_flight:
+                        continue
+
+                    # Circuit opened since it was queued (e.g. by a manual fetch)
+                    closes_at = self._circuit_closes_at(source)
+                    if closes_at > now:
+                        heapq.heappush(self._queue, (closes_at, source_id))
+                        continue
+
+                    self._in_flight.add(source_id)
+                    asyncio.create_task(self._fetch(source))
+
+                # Sleep until the next source is due or we get woken up
+                next_due = self._queue[0][0] if self._queue else now + self.reload_interval
+                timeout = max(0.0, min(next_due, self._last_reload + self.reload_interval) - time.time())
+
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler error: {e}")
+                await asyncio.sleep(5)
+
+    def _sync_sources(self, active_sources: List[Dict]):
+        """Sync the queue with the active sources in the database"""
+        sources = {source['id']: source for source in active_sources}
+        queued = {source_id for _, source_id in self._queue}
+
+        for source_id, source in sources.items():
+            if source_id not in queued and source_id not in self._in_flight:
+                heapq.heappush(self._queue, (self._initial_due(source), source_id))
+
+        # Drop sources that were deactivated or deleted
+        self._sources = sources
+        self._queue = [(due, sid) for due, sid in self._queue if sid in sources]
+        heapq.heapify(self._queue)
+
+    @classmethod
+    def _initial_due(cls, source: Dict) -> float:
+        """Next due time from last_fetched + fetch_interval, not before an open circuit closes"""
+        due = time.time()
+
+        if source.get('last_fetched'):
+            try:
+                last = datetime.fromisoformat(source['last_fetched']).replace(tzinfo=timezone.utc)
+                due = last.timestamp() + (source.get('fetch_interval') or 3600)
+            except ValueError:
+                pass
+
+        return max(due, cls._circuit_closes_at(source))
+
+    @staticmethod
+    def _circuit_closes_at(source: Dict) -> float:
+        """Timestamp the source's circuit closes (0 if it isn't open)"""
+        open_until = FetchEngine.circuit_open_until(source)
+        return open_until.replace(tzinfo=timezone.utc).timestamp() if open_until else 0.0
+
+    async def _fetch(self, source: Dict):
+        """Fetch one source and schedule its next run"""
+        source_id = source['id']
+        interval = source.get('fetch_interval') or 3600
+
+        try:
+            added = await self.fetch_engine.fetch_source(source, raise_errors=True)
+        except Exception:
+            # fetch_source has recorded the failure on the source dict
+            failures = source.get('consecutive_failures') or 1
+            delay = max(
+                min(self.max_interval, interval * (2 ** failures)),
+                self._circuit_closes_at(source) - time.time()
+            )
+            logger.info(f"{source['name']} failed {failures}x, retrying in {delay:.0f}s")
+        else:
+            new_interval = self._adapt_interval(interval, added)
+            if new_interval != interval:
+                source['fetch_interval'] = new_interval
+                await asyncio.to_thread(self.db.update_source_interval, source_id, new_interval)
+            delay = new_interval
+        finally:
+            self._in_flight.discard(source_id)
+
+        if source_id in self._sources:
+            heapq.heappush(self._queue, (time.time() + delay, source_id))
+            self._wake.set()
+
+    def _adapt_interval(self, interval: int, added: int) -> int:
+        """Shrink the interval for busy feeds, grow it for quiet ones"""
+        if added > 1:
+            interval = interval * 0.75
+        elif added == 0:
+            interval = interval * 1.5
+
+        return int(round(min(self.max_interval, max(self.min_interval, interval))))
@@ -1,92 +1,275 @@
 """
 Web Scraper for non-RSS sources
-Uses BeautifulSoup for HTML parsing
+Uses BeautifulSoup (with the lxml parser) for HTML parsing
 """
 
-import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Iterable, Iterator, Optional
 import logging
+import multiprocessing
+import threading
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 import time
 
+from .transport import Transport
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def parse_article_html(
+    html: bytes,
+    url: str,
+    source_name: str,
+    category: str = None
+) -> Optional[Dict]:
+    """
+    Build an article dict from a downloaded page
+
+    Module-level (not a method) so it can run in WebScraper's parse pool.
+    """
+    try:
+        soup = BeautifulSoup(html, 'lxml')
+
+        # Try to extract title
+        title = WebScraper._extract_title(soup)
+
+        # Try to extract content
+        content = WebScraper._extract_content(soup)
+
+        # Try to extract author
+        author = WebScraper._extract_author(soup)
+
+        # Try to extract published date
+        published_date = WebScraper._extract_date(soup)
+
+        # Try to extract image
+        image_url = WebScraper._extract_image(soup, url)
+
+        # Generate summary
+        summary = content[:500] if content else ""
+
+        return {
+            'url': url,
+            'title': title,
+            'content': content,
+            'summary': summary,
+            'author': author,
+            'source_name': source_name,
+            'category': category,
+            'tags': [],
+            'published_date': published_date,
+            'image_url': image_url,
+            'relevance_score': 0.0
+        }
+
+    except Exception as e:
+        logger.error(f"Error extracting article from {url}: {e}")
+        return None
+
+
+def parse_list_html(
+    html: bytes,
+    url: str,
+    source_name: str,
+    category: str = None
+) -> List[Dict]:
+    """Find links to same-site articles on a downloaded list/index page"""
+    soup = BeautifulSoup(html, 'lxml')
+    articles = []
+
+    # Find all links
+    links = soup.find_all('a', href=True)
+
+    for link in links:
+        href = link['href']
+
+        # Skip navigation, social, etc.
+        if any(skip in href.lower() for skip in ['#', 'mailto:', 'javascript:', 'twitter.com', 'facebook.com']):
+            continue
+
+        # Make absolute URL
+        full_url = urljoin(url, href)
+
+        # Basic filter: only links from same domain
+        if urlparse(full_url).netloc != urlparse(url).netloc:
+            continue
+
+        # Try to extract title from link
+        title = link.get_text(strip=True)
+        if not title or len(title) < 10:
+            continue
+
+        articles.append({
+            'url': full_url,
+            'title': title,
+            'source_name': source_name,
+            'category': category
+        })
+
+    logger.info(f"Found {len(articles)} potential articles from {url}")
+    return articles
+
+
 class WebScraper:
     """General-purpose web scraper"""
 
-    def __init__(self, timeout: int = 30, user_agent: str = None):
+    def __init__(
+        self,
+        timeout: int = 30,
+        user_agent: str = None,
+        max_connections: int = 10,
+        transport: Optional[Transport] = None,
+        snapshots=None,
+        parse_workers: Optional[int] = None
+    ):
         self.timeout = timeout
         self.user_agent = user_agent or (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
             "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         )
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": self.user_agent})
 
-    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
-        """Fetch and parse HTML page"""
+        # Pooled, rate-limited HTTP (shared with the feed fetcher when passed in)
+        self.transport = transport or Transport(
+            self.user_agent, timeout=timeout, max_connections=max_connections
+        )
+        self.max_connections = self.transport.max_connections
+        self.session = self.transport.session
+
+        # Optional SnapshotStore: raw pages are kept for replay
+        self.snapshots = snapshots
+
+        # HTML parsing runs in one long-lived process pool (one worker per
+        # core by default), started on first use. Workers are spawned, not
+        # forked, so they don't inherit the server's locks and connections.
+        self.parse_workers = parse_workers
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def parse_article(
+        self,
+        content: bytes,
+        url: str,
+        source_name: str,
+        category: str = None
+    ) -> Future:
+        """Parse a downloaded article page in the parse pool"""
+        with self._pool_lock:
+            if self._parse_pool is None:
+                self._parse_pool = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._parse_pool.submit(parse_article_html, content, url, source_name, category)
+
+    def close(self):
+        """Stop the parse pool"""
+        with self._pool_lock:
+            pool, self._parse_pool = self._parse_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def download(
+        self,
+        url: str,
+        source_name: str = None,
+        category: str = None,
+        kind: str = 'page'
+    ) -> Optional[bytes]:
+        """
+        Download a page body
+
+        source_name, category and kind ('page' for articles, 'list' for
+        index pages) are only recorded with the snapshot, if enabled.
+        """
         try:
-            response = self.session.get(url, timeout=self.timeout)
+            response = self.transport.get(
+                url,
+                headers={"User-Agent": self.user_agent},
+                timeout=self.timeout
+            )
             response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
         except Exception as e:
             logger.error(f"Error fetching {url}: {e}")
             return None
 
+        if self.snapshots is not None:
+            self.snapshots.put(
+                url,
+                response.content,
+                kind,
+                source_name=source_name,
+                category=category,
+                content_type=response.headers.get('content-type')
+            )
+        return response.content
+
+    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+        """Fetch and parse HTML page"""
+        content = self.download(url)
+        if content is None:
+            return None
+        return BeautifulSoup(content, 'lxml')
+
     def extract_article(self, url: str, source_name: str, category: str = None) -> Optional[Dict]:
         """
         Extract article from URL
 
         This is a generic extractor. For better results, use source-specific parsers.
         """
-        soup = self.fetch_page(url)
-        if not soup:
+        content = self.download(url, source_name, category)
+        if content is None:
             return None
 
-        try:
-            # Try to extract title
-            title = self._extract_title(soup)
-
-            # Try to extract content
-            content = self._extract_content(soup)
-
-            # Try to extract author
-            author = self._extract_author(soup)
-
-            # Try to extract published date
-            published_date = self._extract_date(soup)
-
-            # Try to extract image
-            image_url = self._extract_image(soup, url)
+        return self.parse_article(content, url, source_name, category).result()
 
-            # Generate summary
-            summary = content[:500] if content else ""
+    def extract_articles(
+        self,
+        urls: Iterable[str],
+        source_name: str,
+        category: str = None
+    ) -> Iterator[Dict]:
+        """
+        Extract many articles, yielding each one as soon as it is ready
 
-            article = {
-                'url': url,
-                'title': title,
-                'content': content,
-                'summary': summary,
-                'author': author,
-                'source_name': source_name,
-                'category': category,
-                'tags': [],
-                'published_date': published_date,
-                'image_url': image_url,
-                'relevance_score': 0.0
+        Pages download concurrently over the shared transport (up to
+        max_connections at once, within each host's rate limit) and are
+        parsed in the scraper's process pool as they arrive. Pages that
+        fail to download or parse are skipped.
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_connections, len(urls)),
+            thread_name_prefix="scrape-download"
+        ) as downloads:
+            pending = {
+                downloads.submit(self.download, url, source_name, category): url
+                for url in urls
             }
+            parsing = set()
 
-            return article
+            for future in as_completed(pending):
+                content = future.result()
+                if content is not None:
+                    parsing.add(self.parse_article(content, pending[future], source_name, category))
 
-        except Exception as e:
-            logger.error(f"Error extracting article from {url}: {e}")
-            return None
+                # Hand back whatever has finished parsing in the meantime
+                for done in [job for job in parsing if job.done()]:
+                    parsing.discard(done)
+                    if done.result():
+                        yield done.result()
+
+            for done in as_completed(parsing):
+                if done.result():
+                    yield done.result()
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
+    @staticmethod
+    def _extract_title(soup: BeautifulSoup) -> str:
         """Extract title from page"""
         # Try different selectors
         selectors = [
@@ -107,7 +290,8 @@ class WebScraper:
 
         return "No Title"
 
-    def _extract_content(self, soup: BeautifulSoup) -> str:
+    @staticmethod
+    def _extract_content(soup: BeautifulSoup) -> str:
         """Extract main content from page"""
         # Try different content selectors
         selectors = [
@@ -131,7 +315,8 @@ class WebScraper:
         paragraphs = soup.find_all('p')
         return '\n'.join([p.get_text(strip=True) for p in paragraphs])
 
-    def _extract_author(self, soup: BeautifulSoup) -> Optional[str]:
+    @staticmethod
+    def _extract_author(soup: BeautifulSoup) -> Optional[str]:
         """Extract author from page"""
         # Try meta tags first
         meta_selectors = [
@@ -160,7 +345,8 @@ class WebScraper:
 
         return None
 
-    def _extract_date(self, soup: BeautifulSoup) -> Optional[str]:
+    @staticmethod
+    def _extract_date(soup: BeautifulSoup) -> Optional[str]:
         """Extract published date from page"""
         # Try meta tags
         meta_selectors = [
@@ -181,7 +367,8 @@ class WebScraper:
 
         return None
 
-    def _extract_image(self, soup: BeautifulSoup, base_url: str) -> Optional[str]:
+    @staticmethod
+    def _extract_image(soup: BeautifulSoup, base_url: str) -> Optional[str]:
         """Extract main image from page"""
         # Try meta tags
         meta_selectors = [
@@ -215,43 +402,11 @@ class WebScraper:
 
         Returns list of article URLs with metadata
         """
-        soup = self.fetch_page(url)
-        if not soup:
+        content = self.download(url, source_name, category, kind='list')
+        if content is None:
             return []
 
-        articles = []
-
-        # Find all links
-        links = soup.find_all('a', href=True)
-
-        for link in links:
-            href = link['href']
-
-            # Skip navigation, social, etc.
-            if any(skip in href.lower() for skip in ['#', 'mailto:', 'javascript:', 'twitter.com', 'facebook.com']):
-                continue
-
-            # Make absolute URL
-            full_url = urljoin(url, href)
-
-            # Basic filter: only links from same domain
-            if urlparse(full_url).netloc != urlparse(url).netloc:
-                continue
-
-            # Try to extract title from link
-            title = link.get_text(strip=True)
-            if not title or len(title) < 10:
-                continue
-
-            articles.append({
-                'url': full_url,
-                'title': title,
-                'source_name': source_name,
-                'category': category
-            })
-
-        logger.info(f"Found {len(articles)} potential articles from {url}")
-        return articles
+        return parse_list_html(content, url, source_name, category)
 
 
 class NewspaperExtractor:
@@ -0,0 +1,194 @@
+"""
+Raw snapshot store
+Keeps the downloaded bytes of feeds and pages on disk so they can be re-parsed later
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# zstd compresses markup better and faster than gzip, but is an optional install
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXTENSIONS = (".zst", ".gz")
+
+
+def read_snapshot_file(path: str) -> bytes:
+    """Decompress a snapshot file (module-level so replay workers can use it)"""
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed but zstandard is not installed")
+        with open(path, "rb") as f:
+            return zstandard.ZstdDecompressor().stream_reader(f).read()
+
+    with gzip.open(path, "rb") as f:
+        return f.read()
+
+
+class SnapshotWriter:
+    """
+    Compresses one body to a temporary file as it arrives
+
+    commit() moves it to its content address once the whole body has been
+    written; discard() drops it (e.g. a streamed feed that stopped early).
+    """
+
+    def __init__(self, store: "SnapshotStore", url: str, kind: str, **meta):
+        self.store = store
+        self.snapshot = {"url": url, "kind": kind, **meta}
+        self.size = 0
+        self._digest = hashlib.sha256()
+
+        fd, self._tmp_path = tempfile.mkstemp(dir=store.directory, suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+        if store.codec == "zstd":
+            self._stream = zstandard.ZstdCompressor(level=store.level).stream_writer(
+                self._file, closefd=False
+            )
+        else:
+            self._stream = gzip.GzipFile(
+                fileobj=self._file, mode="wb", compresslevel=store.level, mtime=0
+            )
+
+    def write(self, chunk: bytes):
+        self._digest.update(chunk)
+        self._stream.write(chunk)
+        self.size += len(chunk)
+
+    def _close(self):
+        if not self._file.closed:
+            self._stream.close()
+            self._file.close()
+
+    def commit(self) -> Optional[str]:
+        """Store the body, returns its digest"""
+        try:
+            self._close()
+            digest = self._digest.hexdigest()
+            self.store._add(digest, self._tmp_path, dict(self.snapshot, size=self.size))
+            return digest
+        except Exception as e:
+            logger.error(f"Error storing snapshot of {self.snapshot['url']}: {e}")
+            self.discard()
+            return None
+
+    def discard(self):
+        self._close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class SnapshotStore:
+    """
+    Content-addressed store of raw response bodies
+
+    Each body is saved once under its SHA-256 (directory/ab/abcd....zst,
+    or .gz when zstandard isn't installed) and indexed in the snapshots
+    table with the URL, source and time it was last fetched. Fetching an
+    unchanged body again only refreshes the index row. Once the files
+    exceed max_bytes, the least recently fetched snapshots are evicted.
+    """
+
+    def __init__(self, db, directory: str, max_bytes: int = 512 * 1024 * 1024, level: Optional[int] = None):
+        self.db = db
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.codec = "zstd" if zstandard is not None else "gzip"
+        self.level = level if level is not None else (10 if self.codec == "zstd" else 6)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stored_bytes: Optional[int] = None
+
+    def path(self, digest: str) -> Optional[Path]:
+        """Where a snapshot's file is, None if it isn't stored"""
+        for extension in EXTENSIONS:
+            path = self.directory / digest[:2] / (digest + extension)
+            if path.exists():
+                return path
+        return None
+
+    def writer(self, url: str, kind: str = "feed", **meta) -> SnapshotWriter:
+        """Start writing a body that arrives in chunks"""
+        return SnapshotWriter(self, url, kind, **meta)
+
+    def put(self, url: str, body: bytes, kind: str = "feed", **meta) -> Optional[str]:
+        """Store a complete body, returns its digest"""
+        writer = self.writer(url, kind, **meta)
+        writer.write(body)
+        return writer.commit()
+
+    def read(self, digest: str) -> Optional[bytes]:
+        """The original bytes of a snapshot"""
+        path = self.path(digest)
+        if path is None:
+            return None
+        return read_snapshot_file(str(path))
+
+    def usage(self) -> Dict:
+        """Counts for the API"""
+        return {
+            **self.db.get_snapshot_usage(),
+            "codec": self.codec,
+            "max_bytes": self.max_bytes
+        }
+
+    def _add(self, digest: str, tmp_path: str, snapshot: Dict):
+        """Move a finished file to its address, index it and evict if over budget"""
+        stored = self.path(digest)
+        if stored is not None:
+            os.remove(tmp_path)
+            stored_size = stored.stat().st_size
+            added = 0
+        else:
+            extension = ".zst" if self.codec == "zstd" else ".gz"
+            target = self.directory / digest[:2] / (digest + extension)
+            target.parent.mkdir(exist_ok=True)
+            os.replace(tmp_path, target)
+            stored_size = added = target.stat().st_size
+
+        self.db.record_snapshot(dict(snapshot, digest=digest, stored_size=stored_size))
+
+        with self._lock:
+            if self._stored_bytes is None:
+                self._stored_bytes = self.db.get_snapshot_usage()["stored_bytes"]
+            else:
+                self._stored_bytes += added
+
+            if self._stored_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently fetched snapshots until back under max_bytes (lock held)"""
+        evicted = 0
+        while self._stored_bytes > self.max_bytes:
+            oldest = self.db.get_oldest_snapshots()
+            if not oldest:
+                self._stored_bytes = 0
+                break
+
+            dropped = []
+            for snapshot in oldest:
+                if self._stored_bytes <= self.max_bytes:
+                    break
+                path = self.path(snapshot["digest"])
+                if path is not None:
+                    path.unlink()
+                self._stored_bytes -= snapshot["stored_size"]
+                dropped.append(snapshot["id"])
+
+            self.db.delete_snapshots(dropped)
+            evicted += len(dropped)
+
+        logger.info(f"Evicted {evicted} snapshots, {self._stored_bytes} bytes stored")
@@ -0,0 +1,438 @@
+"""
+Shared HTTP transport
+Pooled keep-alive connections, per-host rate limits and DNS caching for every outgoing request
+"""
+
+import asyncio
+import contextlib
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import httpcore
+import httpx
+import requests
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Both requests (urllib3) and httpx decode brotli only when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter
+
+    Allows bursts of up to `burst` requests, refilled at `rate` per second.
+    reserve() takes a token and says how long to wait before using it, so
+    callers can sleep outside the lock (time.sleep or asyncio.sleep).
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, returns seconds to wait before it is valid"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class DNSCache:
+    """
+    Bounded cache of resolved host addresses for the Transport's clients
+
+    Every fetch to the same host would otherwise resolve it again. Lookups
+    are kept for ttl seconds, failed ones for negative_ttl seconds (so a
+    dead host isn't resolved again for every queued page), and at most
+    max_entries hosts are kept, least recently used first out. Only
+    connections opened by a Transport use it; socket.getaddrinfo is left
+    alone for the rest of the process.
+    """
+
+    def __init__(self, ttl: float = 300, negative_ttl: float = 30, max_entries: int = 1024):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # (host, port) -> (expires, addresses or the lookup error)
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, Union[List[str], OSError]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key: Tuple[str, int]) -> Optional[List[str]]:
+        """Addresses for a fresh entry (raises a cached failure), None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        if isinstance(entry[1], OSError):
+            raise entry[1]
+        return entry[1]
+
+    def _store(self, key: Tuple[str, int], result: Union[List[str], OSError]):
+        """Remember a lookup result, evicting the least recently used host if full"""
+        ttl = self.negative_ttl if isinstance(result, OSError) else self.ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _addresses(infos: list) -> List[str]:
+        """Unique addresses from getaddrinfo results, in resolver order"""
+        return list(dict.fromkeys(info[4][0] for info in infos))
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """Addresses for host (blocking)"""
+        key = (host, port)
+        addresses = self._cached(key)
+        if addresses is not None:
+            return addresses
+
+        try:
+            addresses = self._addresses(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+        except OSError as e:
+            self._store(key, e)
+            raise
+        self._store(key, addresses)
+        return addresses
+
+    async def resolve_async(self, host: str, port: int) -> List[str]:
+        """Event-loop version of resolve()"""
+        key = (host, port)
+        addresses = self._cached(key)
+        if addresses is not None:
+            return addresses
+
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError as e:
+            self._store(key, e)
+            raise
+        addresses = self._addresses(infos)
+        self._store(key, addresses)
+        return addresses
+
+    def forget(self, host: str, port: int):
+        """Drop a host, e.g. when none of its cached addresses accept connections"""
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+class _CachedDNSConnection:
+    """
+    urllib3 connection mixin that connects to the DNSCache's addresses
+
+    Only the TCP connect uses the address; TLS (SNI, certificate checks)
+    and the Host header still use the hostname.
+    """
+
+    dns_cache: DNSCache
+
+    def _new_conn(self):
+        host = self._dns_host
+        try:
+            addresses = self.dns_cache.resolve(host, self.port)
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to resolve {host}: {e}") from e
+
+        error = None
+        for address in addresses:
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except (ConnectTimeoutError, NewConnectionError, OSError) as e:
+                error = e
+            finally:
+                self._dns_host = host
+
+        # The host may have moved; look it up again next time
+        self.dns_cache.forget(host, self.port)
+        raise error
+
+
+class _CachedDNSAdapter(requests.adapters.HTTPAdapter):
+    """requests adapter whose connection pools resolve hosts through a DNSCache"""
+
+    def __init__(self, dns_cache: DNSCache, **kwargs):
+        # Set first: HTTPAdapter.__init__ calls init_poolmanager()
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        http = type("CachedDNSHTTPConnection", (_CachedDNSConnection, HTTPConnection), {"dns_cache": self.dns_cache})
+        https = type("CachedDNSHTTPSConnection", (_CachedDNSConnection, HTTPSConnection), {"dns_cache": self.dns_cache})
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("CachedDNSHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http}),
+            "https": type("CachedDNSHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": https})
+        }
+
+
+class _CachedDNSBackend(httpcore.AsyncNetworkBackend):
+    """httpcore network backend that connects to the DNSCache's addresses"""
+
+    def __init__(self, dns_cache: DNSCache):
+        self.dns_cache = dns_cache
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = await self.dns_cache.resolve_async(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(f"Failed to resolve {host}: {e}") from e
+
+        error = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout,
+                    local_address=local_address, socket_options=socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout, OSError) as e:
+                error = e
+
+        # The host may have moved; look it up again next time
+        self.dns_cache.forget(host, port)
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+# httpcore errors and the httpx errors AsyncClient callers expect (as httpx maps them)
+HTTPCORE_ERRORS = {
+    httpcore.TimeoutException: httpx.TimeoutException,
+    httpcore.ConnectTimeout: httpx.ConnectTimeout,
+    httpcore.ReadTimeout: httpx.ReadTimeout,
+    httpcore.WriteTimeout: httpx.WriteTimeout,
+    httpcore.PoolTimeout: httpx.PoolTimeout,
+    httpcore.NetworkError: httpx.NetworkError,
+    httpcore.ConnectError: httpx.ConnectError,
+    httpcore.ReadError: httpx.ReadError,
+    httpcore.WriteError: httpx.WriteError,
+    httpcore.ProxyError: httpx.ProxyError,
+    httpcore.UnsupportedProtocol: httpx.UnsupportedProtocol,
+    httpcore.ProtocolError: httpx.ProtocolError,
+    httpcore.LocalProtocolError: httpx.LocalProtocolError,
+    httpcore.RemoteProtocolError: httpx.RemoteProtocolError,
+}
+
+
+@contextlib.contextmanager
+def _httpx_errors():
+    """Re-raise an httpcore error as the most specific matching httpx error"""
+    try:
+        yield
+    except Exception as e:
+        mapped = None
+        for core_error, httpx_error in HTTPCORE_ERRORS.items():
+            if isinstance(e, core_error) and (mapped is None or issubclass(httpx_error, mapped)):
+                mapped = httpx_error
+        if mapped is None:
+            raise
+        raise mapped(str(e)) from e
+
+
+class _CachedDNSResponseStream(httpx.AsyncByteStream):
+    """Response body of an httpcore response, with its errors mapped to httpx's"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_errors():
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self):
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class _CachedDNSAsyncTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport over an httpcore pool that resolves hosts through a DNSCache
+
+    httpx.AsyncHTTPTransport doesn't take a network backend, so this builds
+    the pool itself (with the same limits, HTTP/2 and retry options) and
+    converts requests, responses and errors the way httpx's transport does.
+    """
+
+    def __init__(
+        self,
+        dns_cache: DNSCache,
+        limits: httpx.Limits,
+        http2: bool = False,
+        retries: int = 0
+    ):
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            retries=retries,
+            network_backend=_CachedDNSBackend(dns_cache)
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions
+        )
+        with _httpx_errors():
+            response = await self._pool.handle_async_request(core_request)
+
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_CachedDNSResponseStream(response.stream),
+            extensions=response.extensions
+        )
+
+    async def aclose(self):
+        await self._pool.aclose()
+
+
+class Transport:
+    """
+    HTTP plumbing shared by FeedFetcher, WebScraper and FetchEngine
+
+    One pooled requests.Session for blocking code and one httpx.AsyncClient
+    for the event loop, both keeping connections alive and negotiating
+    gzip/brotli. Every request first takes a token from its host's bucket,
+    so different hosts are fetched in parallel while each single host sees
+    at most per_host_rate requests per second (after a burst of
+    per_host_burst). Both clients resolve hosts through one DNSCache.
+    """
+
+    def __init__(
+        self,
+        user_agent: str,
+        timeout: float = 30,
+        max_connections: int = 20,
+        per_host_rate: float = 2.0,
+        per_host_burst: int = 5,
+        dns_ttl: float = 300,
+        dns_max_entries: int = 1024
+    ):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.per_host_rate = per_host_rate
+        self.per_host_burst = per_host_burst
+
+        self.dns_cache = DNSCache(dns_ttl, max_entries=dns_max_entries)
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": user_agent,
+            "Accept-Encoding": ACCEPT_ENCODING
+        })
+        adapter = _CachedDNSAdapter(
+            self.dns_cache,
+            pool_connections=max_connections,
+            pool_maxsize=max_connections
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url: str) -> TokenBucket:
+        """Get (or create) the rate limiter for a URL's host"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.per_host_rate, self.per_host_burst)
+            return self._buckets[host]
+
+    def throttle(self, url: str):
+        """Block until the host's rate limit allows another request"""
+        delay = self._bucket(url).reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def throttle_async(self, url: str):
+        """Event-loop version of throttle()"""
+        delay = self._bucket(url).reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Rate-limited GET over the pooled session"""
+        self.throttle(url)
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Shared async client (created lazily inside the running loop)"""
+        if self._async_client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            )
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={
+                    "User-Agent": self.user_agent,
+                    "Accept-Encoding": ACCEPT_ENCODING
+                },
+                transport=_CachedDNSAsyncTransport(self.dns_cache, limits)
+            )
+        return self._async_client
+
+    async def aclose(self):
+        """Close both clients"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.session.close()
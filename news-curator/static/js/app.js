@@ -4,56 +4,93 @@
  */
 
 // State
-let currentPage = 1;
+const PAGE_SIZE = 50;
+let nextCursor = null;
+let isLoading = false;
+let currentRequest = null;
 let currentFilters = {
     category: '',
     source: '',
     unread: false,
     starred: false,
-    search: ''
+    search: '',
+    sort: 'date'
 };
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
+    setupInfiniteScroll();
     loadArticles();
     loadSources();
 });
 
-// Load articles with current filters
-async function loadArticles(page = 1) {
-    currentPage = page;
-    const limit = 50;
-    const offset = (page - 1) * limit;
+// Load articles with current filters (append = load the next page)
+async function loadArticles(append = false) {
+    if (append && (isLoading || !nextCursor)) {
+        return;
+    }
+
+    // A new query replaces whatever is in flight (e.g. a page being appended
+    // for the old filters), so its results can't land on top of the new list
+    if (currentRequest) {
+        currentRequest.abort();
+    }
+    const request = new AbortController();
+    currentRequest = request;
+    isLoading = true;
 
     try {
         const params = new URLSearchParams({
-            limit,
-            offset,
+            limit: PAGE_SIZE,
             ...currentFilters
         });
+        if (append) {
+            params.set('cursor', nextCursor);
+        }
 
-        const response = await fetch(`/api/articles?${params}`);
+        const response = await fetch(`/api/articles?${params}`, { signal: request.signal });
         const data = await response.json();
+        if (request.signal.aborted) {
+            return;
+        }
 
-        renderArticles(data.articles);
-        renderPagination(data.count, limit, page);
+        nextCursor = data.next_cursor;
+        renderArticles(data.articles, append);
+        updateScrollStatus();
     } catch (error) {
+        if (error.name === 'AbortError') {
+            return;
+        }
         console.error('Error loading articles:', error);
         showError('Failed to load articles');
+    } finally {
+        if (currentRequest === request) {
+            currentRequest = null;
+            isLoading = false;
+        }
     }
 }
 
 // Render articles list
-function renderArticles(articles) {
+function renderArticles(articles, append = false) {
     const container = document.getElementById('articlesList');
 
-    if (!articles || articles.length === 0) {
+    if (!append && (!articles || articles.length === 0)) {
         container.innerHTML = '<div class="loading">No articles found</div>';
         return;
     }
 
-    container.innerHTML = articles.map(article => `
-        <div class="article-card ${article.is_read ? '' : 'unread'}">
+    const html = articles.map(renderArticleCard).join('');
+    if (append) {
+        container.insertAdjacentHTML('beforeend', html);
+    } else {
+        container.innerHTML = html;
+    }
+}
+
+function renderArticleCard(article) {
+    return `
+        <div class="article-card ${article.is_read ? '' : 'unread'}" data-id="${article.id}">
             <div class="article-card-header">
                 <h3 class="article-card-title" onclick="openArticle(${article.id})">
                     ${escapeHtml(article.title)}
@@ -79,12 +116,14 @@ function renderArticles(articles) {
                 ` : ''}
             </div>
 
-            ${article.summary ? `
+            ${article.snippet ? `
+                <p class="article-excerpt">${highlightSnippet(article.snippet)}</p>
+            ` : article.summary ? `
                 <p class="article-excerpt">${escapeHtml(article.summary.substring(0, 200))}...</p>
             ` : ''}
 
             <div class="article-actions">
-                <button onclick="toggleStar(${article.id})" class="btn btn-secondary">
+                <button onclick="toggleStar(${article.id})" class="btn btn-secondary star-btn">
                     ${article.is_starred ? '★' : '☆'} Star
                 </button>
                 <button onclick="markAsRead(${article.id})" class="btn btn-secondary">
@@ -95,48 +134,24 @@ function renderArticles(articles) {
                 </a>
             </div>
         </div>
-    `).join('');
-}
-
-// Render pagination
-function renderPagination(totalCount, limit, currentPage) {
-    const totalPages = Math.ceil(totalCount / limit);
-    const container = document.getElementById('pagination');
-
-    if (totalPages <= 1) {
-        container.innerHTML = '';
-        return;
-    }
-
-    let html = `
-        <button onclick="loadArticles(${currentPage - 1})" ${currentPage === 1 ? 'disabled' : ''}>
-            ← Prev
-        </button>
     `;
+}
 
-    for (let i = 1; i <= totalPages; i++) {
-        if (
-            i === 1 ||
-            i === totalPages ||
-            (i >= currentPage - 2 && i <= currentPage + 2)
-        ) {
-            html += `
-                <button onclick="loadArticles(${i})" class="${i === currentPage ? 'active' : ''}">
-                    ${i}
-                </button>
-            `;
-        } else if (i === currentPage - 3 || i === currentPage + 3) {
-            html += '<span>...</span>';
+// Infinite scroll: load the next page when the bottom comes into view
+function setupInfiniteScroll() {
+    const sentinel = document.getElementById('pagination');
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadArticles(true);
         }
-    }
+    }, { rootMargin: '400px' });
 
-    html += `
-        <button onclick="loadArticles(${currentPage + 1})" ${currentPage === totalPages ? 'disabled' : ''}>
-            Next →
-        </button>
-    `;
+    observer.observe(sentinel);
+}
 
-    container.innerHTML = html;
+function updateScrollStatus() {
+    const container = document.getElementById('pagination');
+    container.innerHTML = nextCursor ? '<div class="loading">Loading more...</div>' : '';
 }
 
 // Apply filters
@@ -145,8 +160,9 @@ function applyFilters() {
     currentFilters.source = document.getElementById('sourceFilter').value;
     currentFilters.unread = document.getElementById('unreadFilter').checked;
     currentFilters.starred = document.getElementById('starredFilter').checked;
+    currentFilters.sort = document.getElementById('sortOrder').value;
 
-    loadArticles(1);
+    loadArticles();
 }
 
 // Handle search with debounce
@@ -155,7 +171,7 @@ function handleSearch() {
     clearTimeout(searchTimeout);
     searchTimeout = setTimeout(() => {
         currentFilters.search = document.getElementById('searchInput').value;
-        loadArticles(1);
+        loadArticles();
     }, 500);
 }
 
@@ -164,11 +180,21 @@ function openArticle(articleId) {
     window.location.href = `/article/${articleId}`;
 }
 
-// Toggle star
+// Find a rendered article card
+function articleCard(articleId) {
+    return document.querySelector(`.article-card[data-id="${articleId}"]`);
+}
+
+// Toggle star (updated in place so the scroll position is kept)
 async function toggleStar(articleId) {
     try {
-        await fetch(`/api/article/${articleId}/star`, { method: 'POST' });
-        loadArticles(currentPage);
+        const response = await fetch(`/api/article/${articleId}/star`, { method: 'POST' });
+        const data = await response.json();
+
+        const card = articleCard(articleId);
+        if (card) {
+            card.querySelector('.star-btn').textContent = `${data.is_starred ? '★' : '☆'} Star`;
+        }
     } catch (error) {
         console.error('Error toggling star:', error);
     }
@@ -178,12 +204,42 @@ async function toggleStar(articleId) {
 async function markAsRead(articleId) {
     try {
         await fetch(`/api/article/${articleId}/read`, { method: 'POST' });
-        loadArticles(currentPage);
+
+        const card = articleCard(articleId);
+        if (card) {
+            card.classList.remove('unread');
+        }
     } catch (error) {
         console.error('Error marking as read:', error);
     }
 }
 
+// Mark everything matching the current filters as read (one request)
+async function markAllRead() {
+    try {
+        const params = new URLSearchParams();
+        for (const name of ['category', 'source', 'starred', 'search']) {
+            if (currentFilters[name]) {
+                params.set(name, currentFilters[name]);
+            }
+        }
+
+        const response = await fetch(`/api/articles/read?${params}`, { method: 'POST' });
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+
+        if (currentFilters.unread) {
+            loadArticles();
+        } else {
+            document.querySelectorAll('.article-card.unread').forEach(card => card.classList.remove('unread'));
+        }
+    } catch (error) {
+        console.error('Error marking all as read:', error);
+        alert('Failed to mark articles as read');
+    }
+}
+
 // Fetch feeds
 async function fetchFeeds() {
     try {
@@ -243,6 +299,7 @@ async function loadSourcesSettings() {
                 </div>
                 <div>
                     ${source.is_active ? '✓ Active' : '✗ Inactive'}
+                    ${sourceHealth(source)}
                 </div>
             </div>
         `).join('');
@@ -251,16 +308,32 @@ async function loadSourcesSettings() {
     }
 }
 
+// Circuit breaker / failure state of a source
+function sourceHealth(source) {
+    if (source.circuit_open_until) {
+        return `<br><small title="${escapeHtml(source.last_error || '')}">⚠ Paused until ${escapeHtml(source.circuit_open_until)} UTC</small>`;
+    }
+    if (source.consecutive_failures) {
+        return `<br><small title="${escapeHtml(source.last_error || '')}">⚠ ${source.consecutive_failures} failed fetch(es)</small>`;
+    }
+    if (source.avg_latency_ms) {
+        return `<br><small>${Math.round(source.avg_latency_ms)} ms</small>`;
+    }
+    return '';
+}
+
 // Add new source
 async function addSource(event) {
     event.preventDefault();
 
+    const feedUrl = document.getElementById('sourceFeedUrl').value;
     const source = {
         name: document.getElementById('sourceName').value,
         url: document.getElementById('sourceUrl').value,
-        feed_url: document.getElementById('sourceFeedUrl').value,
+        feed_url: feedUrl || null,
         category: document.getElementById('sourceCategory').value,
-        source_type: 'rss',
+        // Sites without a feed are crawled from their URL
+        source_type: feedUrl ? 'rss' : 'scrape',
         is_active: 1
     };
 
@@ -295,15 +368,45 @@ async function cleanupOldArticles() {
         const response = await fetch('/api/articles/cleanup?days=30', {
             method: 'DELETE'
         });
-        const data = await response.json();
-        alert(`Deleted ${data.deleted} old articles`);
-        loadArticles(1);
+        if (!response.ok && response.status !== 409) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        // Runs in background batches; follow its progress
+        pollCleanup();
     } catch (error) {
         console.error('Error cleaning up:', error);
         alert('Failed to cleanup articles');
     }
 }
 
+async function pollCleanup() {
+    const status = document.getElementById('cleanupStatus');
+
+    try {
+        const response = await fetch('/api/retention');
+        const data = await response.json();
+
+        if (data.state === 'running') {
+            const total = data.candidates != null ? ` of ${data.candidates}` : '';
+            status.textContent = data.phase === 'vacuum'
+                ? `Removed ${data.removed} articles, compacting database...`
+                : `Removing old articles: ${data.removed}${total}...`;
+            setTimeout(pollCleanup, 1000);
+            return;
+        }
+
+        if (data.state === 'failed') {
+            status.textContent = `Cleanup failed: ${data.error}`;
+            return;
+        }
+
+        status.textContent = `${data.archive ? 'Archived' : 'Deleted'} ${data.removed} old articles`;
+        loadArticles();
+    } catch (error) {
+        console.error('Error checking cleanup:', error);
+    }
+}
+
 // Utility functions
 function escapeHtml(text) {
     const map = {
@@ -316,6 +419,13 @@ function escapeHtml(text) {
     return String(text).replace(/[&<>"']/g, m => map[m]);
 }
 
+// Escape a search snippet but keep the <mark> highlights from the server
+function highlightSnippet(snippet) {
+    return escapeHtml(snippet)
+        .replace(/&lt;mark&gt;/g, '<mark>')
+        .replace(/&lt;\/mark&gt;/g, '</mark>');
+}
+
 function formatDate(dateString) {
     const date = new Date(dateString);
     return date.toLocaleDateString('en-US', {
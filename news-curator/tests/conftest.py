@@ -0,0 +1,101 @@
+"""Shared fixtures: a throwaway database, article dicts and feed bodies"""
+
+import hashlib
+import random
+import sqlite3
+
+import httpx
+import pytest
+
+from app.database import Database
+from app.feed_fetcher import FeedFetcher
+from app.transport import Transport
+
+WORDS = (
+    "market energy vote court storm launch study trade virus rocket bank "
+    "climate budget league strike border album patent rally drought"
+).split()
+
+
+def make_article(n: int, **fields) -> dict:
+    """An article dict with a unique URL and a body unlike any other's"""
+    rng = random.Random(n)
+    article = {
+        'url': f"https://example.com/story/{n}",
+        'title': f"Story number {n}",
+        'content': " ".join(rng.choice(WORDS) for _ in range(60)),
+        'source_name': "Example",
+        'category': "tech",
+        'published_date': f"2024-03-{n % 28 + 1:02d}T10:00:00Z"
+    }
+    article.update(fields)
+    return article
+
+
+def make_legacy_db(path: str, articles) -> str:
+    """
+    A database file in the first release's schema: plain bodies inline in
+    articles, url_hash over the raw URL, free-text dates, no indexes of ours
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT UNIQUE NOT NULL,
+            url_hash TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            content TEXT,
+            summary TEXT,
+            author TEXT,
+            source_name TEXT NOT NULL,
+            category TEXT,
+            tags TEXT,
+            published_date TIMESTAMP,
+            scraped_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_read INTEGER DEFAULT 0,
+            is_starred INTEGER DEFAULT 0,
+            relevance_score REAL DEFAULT 0.0,
+            image_url TEXT,
+            UNIQUE(url_hash)
+        )
+    """)
+    conn.executemany("""
+        INSERT INTO articles (url, url_hash, title, content, summary, source_name, category, published_date)
+        VALUES (:url, :url_hash, :title, :content, :summary, :source_name, :category, :published_date)
+    """, [
+        dict({'summary': None}, **article, url_hash=hashlib.md5(article['url'].encode()).hexdigest())
+        for article in articles
+    ])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def rss(count: int, start: int = 0, host: str = "example.com") -> bytes:
+    """An RSS document with items start..start+count-1, newest first"""
+    items = "".join(
+        f"<item><title>Story {n}</title><link>https://{host}/a/{n}</link>"
+        f"<description>Body of story {n}</description>"
+        f"<pubDate>{n % 28 + 1:02d} Jan 2024 10:00:00 GMT</pubDate></item>"
+        for n in reversed(range(start, start + count))
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>T</title>{items}</channel></rss>'.encode()
+
+
+def mock_fetcher(handler, **kwargs) -> FeedFetcher:
+    """
+    FeedFetcher whose async client answers from handler(request)
+
+    handler may be a coroutine function, so it can sleep to simulate a
+    slow server.
+    """
+    transport = Transport("test", per_host_rate=1000, per_host_burst=1000)
+    transport._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return FeedFetcher(transport=transport, **kwargs)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "test.db"), readers=2)
+    yield database
+    database.close()
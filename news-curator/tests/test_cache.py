@@ -0,0 +1,62 @@
+from app.cache import ResponseCache
+
+
+class Generation:
+    def __init__(self):
+        self.value = 0
+
+    def __call__(self) -> int:
+        return self.value
+
+
+def test_hit_then_miss_after_generation_bump():
+    generation = Generation()
+    cache = ResponseCache(generation)
+    body, etag = cache.set("k", b'{"a": 1}', generation())
+
+    assert cache.get("k") == (body, etag)
+
+    generation.value += 1
+    assert cache.get("k") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entry_built_from_an_older_generation_is_stale():
+    generation = Generation()
+    cache = ResponseCache(generation)
+    started_at = generation()
+    generation.value += 1  # a write landed while the response was built
+    cache.set("k", b"[]", started_at)
+
+    assert cache.get("k") is None
+
+
+def test_etag_follows_body():
+    assert ResponseCache.make_etag(b"a") == ResponseCache.make_etag(b"a")
+    assert ResponseCache.make_etag(b"a") != ResponseCache.make_etag(b"b")
+    assert ResponseCache.make_etag(b"a").startswith('W/"')
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(lambda: 0, ttl=0)
+    cache.set("k", b"[]", 0)
+
+    assert cache.get("k") is None
+
+
+def test_lru_eviction():
+    cache = ResponseCache(lambda: 0, max_entries=2)
+    cache.set("a", b"1", 0)
+    cache.set("b", b"2", 0)
+    cache.get("a")
+    cache.set("c", b"3", 0)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_key_ignores_order_and_empty_values():
+    assert ResponseCache.make_key("/api/articles", {"b": "2", "a": "1", "c": ""}) == \
+        ResponseCache.make_key("/api/articles", {"a": "1", "b": "2"})
@@ -0,0 +1,65 @@
+import zlib
+
+import pytest
+
+from app.compression import (
+    MIN_COMPRESS_LENGTH, ZLIB, ZLIB_DICT, ContentCodec, train_dictionary
+)
+
+BODY = "The council voted on the budget for the new harbour bridge. " * 20
+
+
+def zlib_codec() -> ContentCodec:
+    codec = ContentCodec()
+    codec.codec = "zlib"
+    codec.level = 6
+    return codec
+
+
+def test_short_and_missing_bodies_pass_through():
+    codec = ContentCodec()
+    short = "x" * (MIN_COMPRESS_LENGTH - 1)
+
+    assert codec.compress(short) == short
+    assert codec.compress(None) is None
+    assert codec.decompress(short) == short
+    assert codec.decompress(None) is None
+
+
+def test_round_trip():
+    codec = ContentCodec()
+    stored = codec.compress(BODY)
+
+    assert isinstance(stored, bytes)
+    assert len(stored) < len(BODY)
+    assert codec.decompress(stored) == BODY
+
+
+def test_zlib_dictionary_round_trip():
+    codec = zlib_codec()
+    plain = codec.compress(BODY)
+    codec.add_dictionary(7, "zlib", train_dictionary([BODY] * 5))
+    stored = codec.compress(BODY)
+
+    assert stored[0] == ZLIB_DICT
+    assert len(stored) < len(plain)
+    assert codec.decompress(stored) == BODY
+    # Values written before the dictionary still decode
+    assert plain[0] == ZLIB
+    assert codec.decompress(plain) == BODY
+
+
+def test_legacy_untagged_zlib():
+    assert ContentCodec().decompress(zlib.compress(BODY.encode())) == BODY
+
+
+def test_unknown_tag():
+    with pytest.raises(ValueError):
+        ContentCodec().decompress(bytes([99, 0, 1]) + b"data")
+
+
+def test_train_dictionary_prefers_repeated_phrases():
+    dictionary = train_dictionary(["alpha beta gamma", "alpha beta delta", "unique words"])
+
+    assert b"alpha beta" in dictionary
+    assert b"unique" not in dictionary
@@ -0,0 +1,111 @@
+from concurrent.futures import Future
+
+import pytest
+
+from app.crawler import Crawler
+from app.scraper import parse_article_html
+
+LIST_URL = "https://example.com/news"
+
+
+class StubScraper:
+    """Serves pages from a dict (None = download fails) and parses in-process"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.downloads = []
+
+    def download(self, url, source_name=None, category=None, kind='page'):
+        self.downloads.append(url)
+        return self.pages.get(url)
+
+    def parse_article(self, content, url, source_name, category=None) -> Future:
+        future = Future()
+        future.set_result(parse_article_html(content, url, source_name, category))
+        return future
+
+
+def list_page(numbers) -> bytes:
+    links = "".join(f'<a href="/story/{n}">A headline for story {n}</a>' for n in numbers)
+    return f"<html><body>{links}<a href='https://other.org/x'>Elsewhere on the web</a></body></html>".encode()
+
+
+def article_page(n) -> bytes:
+    return f"<html><body><h1>Story {n}</h1><article><p>Text of story {n}.</p></article></body></html>".encode()
+
+
+def site(numbers):
+    pages = {LIST_URL: list_page(numbers)}
+    pages.update({f"https://example.com/story/{n}": article_page(n) for n in numbers})
+    return pages
+
+
+@pytest.fixture
+def source(db):
+    db.add_source({'name': "Site", 'url': LIST_URL, 'source_type': 'scrape', 'category': 'tech'})
+    return db.get_active_sources()[0]
+
+
+def crawler(db, scraper, **kwargs):
+    return Crawler(db, scraper, politeness_delay=0, **kwargs)
+
+
+def test_crawl_stores_new_articles_once(db, source):
+    scraper = StubScraper(site(range(3)))
+
+    assert crawler(db, scraper).crawl_source(source) == 3
+    assert {article['title'] for article in db.get_articles()} == {"Story 0", "Story 1", "Story 2"}
+
+    scraper.pages = site(range(4))
+    scraper.downloads = []
+    assert crawler(db, scraper).crawl_source(source) == 1
+    assert scraper.downloads == [LIST_URL, "https://example.com/story/3"]
+    assert db.get_crawl_status() == []
+
+
+def test_crawl_resumes_from_the_queue(db, source):
+    scraper = StubScraper(site(range(5)))
+
+    assert crawler(db, scraper, max_pages_per_crawl=2).crawl_source(source) == 2
+    assert crawler(db, scraper, max_pages_per_crawl=2).crawl_source(source) == 2
+    assert crawler(db, scraper, max_pages_per_crawl=2).crawl_source(source) == 1
+    assert db.count_articles() == 5
+
+
+def test_failed_article_page_is_retried_then_given_up(db, source):
+    pages = site(range(2))
+    pages["https://example.com/story/1"] = None
+    scraper = StubScraper(pages)
+    engine = crawler(db, scraper, max_attempts=2, retry_delay=0)
+
+    assert engine.crawl_source(source) == 1
+    assert engine.crawl_source(source) == 0
+    assert scraper.downloads.count("https://example.com/story/1") == 2
+
+    with db.get_connection(readonly=True) as conn:
+        row = conn.execute("SELECT status, attempts, last_error FROM crawl_queue WHERE stage = 'article'").fetchone()
+    assert tuple(row) == ('failed', 2, "download failed")
+
+    engine.crawl_source(source)
+    assert scraper.downloads.count("https://example.com/story/1") == 2
+
+
+def test_failed_list_page_fails_the_crawl_until_its_retry(db, source):
+    scraper = StubScraper({LIST_URL: None})
+    engine = crawler(db, scraper, retry_delay=900)
+
+    with pytest.raises(RuntimeError, match="could not be downloaded"):
+        engine.crawl_source(source)
+    with pytest.raises(RuntimeError, match="waiting to retry"):
+        engine.crawl_source(source)
+    assert scraper.downloads == [LIST_URL]
+
+
+def test_link_title_replaces_missing_page_title(db, source):
+    pages = site(range(1))
+    pages["https://example.com/story/0"] = b"<html><body><article><p>No heading here.</p></article></body></html>"
+    scraper = StubScraper(pages)
+
+    crawler(db, scraper).crawl_source(source)
+
+    assert db.get_articles()[0]['title'] == "A headline for story 0"
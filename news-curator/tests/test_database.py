@@ -0,0 +1,363 @@
+import os
+
+import pytest
+
+from app.database import Database
+from app.dates import to_timestamp
+
+from .conftest import make_article, make_legacy_db
+
+
+def test_add_articles_skips_stored_urls(db):
+    assert db.add_articles([make_article(n) for n in range(5)])['inserted'] == 5
+    assert db.add_articles([make_article(n) for n in range(3, 8)])['inserted'] == 3
+    assert db.count_articles() == 8
+
+
+def test_search_ranks_title_matches_first(db):
+    db.add_articles([
+        make_article(1, title="Budget talks stall", content="Nothing about the harbour here " * 5),
+        make_article(2, title="Quiet day", content="A satellite launch is planned for next week " * 5),
+        make_article(3, title="Satellite launch delayed", content="Weather grounded it " * 5),
+    ])
+
+    results = db.get_articles(search="satellite")
+
+    assert [article['title'] for article in results][:2] == ["Satellite launch delayed", "Quiet day"]
+    assert all("<mark>" in article['snippet'] for article in results[:2])
+
+
+def test_search_ignores_markup(db):
+    db.add_article(make_article(
+        1, title="Storm warning",
+        summary='Heavy rain, see <a href="https://example.com/more">more</a> at <a href="https://exam',
+        content='<div class="wrapper"><p>Heavy <b>rain</b> &amp; wind expected</p></div>'
+    ))
+
+    for markup in ("wrapper", "div", "href", "exam"):
+        assert db.get_articles(search=markup) == []
+    [result] = db.get_articles(search="rain")
+    assert result['snippet'] == "Heavy <mark>rain</mark>, see more at"
+    [result] = db.get_articles(search="wind")
+    assert result['snippet'] == "Heavy rain & <mark>wind</mark> expected"
+
+
+def test_search_follows_updates_and_deletes(db):
+    article_id = db.add_article(make_article(1, title="Tornado warning"))
+    db.update_article(article_id, {'title': "Glacier warning"})
+
+    assert db.get_articles(search="tornado") == []
+    assert len(db.get_articles(search="glacier")) == 1
+
+    db.cleanup_old_articles(days=0)
+    assert db.get_articles(search="glacier") == []
+
+
+def test_search_index_rebuilt_when_view_changes(tmp_path):
+    path = str(tmp_path / "old.db")
+    db = Database(path)
+    db.add_article(make_article(1, content="<section>Court ruling</section>"))
+    # The view (and index) as they were before markup was stripped
+    with db.get_connection() as conn:
+        conn.execute("DROP VIEW articles_text")
+        conn.execute("""
+            CREATE VIEW articles_text AS SELECT articles.id, articles.title, articles.summary,
+                   decompress(article_bodies.content) AS content
+            FROM articles LEFT JOIN article_bodies ON article_bodies.article_id = articles.id
+        """)
+        conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+    assert len(db.get_articles(search="section")) == 1
+    db.close()
+
+    db = Database(path)
+    try:
+        assert db.get_articles(search="section") == []
+        assert len(db.get_articles(search="court")) == 1
+        with db.get_connection(readonly=True) as conn:
+            conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('integrity-check')")
+    finally:
+        db.close()
+
+
+def test_cursor_round_trip():
+    position = {'date': 1709287200, 'id': 42}
+    cursor = Database.encode_cursor(position)
+
+    assert "=" not in cursor
+    assert Database.decode_cursor(cursor) == position
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64 !",
+    Database.encode_cursor({'id': 1}),
+    Database.encode_cursor([1, 2]),
+    "bnVsbA",  # "null"
+])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        Database.decode_cursor(cursor)
+
+
+def test_article_page_walks_every_row_once(db):
+    db.add_articles([make_article(n) for n in range(25)])
+
+    seen = []
+    cursor = None
+    while True:
+        page = db.get_article_page(limit=10, cursor=cursor)
+        seen += [article['id'] for article in page['articles']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 25
+
+
+def test_article_page_rejects_cursor_of_other_sort(db):
+    cursor = Database.encode_cursor({'score': 1.5, 'id': 3})
+
+    with pytest.raises(ValueError):
+        db.get_article_page(limit=10, cursor=cursor)
+
+
+def recount(db):
+    with db.get_connection(readonly=True) as conn:
+        return Database._count_articles(conn.cursor())
+
+
+def test_stats_counters_follow_writes(db):
+    ids = [db.add_article(make_article(n, category="tech" if n % 2 else "science")) for n in range(6)]
+    db.mark_as_read(ids[0])
+    db.toggle_star(ids[1])
+    db.update_article(ids[2], {'category': "politics"})
+    db.mark_all_read(category="science")
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM articles WHERE id = ?", (ids[3],))
+
+    stats = db.get_stats()
+
+    assert stats['total_articles'] == 5
+    assert stats['unread_articles'] == 3
+    assert stats['starred_articles'] == 1
+    assert stats['by_category'] == {'politics': 1, 'science': 2, 'tech': 2}
+    assert stats['by_source'] == {'Example': 5}
+    assert db.reconcile_stats() == 0
+
+
+def test_story_duplicates_are_not_counted(db):
+    original = make_article(1)
+    db.add_article(original)
+    db.add_article(make_article(2, title=original['title'], content=original['content'], source_name="Mirror"))
+
+    stats = db.get_stats()
+
+    assert stats['total_articles'] == 1
+    assert stats['by_source'] == {'Example': 1}
+
+
+def test_reconcile_repairs_drift(db):
+    db.add_articles([make_article(n) for n in range(3)])
+    generation = db.generation
+    with db.get_connection() as conn:
+        conn.execute("UPDATE article_counts SET total = 99 WHERE scope = 'all'")
+        conn.execute("DELETE FROM article_counts WHERE scope = 'source'")
+
+    assert db.reconcile_stats() == 2
+    assert db.get_stats()['total_articles'] == 3
+    assert db.generation > generation
+
+    with db.get_connection(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT scope, key, total, unread, starred FROM article_counts")
+        stored = {(row[0], row[1]): tuple(row[2:]) for row in cursor.fetchall()}
+    assert stored == recount(db)
+
+
+def test_generation_bumps_once_after_commit(db):
+    generation = db.generation
+    db.add_articles([make_article(n) for n in range(3)])
+
+    assert db.generation == generation + 1
+
+
+def test_generation_unchanged_on_rollback(db):
+    generation = db.generation
+    broken = make_article(2)
+    del broken['source_name']
+
+    with pytest.raises(KeyError):
+        db.add_articles([make_article(1), broken])
+
+    assert db.generation == generation
+    assert db.count_articles() == 0
+
+
+def test_generation_unchanged_when_nothing_changes(db):
+    article_id = db.add_article(make_article(1))
+    assert db.mark_as_read(article_id)
+    generation = db.generation
+
+    assert db.mark_as_read(article_id)
+    assert db.mark_articles([article_id], is_read=True) == 0
+    assert db.mark_all_read() == 0
+    assert db.generation == generation
+
+
+def test_mark_as_read_missing_article(db):
+    assert not db.mark_as_read(12345)
+
+
+def test_toggle_star_returns_new_state(db):
+    article_id = db.add_article(make_article(1))
+
+    assert db.toggle_star(article_id) == 1
+    assert db.toggle_star(article_id) == 0
+    assert db.toggle_star(12345) is None
+
+
+def test_mark_articles_and_mark_all_read_with_filters(db):
+    ids = [db.add_article(make_article(n, category="tech" if n % 2 else "science")) for n in range(6)]
+
+    assert db.mark_articles(ids[:3], is_starred=True) == 3
+    assert db.mark_articles(ids[:3], is_starred=True, is_read=True) == 3
+    assert db.mark_all_read(category="tech") == 2
+    assert db.mark_all_read() == 1
+    assert db.get_stats()['starred_articles'] == 3
+    assert db.get_stats()['unread_articles'] == 0
+
+
+def test_url_variants_share_a_hash(db):
+    assert db.hash_url("http://www.example.com/a/?utm_source=x#top") == \
+        db.hash_url("https://example.com/a")
+
+
+def test_article_leaves_out_internal_columns(db):
+    article_id = db.add_article(make_article(1))
+
+    article = db.get_article_by_id(article_id)
+
+    assert set(article) == set(Database.LIST_FIELDS) | {'content'}
+
+
+def test_migration_groups_url_variants_and_near_duplicates(tmp_path):
+    story = make_article(1)
+    path = make_legacy_db(str(tmp_path / "legacy.db"), [
+        dict(story, url="http://www.example.com/story/1?utm_source=feed"),
+        story,
+        dict(story, url="https://mirror.example.org/copy", source_name="Mirror"),
+        make_article(2),
+    ])
+
+    db = Database(path)
+    try:
+        with db.get_connection(readonly=True) as conn:
+            rows = {
+                row['url']: dict(row) for row in
+                conn.execute("SELECT id, url, url_hash, fingerprint, duplicate_of FROM articles")
+            }
+        primary = rows[story['url']]
+
+        assert primary['duplicate_of'] is None
+        assert primary['url_hash'] == db.hash_url(story['url'])
+        assert rows["http://www.example.com/story/1?utm_source=feed"]['duplicate_of'] == primary['id']
+        assert rows["https://mirror.example.org/copy"]['duplicate_of'] == primary['id']
+        assert all(row['fingerprint'] is not None for row in rows.values())
+        assert db.get_stats()['total_articles'] == 2
+        assert db.add_article(dict(story, url="https://example.com/story/1/")) is None
+    finally:
+        db.close()
+
+
+def test_migration_points_url_variants_at_the_story_primary(tmp_path):
+    story = make_article(1)
+    path = make_legacy_db(str(tmp_path / "legacy.db"), [
+        dict(story, url="https://wire.example.net/original", source_name="Wire"),
+        dict(story, url="http://www.example.com/story/1?utm_source=feed"),
+        story,
+    ])
+
+    db = Database(path)
+    try:
+        with db.get_connection(readonly=True) as conn:
+            duplicates = [row[0] for row in conn.execute("SELECT duplicate_of FROM articles ORDER BY id")]
+        assert duplicates == [None, 1, 1]
+    finally:
+        db.close()
+
+
+def test_migration_normalizes_published_dates(tmp_path):
+    path = make_legacy_db(str(tmp_path / "legacy.db"), [
+        make_article(1, published_date="Tue, 05 Mar 2024 07:00:00 -0500"),
+        make_article(2, published_date="sometime last week"),
+        make_article(3, published_date=None),
+    ])
+
+    db = Database(path)
+    try:
+        with db.get_connection(readonly=True) as conn:
+            rows = conn.execute("""
+                SELECT published_date, published_ts,
+                       CAST(strftime('%s', scraped_date) AS INTEGER) AS scraped_ts
+                FROM articles ORDER BY id
+            """).fetchall()
+
+        assert (rows[0]['published_date'], rows[0]['published_ts']) == \
+            ("2024-03-05T12:00:00", to_timestamp("2024-03-05T12:00:00Z"))
+        # Unparsable text is kept for display, but sorts by when it was scraped
+        assert rows[1]['published_date'] == "sometime last week"
+        assert rows[1]['published_ts'] == rows[1]['scraped_ts']
+        assert rows[2]['published_date'] is not None
+        assert rows[2]['published_ts'] == rows[2]['scraped_ts']
+        assert len(db.get_article_page(limit=10)['articles']) == 3
+    finally:
+        db.close()
+
+
+def test_body_round_trips_through_compression(db):
+    article = make_article(1, content="word " * 200)
+    article_id = db.add_article(article)
+
+    assert db.get_article_by_id(article_id)['content'] == article['content']
+
+
+def test_migration_compresses_plain_bodies(tmp_path):
+    long_body = "A long plain body that was stored inline. " * 40
+    path = make_legacy_db(str(tmp_path / "legacy.db"), [
+        make_article(1, content=long_body),
+        make_article(2, content="Short."),
+    ])
+
+    db = Database(path)
+    try:
+        with db.get_connection(readonly=True) as conn:
+            stored = dict(conn.execute("SELECT article_id, typeof(content) FROM article_bodies").fetchall())
+        assert stored == {1: 'blob', 2: 'text'}
+        assert db.get_article_by_id(1)['content'] == long_body
+        assert [article['id'] for article in db.get_articles(search="inline")] == [1]
+    finally:
+        db.close()
+
+
+def test_migration_switches_to_incremental_vacuum_and_shrinks_the_file(tmp_path):
+    body = "An inline body that compresses well once it is moved out. " * 200
+    path = make_legacy_db(str(tmp_path / "legacy.db"), [
+        make_article(n, content=body) for n in range(200)
+    ])
+    legacy_size = os.path.getsize(path)
+
+    db = Database(path)
+    try:
+        stats = db.get_storage_stats()
+        assert stats["incremental_vacuum"]
+        assert stats["free_pages"] == 0
+        assert os.path.getsize(path) < legacy_size / 2
+        assert db.get_article_by_id(1)['content'] == body
+    finally:
+        db.close()
+
+    # Opening it again doesn't VACUUM a second time
+    db = Database(path)
+    try:
+        assert db.get_storage_stats()["incremental_vacuum"]
+    finally:
+        db.close()
@@ -0,0 +1,32 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.dates import parse_date, to_iso, to_timestamp
+
+NOON_UTC = datetime(2024, 3, 5, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("value", [
+    "Tue, 05 Mar 2024 12:00:00 GMT",
+    "Tue, 05 Mar 2024 07:00:00 -0500",
+    "2024-03-05T12:00:00Z",
+    "2024-03-05T14:00:00+02:00",
+    "2024-03-05 12:00:00",
+    "March 5, 2024 7:00 EST",
+    datetime(2024, 3, 5, 12, 0),
+])
+def test_parse_date_normalizes_to_utc(value):
+    assert parse_date(value) == NOON_UTC
+
+
+@pytest.mark.parametrize("value", [None, "", "yesterday-ish", "not a date at all"])
+def test_parse_date_rejects_non_dates(value):
+    assert parse_date(value) is None
+
+
+def test_to_timestamp_and_iso():
+    assert to_timestamp("2024-03-05T12:00:00Z") == int(NOON_UTC.timestamp())
+    assert to_iso("Tue, 05 Mar 2024 07:00:00 -0500") == "2024-03-05T12:00:00"
+    assert to_iso(int(NOON_UTC.timestamp())) == "2024-03-05T12:00:00"
+    assert to_iso("garbage") is None
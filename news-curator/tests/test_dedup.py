@@ -0,0 +1,73 @@
+import pytest
+
+from app.dedup import BloomFilter, DedupIndex
+
+from .conftest import make_article
+
+
+@pytest.fixture
+def index(db):
+    dedup_index = DedupIndex(db, capacity=1000)
+    db.dedup_index = dedup_index
+    return dedup_index
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    digests = [DedupIndex.hash(f"https://example.com/{n}") for n in range(1000)]
+    for digest in digests:
+        bloom.add(digest)
+
+    assert all(digest in bloom for digest in digests)
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for n in range(1000):
+        bloom.add(DedupIndex.hash(f"https://example.com/{n}"))
+
+    false_positives = sum(
+        DedupIndex.hash(f"https://other.org/{n}") in bloom for n in range(10000)
+    )
+    assert false_positives < 300
+
+
+def test_unloaded_index_knows_nothing(db, index):
+    db.add_articles([make_article(1)])
+
+    assert index.known([db.hash_url(make_article(1)['url'])]) == set()
+
+
+def test_load_finds_stored_urls(db, index):
+    db.add_articles([make_article(n) for n in range(5)])
+    index.load()
+    hashes = [db.hash_url(make_article(n)['url']) for n in range(8)]
+
+    assert index.known(hashes) == set(hashes[:5])
+    assert index.count == 5
+
+
+def test_committed_inserts_reach_the_index(db, index):
+    index.load()
+    db.add_articles([make_article(n) for n in range(3)])
+    db.add_article(make_article(3))
+
+    hashes = [db.hash_url(make_article(n)['url']) for n in range(4)]
+    assert index.known(hashes) == set(hashes)
+    assert index.count == 4
+
+
+def test_skipped_and_rolled_back_inserts_do_not(db, index):
+    db.add_articles([make_article(1)])
+    index.load()
+
+    db.add_articles([make_article(1)])
+    assert index.count == 1
+
+    broken = make_article(3)
+    del broken['source_name']
+    with pytest.raises(KeyError):
+        db.add_articles([make_article(2), broken])
+
+    assert index.count == 1
+    assert db.hash_url(make_article(2)['url']) not in index._bloom
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from app.enrichment import EnrichmentWorker
+
+from .conftest import make_article
+
+FULL_TEXT = "The whole story, as published on the site. " * 30
+
+
+class StubScraper:
+    """Returns a full page for every URL except those listed as failing"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.requests = []
+
+    def extract_article(self, url, source_name, category=None):
+        self.requests.append((url, time.monotonic()))
+        if url in self.failing:
+            return None
+        return {'url': url, 'content': FULL_TEXT, 'summary': "From the page", 'author': "Page Author",
+                'image_url': "https://example.com/page.jpg"}
+
+
+def worker(db, scraper, **kwargs):
+    """A worker set up as start() would, without its polling loop"""
+    worker = EnrichmentWorker(db, scraper, min_length=200, per_host_interval=0, **kwargs)
+    db.enrich_below = worker.min_length
+    worker._limit = asyncio.Semaphore(worker.workers)
+    return worker
+
+
+def test_only_short_articles_are_flagged(db):
+    db.enrich_below = 200  # what EnrichmentWorker.start() sets
+    db.add_article(make_article(1, content="Teaser only."))
+    db.add_article(make_article(2, content="Long enough " * 30))
+
+    assert [article['url'] for article in db.get_articles_to_enrich()] == [make_article(1)['url']]
+
+
+def test_enrich_batch_fills_short_articles(db):
+    enrichment = worker(db, StubScraper(failing=[make_article(2)['url']]))
+    db.add_article(make_article(1, content="Teaser.", author="Feed Author"))
+    db.add_article(make_article(2, content="Another teaser."))
+
+    asyncio.run(enrichment.enrich_batch(db.get_articles_to_enrich()))
+
+    first, second = db.get_article_by_id(1), db.get_article_by_id(2)
+    assert first['content'] == FULL_TEXT
+    assert first['author'] == "Feed Author"
+    assert first['summary'] == "From the page"
+    assert second['content'] == "Another teaser."
+    assert db.get_articles_to_enrich() == []
+    assert enrichment.status()['enriched'] == 1
+    assert enrichment.status()['failed'] == 1
+
+
+def test_requests_to_one_host_are_spaced(db):
+    scraper = StubScraper()
+    enrichment = worker(db, scraper, workers=4)
+    enrichment.per_host_interval = 0.1
+    db.add_articles([make_article(n, content="Teaser.") for n in range(3)])
+
+    asyncio.run(enrichment.enrich_batch(db.get_articles_to_enrich()))
+
+    times = sorted(at for _, at in scraper.requests)
+    assert len(times) == 3
+    assert all(later - earlier >= 0.09 for earlier, later in zip(times, times[1:]))
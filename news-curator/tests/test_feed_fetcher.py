@@ -0,0 +1,77 @@
+from app.dates import to_timestamp
+from app.dedup import DedupIndex
+from app.feed_fetcher import FeedFetcher, StreamingFeedParser, parse_feed_content
+
+from .conftest import rss
+
+FEED_URL = "https://example.com/feed.xml"
+
+
+class CountingIndex(DedupIndex):
+    """DedupIndex that counts known() lookups"""
+
+    calls = 0
+
+    def known(self, url_hashes):
+        CountingIndex.calls += 1
+        return super().known(url_hashes)
+
+
+def test_streaming_parser_matches_feedparser_in_small_chunks():
+    body = rss(6)
+    parser = StreamingFeedParser(FEED_URL, "Example")
+    chunks = [body[i:i + 64] for i in range(0, len(body), 64)]
+
+    streamed = list(parser.iter_articles(chunks))
+    parsed = parse_feed_content(body, FEED_URL, "Example")
+
+    assert len(streamed) == 6
+    assert [(a['url'], a['title'], a['published_date']) for a in streamed] == \
+        [(a['url'], a['title'], a['published_date']) for a in parsed]
+
+
+def test_streaming_parser_stops_after_old_entries():
+    body = rss(10)
+    parser = StreamingFeedParser(FEED_URL, "Example", stop_before=to_timestamp("2024-01-06T10:00:00"))
+
+    articles = parser.feed(body)
+
+    assert [article['url'] for article in articles] == [f"https://example.com/a/{n}" for n in range(9, 4, -1)]
+    assert parser.done
+    assert parser.close() == []
+
+
+def test_parse_feed_skips_stored_entries(db):
+    index = DedupIndex(db, capacity=1000)
+    db.dedup_index = index
+    index.load()
+    db.add_articles(parse_feed_content(rss(2), FEED_URL, "Example"))
+
+    fetcher = FeedFetcher(dedup_index=index)
+    articles = fetcher.parse_feed(rss(4), FEED_URL, "Example")
+
+    assert [article['url'] for article in articles] == ["https://example.com/a/3", "https://example.com/a/2"]
+
+
+def test_streaming_parser_checks_each_chunk_in_one_lookup(db):
+    index = CountingIndex(db, capacity=1000)
+    db.dedup_index = index
+    index.load()
+    db.add_articles(parse_feed_content(rss(5), FEED_URL, "Example"))
+
+    body = rss(10)
+    parser = StreamingFeedParser(FEED_URL, "Example", dedup_index=index)
+    CountingIndex.calls = 0
+    articles = parser.feed(body) + parser.close()
+
+    assert [article['url'] for article in articles] == [f"https://example.com/a/{n}" for n in range(9, 4, -1)]
+    assert CountingIndex.calls == 1
+
+
+def test_parse_feed_content():
+    articles = parse_feed_content(rss(3), FEED_URL, "Example", "tech")
+
+    assert [article['url'] for article in articles] == [f"https://example.com/a/{n}" for n in (2, 1, 0)]
+    assert articles[0]['source_name'] == "Example"
+    assert articles[0]['category'] == "tech"
+    assert articles[0]['published_date'] == "2024-01-03T10:00:00"
@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.dedup import DedupIndex
+from app.feed_fetcher import StreamingFeedParser
+from app.fetch_engine import FetchEngine
+
+from .conftest import mock_fetcher, rss
+
+
+class SlowServer:
+    """Serves a small feed per host after a delay, tracking requests in flight"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if request.url.path == "/broken.xml":
+                return httpx.Response(500)
+            return httpx.Response(200, content=rss(2, host=request.url.host))
+        finally:
+            self.in_flight -= 1
+
+
+def add_feeds(db, hosts, path="/feed.xml"):
+    for n, host in enumerate(hosts):
+        db.add_source({
+            'name': f"Feed {n} {host}{path}",
+            'url': f"https://{host}/",
+            'feed_url': f"https://{host}{path}"
+        })
+    return db.get_active_sources()
+
+
+def fetch_all(engine, sources) -> int:
+    async def run():
+        try:
+            return await engine.fetch_all(sources)
+        finally:
+            await engine.close()
+    return asyncio.run(run())
+
+
+def test_fetch_all_stores_every_feed(db):
+    server = SlowServer()
+    engine = FetchEngine(db, mock_fetcher(server))
+    sources = add_feeds(db, [f"site{n}.example" for n in range(4)])
+
+    assert fetch_all(engine, sources) == 8
+    assert db.count_articles() == 8
+
+
+def test_global_concurrency_limit(db):
+    server = SlowServer()
+    engine = FetchEngine(db, mock_fetcher(server), max_concurrency=3)
+    sources = add_feeds(db, [f"site{n}.example" for n in range(9)])
+
+    fetch_all(engine, sources)
+    assert server.peak == 3
+
+
+def test_per_host_concurrency_limit(db):
+    server = SlowServer()
+    engine = FetchEngine(db, mock_fetcher(server), per_host_concurrency=1)
+    sources = add_feeds(db, ["same.example"] * 4)
+    for n, source in enumerate(sources):
+        source['feed_url'] += f"?page={n}"
+
+    fetch_all(engine, sources)
+    assert len(server.requests) == 4
+    assert server.peak == 1
+
+
+def test_one_failing_feed_does_not_stop_the_rest(db):
+    server = SlowServer()
+    engine = FetchEngine(db, mock_fetcher(server))
+    add_feeds(db, ["good.example"])
+    sources = add_feeds(db, ["bad.example"], path="/broken.xml")
+
+    assert len(sources) == 2
+    assert fetch_all(engine, sources) == 2
+
+
+def test_conditional_get_uses_stored_validators(db):
+    seen_headers = []
+
+    def server(request):
+        seen_headers.append(dict(request.headers))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=rss(2), headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 10:00:00 GMT"})
+
+    engine = FetchEngine(db, mock_fetcher(server))
+    add_feeds(db, ["example.com"])
+
+    assert fetch_all(engine, db.get_active_sources()) == 2
+    source = db.get_active_sources()[0]
+    assert source['etag'] == '"v1"'
+    assert source['content_hash']
+
+    engine = FetchEngine(db, mock_fetcher(server))
+    assert fetch_all(engine, [source]) == 0
+    assert seen_headers[1]["if-none-match"] == '"v1"'
+    assert seen_headers[1]["if-modified-since"] == "Mon, 01 Jan 2024 10:00:00 GMT"
+
+
+def test_unchanged_body_is_not_parsed(db, monkeypatch):
+    engine = FetchEngine(db, mock_fetcher(lambda request: httpx.Response(200, content=rss(2))))
+    add_feeds(db, ["example.com"])
+    fetch_all(engine, db.get_active_sources())
+
+    parses = []
+    engine = FetchEngine(db, mock_fetcher(lambda request: httpx.Response(200, content=rss(2))))
+    monkeypatch.setattr(engine, "_parse_and_store", lambda *args: parses.append(args) or 0)
+    fetch_all(engine, db.get_active_sources())
+
+    assert parses == []
+
+
+def test_buffered_feed_is_parsed_in_a_process_pool(db):
+    engine = FetchEngine(db, mock_fetcher(lambda request: httpx.Response(200, content=rss(3))), parse_processes=1)
+    sources = add_feeds(db, ["example.com"])
+
+    async def run():
+        try:
+            added = await engine.fetch_all(sources)
+            return added, [process.pid for process in engine.parse_pool._processes.values()]
+        finally:
+            await engine.close()
+
+    added, pids = asyncio.run(run())
+    assert added == 3
+    assert len(pids) == 1 and pids[0] != os.getpid()
+    assert engine._parse_pool is None
+
+
+def test_known_entries_are_dropped_before_insert(db, monkeypatch):
+    db.dedup_index = DedupIndex(db, capacity=1000)
+    db.dedup_index.load()
+    add_feeds(db, ["example.com"])
+    fetch_all(FetchEngine(db, mock_fetcher(lambda request: httpx.Response(200, content=rss(2)))), db.get_active_sources())
+
+    batches = []
+    add_articles = db.add_articles
+    monkeypatch.setattr(db, "add_articles", lambda articles: batches.append(len(articles)) or add_articles(articles))
+    fetcher = mock_fetcher(lambda request: httpx.Response(200, content=rss(4)), dedup_index=db.dedup_index)
+
+    assert fetch_all(FetchEngine(db, fetcher), db.get_active_sources()) == 2
+    assert batches == [2]
+
+
+def test_large_feed_is_streamed_and_parsed_in_the_pool(db, monkeypatch):
+    threads = []
+    feed = StreamingFeedParser.feed
+
+    def recording_feed(self, chunk):
+        threads.append(threading.current_thread().name)
+        return feed(self, chunk)
+
+    monkeypatch.setattr(StreamingFeedParser, "feed", recording_feed)
+    body = rss(50)
+    engine = FetchEngine(
+        db, mock_fetcher(lambda request: httpx.Response(200, content=body)),
+        stream_threshold=1024, ingest_batch_size=10
+    )
+    add_feeds(db, ["example.com"])
+
+    assert fetch_all(engine, db.get_active_sources()) == 50
+    assert threads and all(name.startswith("feed-parse") for name in threads)
+    assert db.get_active_sources()[0]['content_hash'] == hashlib.sha256(body).hexdigest()
+
+
+def fetch_one(engine, source):
+    return asyncio.run(engine.fetch_source(source))
+
+
+def test_circuit_opens_after_repeated_failures(db):
+    server = SlowServer(delay=0)
+    engine = FetchEngine(db, mock_fetcher(server), failure_threshold=3, circuit_open_seconds=900)
+    [source] = add_feeds(db, ["example.com"], "/broken.xml")
+
+    for _ in range(2):
+        fetch_one(engine, source)
+    assert source['consecutive_failures'] == 2
+    assert source['circuit_open_until'] is None
+
+    fetch_one(engine, source)
+    [stored] = db.get_all_sources()
+    assert stored['consecutive_failures'] == 3
+    assert "HTTPStatusError" in stored['last_error']
+    open_until = FetchEngine.circuit_open_until(stored)
+    assert timedelta(seconds=890) < open_until - datetime.utcnow() <= timedelta(seconds=900)
+
+    # Skipped without a request while the circuit is open
+    assert fetch_one(engine, stored) == 0
+    assert len(server.requests) == 3
+
+
+def test_open_time_doubles_up_to_the_maximum(db):
+    engine = FetchEngine(db, mock_fetcher(SlowServer(delay=0)), failure_threshold=1,
+                         circuit_open_seconds=100, max_open_seconds=300)
+    [source] = add_feeds(db, ["example.com"], "/broken.xml")
+
+    open_for = []
+    for failures in range(4):
+        source['circuit_open_until'] = None  # let it through again
+        fetch_one(engine, source)
+        open_for.append((FetchEngine.circuit_open_until(source) - datetime.utcnow()).total_seconds())
+
+    assert [round(seconds, -1) for seconds in open_for] == [100, 200, 300, 300]
+
+
+def test_success_closes_the_circuit_and_invalidates_caches(db):
+    engine = FetchEngine(db, mock_fetcher(SlowServer(delay=0)))
+    [source] = add_feeds(db, ["example.com"])
+    fetch_one(engine, source)
+    db.record_source_failure(source['id'], "ReadTimeout", 10000, "2000-01-01 00:00:00")
+
+    fetch_one(engine, db.get_active_sources()[0])
+
+    [stored] = db.get_all_sources()
+    assert stored['consecutive_failures'] == 0
+    assert stored['circuit_open_until'] is None
+
+    # Nothing new is stored, but /api/sources shows last_fetched and latency
+    generation = db.generation
+    fetch_one(engine, stored)
+    assert db.get_all_sources()[0]['last_fetched'] is not None
+    assert db.generation > generation
@@ -0,0 +1,50 @@
+import random
+
+from app.fingerprint import (
+    NEAR_DUPLICATE_DISTANCE, canonicalize_url, fingerprint_bands, hamming_distance, simhash
+)
+
+TEXT = " ".join(random.Random(1).choice(
+    "the city council approved a new budget for schools roads parks and libraries "
+    "after a long debate over taxes and spending".split()
+) for _ in range(200))
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTP://WWW.Example.com:80/News/?b=2&utm_medium=x&a=1#frag") == \
+        "https://example.com/News?a=1&b=2"
+    assert canonicalize_url("mailto:someone@example.com") == "mailto:someone@example.com"
+
+
+def test_simhash_needs_enough_words():
+    assert simhash("too short to fingerprint") is None
+
+
+def test_small_edit_is_a_near_duplicate():
+    edited = TEXT.replace("council", "Council") + " updated"
+    a, b = simhash(TEXT), simhash(edited)
+
+    assert a == simhash(TEXT)
+    assert hamming_distance(a, b) <= NEAR_DUPLICATE_DISTANCE
+
+
+def test_unrelated_text_is_not():
+    other = " ".join(random.Random(2).choice(
+        "rocket launch orbit satellite engine crew mission fuel tank booster".split()
+    ) for _ in range(200))
+
+    assert hamming_distance(simhash(TEXT), simhash(other)) > NEAR_DUPLICATE_DISTANCE
+
+
+def test_near_duplicates_share_a_band():
+    fingerprint = simhash(TEXT)
+    rng = random.Random(3)
+    for _ in range(100):
+        flipped = fingerprint
+        for bit in rng.sample(range(64), NEAR_DUPLICATE_DISTANCE):
+            flipped ^= 1 << bit
+        assert set(fingerprint_bands(fingerprint)) & set(fingerprint_bands(flipped))
+
+
+def test_bands_are_distinct_per_position():
+    assert len(set(fingerprint_bands(0))) == 4
@@ -0,0 +1,58 @@
+from app.relevance import MAX_BODY_HITS, TITLE_BOOST, KeywordAutomaton, RelevanceScorer, tokenize
+
+
+class KeywordStore:
+    """Stands in for Database.get_keywords"""
+
+    def __init__(self, keywords):
+        self.keywords = keywords
+
+    def get_keywords(self):
+        return self.keywords
+
+
+def scorer(*keywords) -> RelevanceScorer:
+    relevance = RelevanceScorer(KeywordStore([
+        dict({'id': n, 'weight': 1.0, 'category': None}, **keyword)
+        for n, keyword in enumerate(keywords)
+    ]))
+    relevance.load()
+    return relevance
+
+
+def test_tokenize_drops_tags():
+    assert tokenize("<p>Machine <b>Learning</b>!</p>") == ["machine", "learning"]
+
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton([
+        (("machine", "learning"), {'id': 1}),
+        (("learning",), {'id': 2}),
+        (("deep", "machine", "learning", "model"), {'id': 3}),
+    ])
+    found = [keyword['id'] for keyword in automaton.matches(tokenize("deep machine learning model and learning"))]
+
+    assert sorted(found) == [1, 2, 2, 3]
+
+
+def test_title_mentions_are_boosted():
+    relevance = scorer({'keyword': 'python'})
+
+    assert relevance.score({'title': "Python news", 'content': ""}) == TITLE_BOOST
+    assert relevance.score({'title': "", 'content': "python"}) == 1.0
+
+
+def test_body_hits_are_capped():
+    relevance = scorer({'keyword': 'python'})
+
+    assert relevance.score({'title': "", 'content': "python " * 50}) == MAX_BODY_HITS
+
+
+def test_weights_and_categories():
+    relevance = scorer(
+        {'keyword': 'rust', 'weight': 2.0},
+        {'keyword': 'chip', 'category': 'hardware'}
+    )
+
+    assert relevance.score({'title': "", 'content': "rust chip", 'category': 'tech'}) == 2.0
+    assert relevance.score({'title': "", 'content': "rust chip", 'category': 'hardware'}) == 3.0
@@ -0,0 +1,52 @@
+import asyncio
+
+import httpx
+
+from app.fetch_engine import FetchEngine
+from app.replay import replay_snapshots
+from app.snapshots import SnapshotStore
+
+from .conftest import mock_fetcher, rss
+
+FEED_URL = "https://example.com/feed.xml"
+
+
+def test_replay_restores_articles_from_fetched_feeds(db, tmp_path):
+    store = SnapshotStore(db, str(tmp_path / "snapshots"))
+    engine = FetchEngine(db, mock_fetcher(lambda request: httpx.Response(200, content=rss(4)), snapshots=store))
+    db.add_source({'name': "Example", 'url': "https://example.com/", 'feed_url': FEED_URL})
+    asyncio.run(engine.fetch_all(db.get_active_sources()))
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM articles")
+
+    stats = replay_snapshots(db, store, workers=1)
+
+    assert stats["snapshots"] == 1
+    assert stats["inserted"] == 4
+    assert db.count_articles() == 4
+
+
+def test_replay_update_overwrites_stored_articles(db, tmp_path):
+    store = SnapshotStore(db, str(tmp_path / "snapshots"))
+    db.add_article({'url': "https://example.com/a/0", 'title': "Old parse", 'source_name': "Example",
+                    'published_date': "2024-01-01T10:00:00Z"})
+    store.put(FEED_URL, rss(1), "feed", source_name="Example")
+
+    assert replay_snapshots(db, store, workers=1)["updated"] == 0
+    assert db.get_articles()[0]['title'] == "Old parse"
+
+    stats = replay_snapshots(db, store, update=True, workers=1)
+
+    assert stats["updated"] == 1
+    assert db.get_articles()[0]['title'] == "Story 0"
+
+
+def test_missing_files_are_counted_not_replayed(db, tmp_path):
+    store = SnapshotStore(db, str(tmp_path / "snapshots"))
+    digest = store.put(FEED_URL, rss(1), "feed", source_name="Example")
+    store.path(digest).unlink()
+
+    stats = replay_snapshots(db, store, workers=1)
+
+    assert stats["missing"] == 1
+    assert db.count_articles() == 0
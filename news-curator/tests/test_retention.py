@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from app.retention import RetentionEngine
+
+from .conftest import make_article
+
+NOW = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def test_run_expires_old_unstarred_articles_in_batches(db):
+    db.add_articles([make_article(n) for n in range(5)])
+    db.add_articles([make_article(n, published_date=NOW) for n in range(5, 7)])
+    db.toggle_star(1)
+
+    progress = RetentionEngine(db, batch_size=2, pause=0).run(days=30)
+
+    assert progress['state'] == "done"
+    assert progress['candidates'] == progress['removed'] == 4
+    assert progress['batches'] == 2
+    assert sorted(article['id'] for article in db.get_articles()) == [1, 6, 7]
+    assert db.get_stats()['total_articles'] == 3
+
+
+def test_archive_keeps_the_body(db):
+    article = make_article(1, content="An old story worth keeping. " * 20)
+    article_id = db.add_article(article)
+
+    RetentionEngine(db, pause=0, archive=True).run(days=30)
+
+    assert db.get_article_by_id(article_id) is None
+    archived = db.get_archived_article(article_id)
+    assert archived['content'] == article['content']
+    assert archived['title'] == article['title']
+
+
+def test_a_story_expires_as_a_whole(db):
+    story = make_article(1)
+    primary = db.add_article(story)
+    db.add_article(dict(story, url="https://mirror.example.org/1", source_name="Mirror", published_date=NOW))
+
+    assert RetentionEngine(db, pause=0).run(days=30)['removed'] == 2
+    assert db.count_articles() == 0
+    assert db.get_article_by_id(primary) is None
+
+
+def test_a_starred_copy_keeps_its_story(db):
+    story = make_article(1)
+    primary = db.add_article(story)
+    copy = db.add_article(dict(story, url="https://mirror.example.org/1", source_name="Mirror"))
+    db.toggle_star(copy)
+
+    assert RetentionEngine(db, pause=0).run(days=30)['removed'] == 0
+    assert db.get_article_by_id(primary)['content'] == story['content']
+
+
+def test_an_old_copy_of_a_live_story_goes_alone(db):
+    story = make_article(1, published_date=NOW)
+    primary = db.add_article(story)
+    db.add_article(dict(story, url="https://mirror.example.org/1", source_name="Mirror",
+                        published_date="2024-01-01T00:00:00Z"))
+
+    assert RetentionEngine(db, pause=0).run(days=30)['removed'] == 1
+    assert db.get_article_by_id(primary)['content'] == story['content']
+    assert [copy['id'] for copy in db.get_story_cluster(primary)] == [primary]
+
+
+def test_freed_pages_are_returned(db):
+    db.add_articles([make_article(n, content=f"{n} " + "long body text " * 2000) for n in range(40)])
+
+    progress = RetentionEngine(db, pause=0, vacuum_pages=10).run(days=30)
+
+    assert progress['freed_pages'] > 0
+    assert db.get_storage_stats()['free_pages'] == 0
+
+
+def test_only_one_run_at_a_time(db):
+    engine = RetentionEngine(db, pause=0)
+
+    assert engine.start(days=30)
+    assert not engine.start(days=30)
+    assert engine.run(days=30)['state'] == "done"
+    assert engine.start(days=30)
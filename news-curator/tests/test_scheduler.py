@@ -0,0 +1,88 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from app.scheduler import FeedScheduler
+
+
+class StubEngine:
+    """Stands in for FetchEngine: returns a fixed count or raises"""
+
+    def __init__(self, added=0, error=None):
+        self.added = added
+        self.error = error
+        self.fetched = []
+
+    async def fetch_source(self, source, raise_errors=False):
+        self.fetched.append(source['id'])
+        if self.error:
+            source['consecutive_failures'] = (source.get('consecutive_failures') or 0) + 1
+            raise self.error
+        return self.added
+
+
+def source(source_id=1, **fields):
+    return {'id': source_id, 'name': f"Source {source_id}", 'fetch_interval': 3600, **fields}
+
+
+def test_adapt_interval_follows_publishing_rate(db):
+    scheduler = FeedScheduler(db, StubEngine(), min_interval=300, max_interval=86400)
+
+    assert scheduler._adapt_interval(3600, 5) == 2700
+    assert scheduler._adapt_interval(3600, 1) == 3600
+    assert scheduler._adapt_interval(3600, 0) == 5400
+    assert scheduler._adapt_interval(350, 5) == 300
+    assert scheduler._adapt_interval(80000, 0) == 86400
+
+
+def test_initial_due_from_last_fetched():
+    last = datetime.utcnow() - timedelta(minutes=30)
+    due = FeedScheduler._initial_due(source(last_fetched=last.isoformat()))
+    assert abs(due - (time.time() + 1800)) < 5
+
+    assert FeedScheduler._initial_due(source()) <= time.time()
+
+
+def test_open_circuit_delays_initial_due():
+    closes = datetime.utcnow() + timedelta(hours=2)
+    due = FeedScheduler._initial_due(source(circuit_open_until=closes.isoformat()))
+    assert due > time.time() + 7000
+
+
+def test_sync_drops_removed_sources(db):
+    scheduler = FeedScheduler(db, StubEngine())
+    scheduler._sync_sources([source(1), source(2)])
+    assert sorted(sid for _, sid in scheduler._queue) == [1, 2]
+
+    scheduler._sync_sources([source(2)])
+    assert [sid for _, sid in scheduler._queue] == [2]
+
+
+def test_fetch_stores_adapted_interval(db):
+    db.add_source({'name': "Busy", 'url': "https://example.com/", 'feed_url': "https://example.com/feed"})
+    busy = db.get_active_sources()[0]
+    scheduler = FeedScheduler(db, StubEngine(added=10))
+    scheduler._sync_sources([busy])
+    scheduler._queue.clear()
+
+    asyncio.run(scheduler._fetch(busy))
+
+    assert db.get_active_sources()[0]['fetch_interval'] == int(busy['fetch_interval'])
+    assert busy['fetch_interval'] < 3600
+    due, source_id = scheduler._queue[0]
+    assert source_id == busy['id']
+    assert abs(due - (time.time() + busy['fetch_interval'])) < 5
+
+
+def test_failing_source_backs_off(db):
+    failing = source(consecutive_failures=1)
+    scheduler = FeedScheduler(db, StubEngine(error=RuntimeError("down")), max_interval=86400)
+    scheduler._sync_sources([failing])
+    scheduler._queue.clear()
+
+    asyncio.run(scheduler._fetch(failing))
+
+    due, _ = scheduler._queue[0]
+    # Second failure: interval * 2 ** 2
+    assert abs(due - (time.time() + 4 * 3600)) < 5
+    assert 1 not in scheduler._in_flight
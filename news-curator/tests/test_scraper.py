@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from app.scraper import WebScraper, parse_article_html
+
+PAGE = """<html><head><title>Site</title>
+<meta property="og:image" content="/img/{n}.jpg">
+<meta property="article:published_time" content="2024-02-0{n}T08:00:00Z"></head>
+<body><h1>Headline {n}</h1><article><p>Paragraph one of story {n}.</p>
+<script>tracking()</script><p>Paragraph two.</p></article></body></html>"""
+
+
+def page(n: int) -> bytes:
+    return PAGE.format(n=n).encode()
+
+
+@pytest.fixture
+def scraper():
+    scraper = WebScraper(max_connections=4, parse_workers=1)
+    yield scraper
+    scraper.close()
+
+
+def test_parse_article_html():
+    article = parse_article_html(page(1), "https://example.com/1", "Example", "tech")
+
+    assert article['title'] == "Headline 1"
+    assert article['content'] == "Paragraph one of story 1.\nParagraph two."
+    assert article['image_url'] == "https://example.com/img/1.jpg"
+    assert article['published_date'] == "2024-02-01T08:00:00Z"
+
+
+def test_extract_articles_downloads_concurrently_and_skips_failures(scraper, monkeypatch):
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+    ready = threading.Barrier(3, timeout=5)
+
+    def download(url, source_name=None, category=None, kind='page'):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        try:
+            n = int(url.rsplit("/", 1)[1])
+            if n <= 3:
+                ready.wait()  # the first three only return once all three are in flight
+            return None if n == 5 else page(n)
+        finally:
+            with lock:
+                in_flight -= 1
+
+    monkeypatch.setattr(scraper, "download", download)
+    urls = [f"https://example.com/{n}" for n in range(1, 7)]
+
+    articles = list(scraper.extract_articles(urls + urls[:2], "Example", "tech"))
+
+    assert sorted(article['url'] for article in articles) == [url for url in urls if not url.endswith("/5")]
+    assert all(article['source_name'] == "Example" for article in articles)
+    assert peak >= 3
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from app.snapshots import SnapshotStore
+
+
+@pytest.fixture
+def store(db, tmp_path):
+    return SnapshotStore(db, str(tmp_path / "snapshots"))
+
+
+def test_put_and_read_round_trip(store):
+    body = b"<rss>" + b"item " * 1000 + b"</rss>"
+    digest = store.put("https://example.com/feed", body, source_name="Example")
+
+    assert store.read(digest) == body
+    assert store.path(digest).stat().st_size < len(body)
+
+
+def test_same_body_is_stored_once(store):
+    first = store.put("https://example.com/feed", b"same body")
+    second = store.put("https://example.com/feed?again", b"same body")
+
+    assert first == second
+    assert store.usage()["snapshots"] == 1
+
+
+def test_streamed_body_matches_put(store, tmp_path):
+    writer = store.writer("https://example.com/big", "feed")
+    for chunk in (b"part one, ", b"part two"):
+        writer.write(chunk)
+
+    assert writer.commit() == store.put("https://example.com/big", b"part one, part two")
+
+
+def test_discarded_body_leaves_nothing(store):
+    writer = store.writer("https://example.com/cut-short", "feed")
+    writer.write(b"half a feed")
+    writer.discard()
+
+    assert store.usage()["snapshots"] == 0
+    assert [name for name in os.listdir(store.directory)] == []
+
+
+def test_least_recently_fetched_are_evicted(db, tmp_path):
+    store = SnapshotStore(db, str(tmp_path / "snapshots"), max_bytes=100)
+    digests = [store.put(f"https://example.com/{n}", os.urandom(60)) for n in range(3)]
+
+    assert store.path(digests[0]) is None
+    assert store.read(digests[2]) is not None
+    assert store.usage()["stored_bytes"] <= 100
@@ -0,0 +1,123 @@
+import asyncio
+import http.server
+import socket
+import threading
+
+import httpx
+import pytest
+import requests
+
+from app.transport import DNSCache, TokenBucket, Transport
+
+
+def test_token_bucket_allows_a_burst_then_spaces_requests():
+    bucket = TokenBucket(rate=10, burst=3)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_dns_cache_reuses_lookups(monkeypatch):
+    lookups = []
+
+    def getaddrinfo(host, port, **kwargs):
+        lookups.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", port))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    cache = DNSCache(ttl=60)
+
+    assert cache.resolve("example.com", 443) == ["10.0.0.1"]
+    assert cache.resolve("example.com", 443) == ["10.0.0.1"]
+    assert lookups == ["example.com"]
+
+    cache.forget("example.com", 443)
+    cache.resolve("example.com", 443)
+    assert lookups == ["example.com", "example.com"]
+
+
+def test_dns_cache_remembers_failures(monkeypatch):
+    lookups = []
+
+    def getaddrinfo(host, port, **kwargs):
+        lookups.append(host)
+        raise socket.gaierror("Name or service not known")
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    cache = DNSCache(negative_ttl=60)
+
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.resolve("missing.invalid", 80)
+    assert lookups == ["missing.invalid"]
+
+
+def test_dns_cache_is_bounded():
+    cache = DNSCache(max_entries=2)
+    for host in ("a", "b", "c"):
+        cache._store((host, 80), ["10.0.0.1"])
+
+    assert cache._cached(("a", 80)) is None
+    assert cache._cached(("c", 80)) == ["10.0.0.1"]
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"hello " * 1000
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """A local HTTP server listening on 127.0.0.1 only"""
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get_async(transport, url):
+    async def get():
+        try:
+            async with transport.async_client.stream("GET", url) as response:
+                return response.status_code, b"".join([chunk async for chunk in response.aiter_bytes()])
+        finally:
+            await transport.aclose()
+    return asyncio.run(get())
+
+
+def test_both_clients_fail_over_to_the_next_address(server):
+    transport = Transport("test")
+    # Nothing listens on 127.0.0.2, so that connect is refused
+    transport.dns_cache._store(("example.test", server), ["127.0.0.2", "127.0.0.1"])
+    url = f"http://example.test:{server}/feed"
+
+    assert transport.get(url).content == b"hello " * 1000
+    assert get_async(transport, url) == (200, b"hello " * 1000)
+
+
+def test_async_client_maps_connect_errors_and_forgets_the_host(server):
+    transport = Transport("test")
+    transport.dns_cache._store(("example.test", server), ["127.0.0.2"])
+
+    with pytest.raises(httpx.ConnectError):
+        get_async(transport, f"http://example.test:{server}/feed")
+    assert transport.dns_cache._cached(("example.test", server)) is None
+
+
+def test_sync_client_forgets_the_host_when_every_address_fails(server):
+    transport = Transport("test")
+    transport.dns_cache._store(("example.test", server), ["127.0.0.2"])
+
+    with pytest.raises(requests.ConnectionError):
+        transport.get(f"http://example.test:{server}/feed")
+    assert transport.dns_cache._cached(("example.test", server)) is None